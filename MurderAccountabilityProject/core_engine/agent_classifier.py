@@ -4,106 +4,142 @@ Rule-first classifier with optional LLM check to decide if an ACTIVE record
 should be sent for human review (e.g., to Restricted Vault).
 - No PII required; uses coarse fields (county/state/date/mo_tags).
 - LLM is OFF by default; enable via env VARS (see below).
+- Cheap to import: policies.yaml is read, logging configured and the rule
+  table compiled on first classification; the OpenAI SDK is imported on the
+  first LLM call.
 """
 
 from datetime import date
 import json
 import os
-from dotenv import load_dotenv
-from config import get_cfg
+from config import get_cfg, get_policy, load_env
 # --- add near top (after imports) ---
 import logging
 from functools import lru_cache
-from typing import Set, Tuple
-from openai import OpenAI
+from typing import List, Set, Tuple
+from rule_engine import build_engine
 
-load_dotenv()
+load_env()
 
 # Budget knobs (env-var overrideable)
 MAX_TOKENS = int(os.getenv("LLM_CLASSIFIER_MAX_TOKENS", "64"))
 TEMPERATURE = float(os.getenv("LLM_CLASSIFIER_TEMPERATURE", "0"))
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
 # Unified LLM mode: off|estimate|on
 MODE = os.getenv("LLM_MODE", os.getenv("ENABLE_LLM_CLASSIFIER", "0") == "1" and "on" or "off").lower()
 LLM_ENABLED = MODE == "on"
 ESTIMATE_ONLY = MODE == "estimate"
-_CFG = get_cfg()
-_MODEL_DEFAULT = (((_CFG or {}).get("classifier") or {}).get("model")) or "gpt-5"
-MODEL_NAME = os.getenv("LLM_CLASSIFIER_MODEL", _MODEL_DEFAULT)
+_CFG = None  # classifier block of policies.yaml, read on first use
+_MODEL_NAME = None
 
-# Token budget (multi-process safe via append-only file)
+def _classifier_cfg() -> dict:
+    global _CFG
+    if _CFG is None:
+        _CFG = (get_cfg() or {}).get("classifier") or {}
+    return _CFG
+
+def _model_name() -> str:
+    global _MODEL_NAME
+    if _MODEL_NAME is None:
+        env = os.getenv("LLM_CLASSIFIER_MODEL")
+        _MODEL_NAME = env if env is not None else (_classifier_cfg().get("model") or "gpt-5")
+    return _MODEL_NAME
+
+# Token budget (multi-process safe SQLite ledger, see budget_ledger.py)
 BUDGET = int(os.getenv("LLM_MAX_TOKENS", "0"))
-BUDGET_FILE = os.getenv("LLM_BUDGET_FILE", ".llm_budget.log")
-
-def _accumulate(n: int) -> int:
-    with open(BUDGET_FILE, "a", encoding="utf-8") as f:
-        f.write(f"{n}\n")
-    total = 0
-    with open(BUDGET_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line.isdigit():
-                total += int(line)
-    return total
+BUDGET_FILE = os.getenv("LLM_BUDGET_FILE", ".llm_budget.sqlite")
+
+# Async batched review (used by pipeline.ingest_batch when LLM_MODE=on)
+REVIEW_BATCH = int(os.getenv("LLM_REVIEW_BATCH", "8"))
+REVIEW_CONCURRENCY = int(os.getenv("LLM_REVIEW_CONCURRENCY", "4"))
+
+# Persistent decision cache (shared by processes; "off" disables)
+CACHE_FILE = os.getenv("LLM_CACHE_FILE", ".llm_cache.sqlite")
+CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "200000"))
+_DECISIONS = None
+
+def _decision_cache():
+    global _DECISIONS
+    if _DECISIONS is None and CACHE_FILE.lower() not in ("", "off", "none", "0"):
+        from llm_cache import DecisionCache
+        _DECISIONS = DecisionCache(CACHE_FILE, CACHE_TTL_DAYS * 86400, CACHE_MAX_ENTRIES)
+    return _DECISIONS
+
+def cache_stats() -> dict:
+    """Hit/miss counts of the persistent decision cache in this process."""
+    cache = _decision_cache()
+    return cache.stats() if cache else {"hits": 0, "misses": 0}
+
+_LEDGER = None
+
+def _ledger():
+    global _LEDGER
+    if _LEDGER is None:
+        from budget_ledger import BudgetLedger
+        # LLM_RUN_ID groups spend per run; ingest_quickcheck sets it for its workers
+        _LEDGER = BudgetLedger(BUDGET_FILE, limit=BUDGET, run_id=os.getenv("LLM_RUN_ID", ""))
+    return _LEDGER
 
 def _env_list(name: str) -> Set[str]:
     raw = os.getenv(name, "")
     return {x.strip().lower() for x in raw.split(",") if x.strip()}
 
-# --- simple, transparent rules ---
+# --- simple, transparent rules (env vars first, then classifier.rules.table) ---
 WATCHLIST_COUNTIES = _env_list("CLASSIFIER_WATCHLIST_COUNTIES")
-RECENT_YEAR = int(os.getenv("CLASSIFIER_RECENT_YEAR", "2010"))
 FORCE_REVIEW_STATES = _env_list("CLASSIFIER_FORCE_REVIEW_STATES")
 MO_KEYWORDS = _env_list("CLASSIFIER_MO_KEYWORDS")
+_RULES = None  # compiled on first use (in_file watchlists can be large)
 
-# Announce LLM usage mode at import time
-if LLM_ENABLED:
-    logging.info(
-        "LLM classifier mode=on model=%s max_tokens=%s temperature=%s budget=%s file=%s",
-        MODEL_NAME,
-        MAX_TOKENS,
-        TEMPERATURE,
-        BUDGET or "none",
-        BUDGET_FILE,
-    )
-elif ESTIMATE_ONLY:
-    logging.info("LLM classifier mode=estimate (no LLM calls; rules-only)")
-else:
-    logging.info("LLM classifier mode=off (no token spend)")
-
-def _year_of(rec) -> int:
-    # rec["date"] like 'YYYY-MM-DD'
-    d = (rec.get("date") or "1900-01-01")
-    try:
-        return int(d[:4])
-    except Exception:
-        return 1900
+def _rules_cfg() -> dict:
+    return _classifier_cfg().get("rules") or {}
 
-def _rule_based(rec: dict) -> Tuple[bool, str]:
-    if (rec.get("case_status") or "").lower() != "active":
-        return (False, "non-active")
+def _recent_year() -> int:
+    return int(os.getenv("CLASSIFIER_RECENT_YEAR", str(_rules_cfg().get("recent_year", 2010))))
 
-    # 1) recent cases → higher sensitivity
-    yr = _year_of(rec)
-    if yr >= RECENT_YEAR:
-        # 2) watchlist counties
-        county = (rec.get("county") or "").strip().lower()
-        if county and county in {c.lower() for c in WATCHLIST_COUNTIES}:
-            return (True, f"recent>= {RECENT_YEAR} & watchlist_county={county}")
+def _rules():
+    global _RULES
+    if _RULES is None:
+        _announce_mode()
+        # in_file paths are relative to policies.yaml, not to the current directory
+        _RULES = build_engine(_rules_cfg(), _recent_year(), WATCHLIST_COUNTIES, FORCE_REVIEW_STATES, MO_KEYWORDS,
+                              base_dir=get_policy().path.parent)
+    return _RULES
 
+_LAZY = {"RULES": _rules, "MODEL_NAME": _model_name, "RECENT_YEAR": _recent_year}
 
-        # 3) state-level override
-        st = (rec.get("state") or "").strip()
-        if st and st in FORCE_REVIEW_STATES:
-            return (True, f"recent>= {RECENT_YEAR} & state_override={st}")
+def __getattr__(name):
+    # agent_classifier.RULES / MODEL_NAME / RECENT_YEAR still work for callers
+    if name in _LAZY:
+        return _LAZY[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-        # 4) MO keywords (if present in actives pipeline)
-        mos = [str(m).lower() for m in rec.get("mo_tags") or []]
-        if MO_KEYWORDS and any(m in MO_KEYWORDS for m in mos):
-            return (True, "recent & mo_keyword")
+def _announce_mode():
+    # Announce LLM usage mode when the classifier is first used
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if LLM_ENABLED:
+        logging.info(
+            "LLM classifier mode=on model=%s max_tokens=%s temperature=%s budget=%s file=%s",
+            _model_name(),
+            MAX_TOKENS,
+            TEMPERATURE,
+            BUDGET or "none",
+            BUDGET_FILE,
+        )
+    elif ESTIMATE_ONLY:
+        logging.info("LLM classifier mode=estimate (no LLM calls; rules-only)")
+    else:
+        logging.info("LLM classifier mode=off (no token spend)")
 
-    return (False, "no-rule-trigger")
+def _rule_based(rec: dict) -> Tuple[bool, str]:
+    return (_RULES or _rules()).check(rec)
+
+def rule_hits() -> dict:
+    """Per-rule hit counts in this process."""
+    return dict(_RULES.hits) if _RULES else {}
+
+# System prompt of single-record checks (batched reviews use review_queue.SYSTEM_PROMPT)
+_RECORD_PROMPT = "Return strict JSON: {\"review\":bool,\"reason\":string}"
 
 # --- replace _llm_check with this adapter ---
 @lru_cache(maxsize=4096)
@@ -113,53 +149,69 @@ def _llm_check_cached(serialized: str) -> Tuple[bool, str]:
     Returns (review?, 'llm:<reason>') or (False, 'llm_error:<...>').
     """
     # Guard for disabled/estimate modes or disabled model names
-    if not LLM_ENABLED or ESTIMATE_ONLY or MODEL_NAME.lower() in ("off", "disabled", "none"):
+    if not LLM_ENABLED or ESTIMATE_ONLY or _model_name().lower() in ("off", "disabled", "none"):
         return (False, "estimate-only" if ESTIMATE_ONLY else "llm_off")
+    cache = _decision_cache()
+    key = cache.key(serialized, _model_name(), TEMPERATURE, _RECORD_PROMPT) if cache else None
+    if cache:
+        hit = cache.get(key)
+        if hit:
+            return hit
+    decision = _llm_call(serialized)
+    if cache and decision[1].startswith("llm:"):
+        cache.put(key, decision)
+    return decision
+
+def _llm_call(serialized: str) -> Tuple[bool, str]:
+    from review_queue import estimate_tokens
+    model = _model_name()
+    ledger = _ledger()
+    ticket = ledger.reserve(estimate_tokens(serialized) + MAX_TOKENS + 16)
+    if ticket is None:
+        return (False, "llm_error:BudgetExceeded")
+    used = 0
     try:
         # 1) Prefer your local llm.py
         try:
             import llm  # your file
             messages = [
-                {"role":"system","content":"Return strict JSON: {\"review\":bool,\"reason\":string}"},
+                {"role":"system","content":_RECORD_PROMPT},
                 {"role":"user","content":serialized}
             ]
-            txt = llm.chat(messages, model=MODEL_NAME, max_tokens=MAX_TOKENS, temperature=TEMPERATURE)
+            txt = llm.chat(messages, model=model, max_tokens=MAX_TOKENS, temperature=TEMPERATURE)
         except Exception:
             # 2) Fallback to OpenAI SDK
-            client = OpenAI(timeout=15)
+            from openai import OpenAI
+            client = OpenAI(timeout=15, base_url=os.getenv("LLM_BASE_URL") or None)
             rsp = client.chat.completions.create(
-                model=MODEL_NAME,
+                model=model,
                 messages=[
-                    {"role":"system","content":"Return strict JSON: {\"review\":bool,\"reason\":string}"},
+                    {"role":"system","content":_RECORD_PROMPT},
                     {"role":"user","content":serialized}
                 ],
                 temperature=TEMPERATURE,
                 max_tokens=MAX_TOKENS,
             )
             txt = rsp.choices[0].message.content
-            # Audit usage and enforce optional budget
-            try:
-                u = getattr(rsp, "usage", None)
-                logging.info(
-                    "LLM used model=%s total=%s prompt=%s completion=%s",
-                    getattr(rsp, "model", "?"),
-                    getattr(u, "total_tokens", "?"),
-                    getattr(u, "prompt_tokens", "?"),
-                    getattr(u, "completion_tokens", "?")
-                )
-                if BUDGET and u and getattr(u, "total_tokens", None):
-                    total = _accumulate(u.total_tokens)
-                    if total > BUDGET:
-                        raise RuntimeError(f"LLM budget exceeded: {total}>{BUDGET}")
-            except Exception:
-                pass
+            # Audit usage; settled against the reservation below
+            u = getattr(rsp, "usage", None)
+            used = getattr(u, "total_tokens", None) or 0
+            logging.info(
+                "LLM used model=%s total=%s prompt=%s completion=%s",
+                getattr(rsp, "model", "?"),
+                getattr(u, "total_tokens", "?"),
+                getattr(u, "prompt_tokens", "?"),
+                getattr(u, "completion_tokens", "?")
+            )
 
         data = json.loads(txt.strip())
         return (bool(data.get("review", False)), f"llm:{data.get('reason','')[:60]}")
     except Exception as e:
         return (False, f"llm_error:{type(e).__name__}")
+    finally:
+        ledger.settle(ticket, used, model)
 
-def _llm_check(rec: dict) -> Tuple[bool, str]:
+def _payload(rec: dict) -> str:
     # Keep the payload tiny: only fields that affect triage
     payload = {
         "case_status": rec.get("case_status"),
@@ -171,7 +223,10 @@ def _llm_check(rec: dict) -> Tuple[bool, str]:
         "agency": rec.get("agency"),
     }
     # single-line JSON to minimize tokens
-    return _llm_check_cached(json.dumps(payload, separators=(",",":")))
+    return json.dumps(payload, separators=(",",":"))
+
+def _llm_check(rec: dict) -> Tuple[bool, str]:
+    return _llm_check_cached(_payload(rec))
 
 def should_route_for_review(rec: dict) -> Tuple[bool, str]:
     """
@@ -187,17 +242,69 @@ def should_route_for_review(rec: dict) -> Tuple[bool, str]:
         return (False, "estimate-only" if ESTIMATE_ONLY else "passed-rules")
     return _llm_check(rec)
 
+def review_batch(recs: list) -> List[Tuple[bool, str]]:
+    """
+    should_route_for_review over many records. Records the rules leave open
+    are sent to the LLM through the async ReviewQueue (REVIEW_BATCH payloads
+    per request, REVIEW_CONCURRENCY requests in flight, tokens reserved
+    against LLM_MAX_TOKENS before each request).
+    """
+    out: List[Tuple[bool, str]] = [(False, "")] * len(recs)
+    pending = {}
+    model = _model_name()
+    if os.getenv("CLASSIFIER_DEBUG_ACTIVE") == "1":
+        for rec in recs:
+            if (rec.get("case_status") or "").lower() == "active":
+                print("DEBUG:", rec.get("state"), rec.get("county"))
+    for i, (rule, why) in enumerate(_rules().check_batch(recs)):
+        rec = recs[i]
+        if rule:
+            out[i] = (True, why)
+        elif ESTIMATE_ONLY or not LLM_ENABLED:
+            out[i] = (False, "estimate-only" if ESTIMATE_ONLY else "passed-rules")
+        elif model.lower() in ("off", "disabled", "none"):
+            out[i] = (False, "llm_off")
+        else:
+            pending[i] = _payload(rec)
+    cache = _decision_cache()
+    if pending and cache:
+        from review_queue import SYSTEM_PROMPT
+        keys = {p: cache.key(p, model, TEMPERATURE, SYSTEM_PROMPT) for p in set(pending.values())}
+        hits = cache.get_many(keys.values())
+        for i, p in list(pending.items()):
+            if keys[p] in hits:
+                out[i] = hits[keys[p]]
+                del pending[i]
+    if pending:
+        from review_queue import ReviewQueue
+        queue = ReviewQueue(
+            model, MAX_TOKENS, TEMPERATURE,
+            batch_size=REVIEW_BATCH, concurrency=REVIEW_CONCURRENCY,
+            ledger=_ledger(),
+        )
+        fresh = {}
+        for (i, p), decision in zip(pending.items(), queue.review_sync(list(pending.values()))):
+            out[i] = decision
+            if cache and decision[1].startswith("llm:"):
+                fresh[keys[p]] = decision
+        if cache:
+            cache.put_many(fresh)
+    return out
+
 def _print_effective_config() -> None:
     print("Effective classifier config:")
     print(f"  MODE: {MODE}")
-    print(f"  MODEL_NAME: {MODEL_NAME}")
+    print(f"  MODEL_NAME: {_model_name()}")
     print(f"  MAX_TOKENS: {MAX_TOKENS}")
     print(f"  TEMPERATURE: {TEMPERATURE}")
-    print(f"  BUDGET: {BUDGET}  FILE: {BUDGET_FILE}")
-    print(f"  RECENT_YEAR: {RECENT_YEAR}")
+    print(f"  BUDGET: {BUDGET}  FILE: {BUDGET_FILE}  SPENT: {_ledger().spent()}")
+    print(f"  REVIEW_BATCH: {REVIEW_BATCH}  REVIEW_CONCURRENCY: {REVIEW_CONCURRENCY}")
+    print(f"  CACHE_FILE: {CACHE_FILE}  TTL_DAYS: {CACHE_TTL_DAYS}  MAX_ENTRIES: {CACHE_MAX_ENTRIES}")
+    print(f"  RECENT_YEAR: {_recent_year()}")
     print(f"  WATCHLIST_COUNTIES: {len(WATCHLIST_COUNTIES)} entries")
     print(f"  FORCE_REVIEW_STATES: {len(FORCE_REVIEW_STATES)} entries")
     print(f"  MO_KEYWORDS: {len(MO_KEYWORDS)} entries")
+    print(f"  RULES: {', '.join(r.name for r in _rules().rules) or 'none'}")
 
 if __name__ == "__main__":
     import argparse
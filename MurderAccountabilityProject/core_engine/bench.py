@@ -0,0 +1,306 @@
+r"""
+Bench
+Throughput benchmarks for the core_engine stages on synthetic data.
+
+Each (stage, size) runs in a fresh process, so peak RSS is per stage. Record
+stages time every call (latency percentiles in microseconds); file stages
+time whole passes over the dataset, --repeat times. Results go to a JSON file
+that a later run can --compare against.
+
+Usage (PowerShell):
+  python -m bench --sizes 10000,100000 --out .\data\bench\results.json
+  python -m bench --stages scan_pii,ingest_batch --sizes 100000 --compare .\data\bench\results.json
+
+Datasets come from mock_data_generator (fixed --seed) and are cached under
+--data-dir. The LLM is forced off. The ingest stages write to throwaway sinks
+of the storage backend policies.yaml configures (same batch/fsync settings,
+in a temporary directory), never to the configured sinks themselves.
+
+Startup budget: --startup times `import <cli>` for the CLI modules in fresh
+interpreters (best of --repeat, interpreter start subtracted) and exits 1 if
+any exceeds --startup-budget seconds:
+  python -m bench --startup --startup-budget 0.5
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+import multiprocessing
+
+RECORD_STAGES = ["resolve_status", "scan_pii", "minimal_active", "rule_based", "ingest_record"]
+FILE_STAGES = ["read_jsonl", "ingest_batch", "eagle_scan", "hotspot_query"]
+STAGES = RECORD_STAGES + FILE_STAGES
+STARTUP_MODULES = ["eagle_scanner", "ingest_quickcheck", "pipeline", "agent_classifier"]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(kb / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:  # Windows
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / 2**20, 1)
+        except (ImportError, AttributeError):
+            return None
+
+
+def percentiles(samples_ns: list) -> dict:
+    if not samples_ns:
+        return {}
+    s = sorted(samples_ns)
+
+    def at(q):
+        return round(s[min(len(s) - 1, int(q * len(s)))] / 1000, 2)
+
+    return {"p50_us": at(0.50), "p90_us": at(0.90), "p99_us": at(0.99), "max_us": round(s[-1] / 1000, 2)}
+
+
+def _time_each(fn, items) -> list:
+    clock = time.perf_counter_ns
+    lat = []
+    for it in items:
+        t = clock()
+        fn(it)
+        lat.append(clock() - t)
+    return lat
+
+
+def _bench_sinks(tmp: str) -> list:
+    """Sinks like the configured ones but under `tmp`, patched into pipeline._SINKS."""
+    import pipeline
+    import storage
+
+    cfg = dict(storage.storage_cfg())
+    backend = (cfg.get("backend") or "memory").lower()
+    if backend != "memory":
+        cfg["path"] = os.path.join(tmp, "sinks.db" if backend == "sqlite" else "sinks")
+    sinks = {name: storage.make_sink(name, cfg) for name in ("research_lake", "restricted_vault", "quarantine")}
+    pipeline._SINKS = {"research": sinks["research_lake"].append,
+                       "restricted": sinks["restricted_vault"].append,
+                       "quarantine": sinks["quarantine"].append}
+    return list(sinks.values())
+
+
+def _run(job) -> dict:
+    """Child-process entry: run one stage over one dataset."""
+    stage, path, repeat, batch_size = job
+    os.environ["LLM_MODE"] = "off"
+    import logging
+    logging.disable(logging.CRITICAL)
+    tmp, sinks = None, []
+    if stage in ("ingest_record", "ingest_batch"):
+        tmp = tempfile.mkdtemp(prefix="bench-sinks-")
+        sinks = _bench_sinks(tmp)
+    try:
+        return _run_stage(stage, Path(path), repeat, batch_size, sinks)
+    finally:
+        for sink in sinks:
+            sink.close()
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _run_stage(stage: str, path: Path, repeat: int, batch_size: int, sinks: list) -> dict:
+    from jsonl_io import read_jsonl
+
+    lat, passes, n = [], [], 0
+    if stage in RECORD_STAGES:
+        recs = list(read_jsonl(path))
+        from status_resolver import resolve_status
+        if stage == "resolve_status":
+            items, fn = recs, resolve_status
+        elif stage == "scan_pii":
+            from pii import scan_pii
+            items, fn = recs, scan_pii
+        elif stage == "minimal_active":
+            from transforms import minimal_active
+            items, fn = [r for r in recs if resolve_status(r) == "active"], minimal_active
+        elif stage == "rule_based":
+            from transforms import minimal_active
+            from agent_classifier import _rule_based
+            items, fn = [minimal_active(r) for r in recs if resolve_status(r) == "active"], _rule_based
+        else:
+            from pipeline import ingest_record
+            items, fn = recs, ingest_record
+        n = len(items)
+        for _ in range(repeat):
+            t = time.perf_counter()
+            lat += _time_each(fn, items)
+            passes.append(time.perf_counter() - t)
+            for sink in sinks:  # bench sinks only (see _bench_sinks)
+                sink.clear()
+    else:
+        if stage == "read_jsonl":
+            def once():
+                return sum(1 for _ in read_jsonl(path))
+        elif stage == "ingest_batch":
+            from pipeline import ingest_batch
+
+            def once():
+                for sink in sinks:
+                    sink.clear()
+                total = 0
+                chunk = []
+                clock = time.perf_counter_ns
+                for r in read_jsonl(path):
+                    chunk.append(r)
+                    if len(chunk) >= batch_size:
+                        t = clock()
+                        ingest_batch(chunk, chunk_size=batch_size)
+                        lat.append((clock() - t) // len(chunk))  # per record, per chunk
+                        total += len(chunk)
+                        chunk = []
+                if chunk:
+                    t = clock()
+                    ingest_batch(chunk, chunk_size=batch_size)
+                    lat.append((clock() - t) // len(chunk))
+                    total += len(chunk)
+                for sink in sinks:
+                    sink.flush()
+                return total
+        elif stage == "eagle_scan":
+            from eagle_scanner import scan
+
+            def once():
+                return scan(path, 2000, None)[0]
+        else:  # hotspot_query: index built once, then one query per year window
+            from hotspot_index import HotspotIndex
+            idx = HotspotIndex()
+            idx.refresh(path)
+            windows = [(lo, lo + span) for lo in range(1976, 2026, 5) for span in (0, 4, 9, 24)]
+
+            def once():
+                clock = time.perf_counter_ns
+                for lo, hi in windows:
+                    t = clock()
+                    idx.query(lo, hi)
+                    lat.append(clock() - t)
+                return idx.total
+        for _ in range(repeat):
+            t = time.perf_counter()
+            n = once()
+            passes.append(time.perf_counter() - t)
+    best = min(passes)
+    out = {"stage": stage, "records": n, "seconds": round(best, 4),
+           "rec_per_s": round(n / best) if best else None, "peak_rss_mb": peak_rss_mb()}
+    out.update(percentiles(lat))
+    return out
+
+
+def _wall(code: str, env: dict) -> float:
+    t = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+    return time.perf_counter() - t
+
+
+def startup_times(repeat: int) -> list:
+    """Import time (s) of each CLI module in a fresh interpreter, LLM off."""
+    env = dict(os.environ, LLM_MODE="off")
+    base = min(_wall("pass", env) for _ in range(repeat))
+    return [{"module": m, "import_s": round(max(0.0, min(_wall(f"import {m}", env)
+                                                         for _ in range(repeat)) - base), 4)}
+            for m in STARTUP_MODULES]
+
+
+def dataset(data_dir: Path, size: int, seed: int) -> Path:
+    from mock_data_generator import generate
+    path = data_dir / f"synthetic_{size}_s{seed}.jsonl"
+    if not path.exists():
+        generate(path, size, seed)
+    return path
+
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results: list, baseline: dict):
+    old = {(r["stage"], r["size"]): r for r in baseline.get("results", [])}
+    print("\nvs baseline (rec/s):")
+    for r in results:
+        b = old.get((r["stage"], r["size"]))
+        if b and b.get("rec_per_s") and r.get("rec_per_s"):
+            delta = (r["rec_per_s"] / b["rec_per_s"] - 1) * 100
+            flag = "  <-- slower" if delta < -10 else ""
+            print(f"  {r['stage']:<15} {r['size']:>9,}  {b['rec_per_s']:>11,} -> {r['rec_per_s']:>11,}  ({delta:+.1f}%){flag}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark core_engine stages on synthetic data.")
+    ap.add_argument("--sizes", default="10000,100000", help="Comma-separated dataset sizes")
+    ap.add_argument("--stages", default="all", help=f"Comma-separated subset of: {','.join(STAGES)}")
+    ap.add_argument("--repeat", type=int, default=3, help="Passes per stage; the fastest is reported")
+    ap.add_argument("--batch-size", type=int, default=5000, help="Chunk size for ingest_batch")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--data-dir", type=Path, default=Path("data/bench"))
+    ap.add_argument("--out", type=Path, default=Path("data/bench/results.json"))
+    ap.add_argument("--compare", type=Path, help="Earlier results JSON to compare against")
+    ap.add_argument("--startup", action="store_true",
+                    help="Only measure CLI import times against --startup-budget")
+    ap.add_argument("--startup-budget", type=float, default=0.5,
+                    help="Max import time per CLI module in seconds (default: 0.5)")
+    args = ap.parse_args()
+
+    if args.startup:
+        over = []
+        for r in startup_times(args.repeat):
+            ok = r["import_s"] <= args.startup_budget
+            print(f"{r['module']:<20} {r['import_s'] * 1000:>8.1f} ms  {'ok' if ok else 'OVER BUDGET'}")
+            if not ok:
+                over.append(r["module"])
+        raise SystemExit(1 if over else 0)
+
+    stages = STAGES if args.stages == "all" else [s.strip() for s in args.stages.split(",")]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        ap.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+    sizes = [int(s) for s in args.sizes.split(",")]
+    args.data_dir.mkdir(parents=True, exist_ok=True)
+
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'stage':<15} {'size':>9} {'rec/s':>11} {'p50 us':>8} {'p99 us':>8} {'RSS MB':>7}")
+    for size in sizes:
+        path = dataset(args.data_dir, size, args.seed)
+        for stage in stages:
+            # fresh process per stage: isolated peak RSS, no warm caches from earlier stages
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                r = pool.submit(_run, (stage, str(path), args.repeat, args.batch_size)).result()
+            r["size"] = size
+            results.append(r)
+            print(f"{stage:<15} {size:>9,} {r['rec_per_s'] or 0:>11,} {r.get('p50_us', '-'):>8} "
+                  f"{r.get('p99_us', '-'):>8} {r['peak_rss_mb'] if r['peak_rss_mb'] is not None else '-':>7}")
+
+    from jsonl_io import BACKEND
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": _git_rev(), "python": platform.python_version(),
+            "platform": platform.platform(), "cpus": os.cpu_count(),
+            "jsonl_backend": BACKEND, "seed": args.seed, "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nWrote {args.out}")
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
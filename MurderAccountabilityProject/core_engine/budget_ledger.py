@@ -0,0 +1,148 @@
+"""
+Budget Ledger
+Token accounting for LLM calls, shared by every process of a run.
+
+The ledger is a small SQLite file:
+  - spend        tokens and calls per (model, run); the running total is kept
+                 in its own row, so checking the budget is one lookup
+  - reservations worst-case tokens held by requests in flight
+
+reserve(n) checks total + outstanding reservations + n against the limit and
+takes the reservation in one write transaction, so parallel workers cannot
+overshoot the budget between them. settle() releases the reservation and
+records what the call actually used.
+
+Usage:
+  python -m budget_ledger              # totals and per-model/per-run breakdown
+  python -m budget_ledger --reset      # start over
+"""
+import os
+import sqlite3
+import time
+from typing import Dict, Optional, Tuple
+
+TOTAL_KEY = ("*", "*")  # (model, run) of the running-total row
+STALE_RESERVATION_S = 600  # reservations of crashed processes expire
+
+
+class BudgetLedger:
+    def __init__(self, path: str, limit: int = 0, run_id: str = ""):
+        self.path = path
+        self.limit = limit
+        self.run_id = run_id or time.strftime("%Y%m%dT%H%M%S")
+        self._db = None
+
+    def _conn(self):
+        if self._db is None:
+            # autocommit; write transactions are opened explicitly with BEGIN IMMEDIATE
+            self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS spend (model TEXT NOT NULL, run TEXT NOT NULL,"
+                " tokens INTEGER NOT NULL DEFAULT 0, calls INTEGER NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (model, run))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS reservations (id INTEGER PRIMARY KEY,"
+                " tokens INTEGER NOT NULL, pid INTEGER NOT NULL, created REAL NOT NULL)"
+            )
+        return self._db
+
+    def _add(self, db, model: str, tokens: int):
+        for m, r in ((model, self.run_id), TOTAL_KEY):
+            db.execute(
+                "INSERT INTO spend (model, run, tokens, calls) VALUES (?, ?, ?, 1)"
+                " ON CONFLICT(model, run) DO UPDATE SET tokens = tokens + excluded.tokens, calls = calls + 1",
+                (m, r, tokens),
+            )
+
+    def spent(self) -> int:
+        row = self._conn().execute("SELECT tokens FROM spend WHERE model = ? AND run = ?", TOTAL_KEY).fetchone()
+        return row[0] if row else 0
+
+    def record(self, tokens: int, model: str = "?") -> int:
+        """Add actual usage; returns the new total."""
+        db = self._conn()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            self._add(db, model, tokens)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return self.spent()
+
+    def reserve(self, tokens: int) -> Optional[int]:
+        """
+        Hold `tokens` against the limit before a call. Returns a ticket for
+        settle(), or None when the call would not fit. Without a limit nothing
+        is written and the ticket is 0.
+        """
+        if not self.limit:
+            return 0
+        db = self._conn()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM reservations WHERE created < ?", (time.time() - STALE_RESERVATION_S,))
+            (held,) = db.execute("SELECT COALESCE(SUM(tokens), 0) FROM reservations").fetchone()
+            row = db.execute("SELECT tokens FROM spend WHERE model = ? AND run = ?", TOTAL_KEY).fetchone()
+            if (row[0] if row else 0) + held + tokens > self.limit:
+                db.execute("ROLLBACK")
+                return None
+            cur = db.execute("INSERT INTO reservations (tokens, pid, created) VALUES (?, ?, ?)",
+                             (tokens, os.getpid(), time.time()))
+            db.execute("COMMIT")
+            return cur.lastrowid
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def settle(self, ticket: int, used: int, model: str = "?"):
+        """Release a reservation and record actual usage (0 if unknown)."""
+        if not ticket and not used:
+            return
+        db = self._conn()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if ticket:
+                db.execute("DELETE FROM reservations WHERE id = ?", (ticket,))
+            if used:
+                self._add(db, model, used)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def breakdown(self) -> Dict[Tuple[str, str], Tuple[int, int]]:
+        """{(model, run): (tokens, calls)} excluding the total row."""
+        rows = self._conn().execute(
+            "SELECT model, run, tokens, calls FROM spend WHERE NOT (model = ? AND run = ?) ORDER BY run, model",
+            TOTAL_KEY,
+        )
+        return {(m, r): (t, c) for m, r, t, c in rows}
+
+    def reset(self):
+        db = self._conn()
+        db.execute("DELETE FROM spend")
+        db.execute("DELETE FROM reservations")
+
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Show or reset the LLM token ledger.")
+    ap.add_argument("--file", default=os.getenv("LLM_BUDGET_FILE", ".llm_budget.sqlite"))
+    ap.add_argument("--reset", action="store_true", help="Clear all recorded spend and reservations")
+    args = ap.parse_args()
+    ledger = BudgetLedger(args.file, limit=int(os.getenv("LLM_MAX_TOKENS", "0")))
+    if args.reset:
+        ledger.reset()
+        print(f"Ledger reset: {args.file}")
+        return
+    print(f"Ledger: {args.file}")
+    print(f"  total: {ledger.spent()}  budget: {ledger.limit or 'none'}")
+    for (model, run), (tokens, calls) in ledger.breakdown().items():
+        print(f"  run={run} model={model}: {tokens} tokens / {calls} calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Checkpoint
+Byte-offset checkpoints for append-only JSONL inputs.
+
+A checkpoint records how many bytes of a source file have been processed and
+a fingerprint of that range (its first and last 64 KiB). If the file still
+starts with exactly those bytes it only grew, and processing can resume at
+the offset; otherwise it was rewritten and callers fall back to a full
+rescan. Used by ingest_quickcheck --incremental and the eagle_scanner index.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+VERSION = 1
+_SPAN = 1 << 16  # bytes fingerprinted at the start and at the end of the covered range
+
+
+def fingerprint(path: Path, n: int) -> str:
+    """Hash of the first and last _SPAN bytes of the first n bytes of path."""
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        h.update(f.read(min(n, _SPAN)))
+        tail = max(_SPAN, n - _SPAN)
+        if n > tail:
+            f.seek(tail)
+            h.update(f.read(n - tail))
+    return h.hexdigest()
+
+
+def complete_end(path: Path) -> int:
+    """Offset just past the last complete line. An unterminated last line
+    counts only if it parses as JSON (otherwise it is still being written)."""
+    size = path.stat().st_size
+    if not size:
+        return 0
+    with path.open("rb") as f:
+        pos = size
+        while pos > 0:
+            step = min(pos, 1 << 16)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            nl = chunk.rfind(b"\n")
+            if nl >= 0:
+                last = pos - step + nl + 1
+                break
+            pos -= step
+        else:
+            last = 0
+        if last == size:
+            return size
+        f.seek(last)
+        try:
+            json.loads(f.read())
+            return size
+        except ValueError:
+            return last
+
+
+def checkpoint_path(source: Path, kind: str) -> Path:
+    return source.with_name(f"{source.name}.{kind}.ckpt.json")
+
+
+def load(path: Path) -> dict | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if data.get("version") == VERSION else None
+
+
+def resume_offset(ckpt: dict | None, source: Path) -> int | None:
+    """Offset to resume `source` from, or None when it must be rescanned."""
+    if not ckpt:
+        return None
+    offset = ckpt.get("offset", 0)
+    if source.stat().st_size < offset or fingerprint(source, offset) != ckpt.get("fingerprint"):
+        return None
+    return offset
+
+
+def save(path: Path, source: Path, offset: int, state: dict):
+    data = {"version": VERSION, "source": str(source), "offset": offset,
+            "fingerprint": fingerprint(source, offset), "state": state}
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    tmp.replace(path)
@@ -1,11 +1,131 @@
-# loads YAML once
+# loads policies.yaml into a compiled Policy snapshot
+"""
+Config
+policies.yaml is read from this package's directory (POLICIES_FILE overrides
+the path), validated, and compiled into a Policy: the retain-field tuples,
+PII threshold and review sink the pipeline needs per record, plus the raw
+dict (get_cfg()) for everything else.
+
+Hot reload: with POLICIES_RELOAD_SECONDS=N (default 0 = load once), the
+file's mtime is checked at most every N seconds and a changed file is
+recompiled; an invalid edit is logged and the previous snapshot kept.
+The pipeline's routing policy reloads; storage and the classifier rule
+table are built once per process.
+"""
+import logging
+import os
+import time
 from pathlib import Path
-import yaml
 
-_CFG = None
+POLICIES_FILE = Path(os.getenv("POLICIES_FILE") or Path(__file__).resolve().parent / "policies.yaml")
+RELOAD_SECONDS = float(os.getenv("POLICIES_RELOAD_SECONDS", "0"))
+
+REVIEW_SINKS = ("restricted", "quarantine")
+STORAGE_BACKENDS = ("memory", "jsonl", "sqlite", "parquet")
+
+_POLICY = None
+_NEXT_CHECK = 0.0
+_SEEN_MTIME = None  # mtime of the last file we tried, valid or not
+_ENV_LOADED = False
+
+
+class Policy:
+    """Validated, immutable snapshot of policies.yaml (replaced whole on reload)."""
+    __slots__ = ("raw", "closed_retain", "active_retain", "pii_high", "review_sink",
+                 "path", "mtime", "version")
+
+    def __init__(self, raw: dict, path: Path, mtime: int, version: int):
+        def need(cond, key, what):
+            if not cond:
+                raise ValueError(f"{path}: {key} {what}")
+
+        need(isinstance(raw, dict), "top level", "must be a mapping")
+        policy = raw.get("policy") or {}
+        retain = {}
+        for branch in ("closed_cases", "active_cases"):
+            key = f"policy.{branch}.retain_fields"
+            fields = (policy.get(branch) or {}).get("retain_fields")
+            need(isinstance(fields, list) and all(isinstance(f, str) for f in fields),
+                 key, "must be a list of field names")
+            retain[branch] = tuple(fields)
+        high = ((raw.get("pii_scanner") or {}).get("thresholds") or {}).get("high")
+        need(isinstance(high, (int, float)) and not isinstance(high, bool) and 0 <= high <= 1,
+             "pii_scanner.thresholds.high", "must be a number in [0, 1]")
+        sink = (raw.get("classifier") or {}).get("route_active_review_to", "restricted")
+        need(sink in REVIEW_SINKS, "classifier.route_active_review_to", f"must be one of {REVIEW_SINKS}")
+        backend = ((raw.get("storage") or {}).get("backend") or "memory").lower()
+        need(backend in STORAGE_BACKENDS, "storage.backend", f"must be one of {STORAGE_BACKENDS}")
+
+        self.raw = raw
+        self.closed_retain = retain["closed_cases"]
+        self.active_retain = retain["active_cases"]
+        self.pii_high = float(high)
+        self.review_sink = sink
+        self.path, self.mtime, self.version = path, mtime, version
+
+
+def _load(path: Path, version: int) -> Policy:
+    import yaml
+    mtime = path.stat().st_mtime_ns
+    try:
+        raw = yaml.safe_load(path.read_text(encoding="utf-8"))
+    except yaml.YAMLError as e:
+        raise ValueError(f"{path}: {e}") from e
+    return Policy(raw, path, mtime, version)
+
+
+def reload_policy() -> Policy:
+    """Re-read and recompile policies.yaml now (raises if it is invalid)."""
+    global _POLICY, _SEEN_MTIME
+    _POLICY = _load(POLICIES_FILE, (_POLICY.version + 1) if _POLICY else 1)
+    _SEEN_MTIME = _POLICY.mtime
+    return _POLICY
+
+
+def _check_reload():
+    global _SEEN_MTIME
+    try:
+        mtime = POLICIES_FILE.stat().st_mtime_ns
+    except OSError as e:
+        logging.warning("policies: %s; keeping version %s", e, _POLICY.version)
+        return
+    if mtime == _SEEN_MTIME:
+        return
+    _SEEN_MTIME = mtime
+    try:
+        reload_policy()
+        logging.info("policies: reloaded %s (version %s)", POLICIES_FILE, _POLICY.version)
+    except (OSError, ValueError) as e:
+        logging.warning("policies: invalid edit ignored, keeping version %s: %s", _POLICY.version, e)
+
+
+def get_policy() -> Policy:
+    global _NEXT_CHECK
+    if _POLICY is None:
+        return reload_policy()
+    if RELOAD_SECONDS:
+        now = time.monotonic()
+        if now >= _NEXT_CHECK:
+            _NEXT_CHECK = now + RELOAD_SECONDS
+            _check_reload()
+    return _POLICY
+
 
 def get_cfg():
-    global _CFG
-    if _CFG is None:
-        _CFG = yaml.safe_load(Path("policies.yaml").read_text(encoding="utf-8"))
-    return _CFG
+    """The raw policies.yaml mapping of the current snapshot."""
+    return get_policy().raw
+
+
+def load_env():
+    """load_dotenv() once, importing python-dotenv only when a .env file exists
+    (same search as load_dotenv: this directory, then its parents)."""
+    global _ENV_LOADED
+    if _ENV_LOADED:
+        return
+    _ENV_LOADED = True
+    here = Path(__file__).resolve().parent
+    for d in (here, *here.parents):
+        if (d / ".env").is_file():
+            from dotenv import load_dotenv
+            load_dotenv(d / ".env")
+            return
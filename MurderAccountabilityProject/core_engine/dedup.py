@@ -0,0 +1,100 @@
+"""
+Dedup
+Replay routing decisions for duplicate records instead of re-running the pipeline.
+
+UCR-exploded JSONL repeats the same record (ORI/date/county/status...) once
+per incident. With pipeline.enable_dedup(), each record is keyed by a hash of
+its content, the weight value left out, so copies that differ only in
+`count` share a key. The first copy is routed normally; later copies get a
+copy of its routed record with their own weight, and go to the same sink.
+Sinks therefore receive exactly what a plain run writes, line for line.
+
+Rule-hit counters and pipeline metrics only see the distinct records. Keys
+are remembered FIFO up to `max_entries` (PIPELINE_DEDUP_MAX, default 1M).
+Decisions belong to the policy version that made them: when policies.yaml
+is hot-reloaded (config.get_policy().version changes), the memo is dropped,
+so later copies are routed under the new policy. A chunk is replayed under
+the version current when it starts.
+"""
+import hashlib
+import os
+
+from config import get_policy
+from jsonl_io import dumps
+from weights import WEIGHT_FIELD, carry_weight
+
+MAX_ENTRIES = int(os.getenv("PIPELINE_DEDUP_MAX", "1000000"))
+
+
+def content_key(rec: dict) -> bytes:
+    """Stable 16-byte hash of a record, weight value excluded (field order counts)."""
+    if WEIGHT_FIELD in rec:
+        rec = dict(rec)
+        rec[WEIGHT_FIELD] = None
+    return hashlib.blake2b(dumps(rec), digest_size=16).digest()
+
+
+class Deduper:
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self._memo = {}  # key -> (sink, routed record of the first copy)
+        self.policy_version = None  # policy the memo's decisions were made under
+        self.hits = 0
+        self.misses = 0
+
+    def _check_policy(self):
+        version = get_policy().version
+        if version != self.policy_version:
+            self._memo.clear()
+            self.policy_version = version
+
+    def _remember(self, key: bytes, sink: str, rec: dict):
+        memo = self._memo
+        if len(memo) >= self.max_entries:
+            del memo[next(iter(memo))]  # oldest first
+        memo[key] = (sink, rec)
+
+    @staticmethod
+    def _replay(rec: dict, entry):
+        sink, routed = entry
+        return sink, carry_weight(rec, dict(routed))
+
+    def route_one(self, rec: dict, route):
+        """(sink, record) for rec; `route` is called only for unseen content."""
+        self._check_policy()
+        key = content_key(rec)
+        entry = self._memo.get(key)
+        if entry is not None:
+            self.hits += 1
+            return self._replay(rec, entry)
+        self.misses += 1
+        sink, routed = route(rec)
+        self._remember(key, sink, routed)
+        return sink, routed
+
+    def route_chunk(self, chunk: list, route) -> list:
+        """route_chunk over the distinct, unseen records of chunk; replays the rest (input order kept)."""
+        self._check_policy()
+        memo = self._memo
+        keys = [content_key(r) for r in chunk]
+        known = [memo.get(k) for k in keys]
+        first = {}  # unseen key -> index of its first copy in this chunk
+        for i, (k, entry) in enumerate(zip(keys, known)):
+            if entry is None and k not in first:
+                first[k] = i
+        fresh = dict(zip(first, route([chunk[i] for i in first.values()]))) if first else {}
+        for k, (sink, routed) in fresh.items():
+            self._remember(k, sink, routed)
+        self.misses += len(first)
+        self.hits += len(chunk) - len(first)
+
+        out = []
+        for i, (rec, k, entry) in enumerate(zip(chunk, keys, known)):
+            if entry is None and first[k] == i:
+                out.append(fresh[k])
+            else:
+                out.append(self._replay(rec, entry or fresh[k]))
+        return out
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,9 @@
+"""
+Eagle Fields
+The record fields eagle_scanner reads, shared with hotspot_index (which
+eagle_scanner imports lazily, so neither imports the other at load time).
+"""
+from weights import WEIGHT_FIELD
+
+# the only fields a scan reads; lets the msgspec backend skip the rest of each line
+SCAN_FIELDS = ("case_status", "year", "date", "state", "county", WEIGHT_FIELD)
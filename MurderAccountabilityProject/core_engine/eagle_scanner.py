@@ -7,17 +7,29 @@ Usage (PowerShell):
   # or exact window:
   python -m eagle_scanner .\data\ucr_incidents.sample.jsonl --year-range 2010-2015 --top 15
 
+The first run builds a columnar index next to the file (<file>.eagle.npz, see
+hotspot_index.py); later runs only parse lines appended since then, so window
+queries take milliseconds. --no-index scans the JSONL directly.
+
 Outputs top ACTIVE states/counties since the given year and prints
 copy-paste environment suggestions for:
   - CLASSIFIER_FORCE_REVIEW_STATES
   - CLASSIFIER_WATCHLIST_COUNTIES
   - CLASSIFIER_RECENT_YEAR
+
+With --watchlist-out, writes the top counties one per line for a
+classifier.rules.table entry in policies.yaml (in_file:), which scales to
+thousands of entries where the env var does not.
 """
 
-import json, argparse
+import argparse
 from collections import Counter
 from pathlib import Path
 
+from eagle_fields import SCAN_FIELDS
+from jsonl_io import read_jsonl
+from weights import weight_of
+
 def year_of(d): 
     try: return int((d or "1900")[:4])
     except: return 1900
@@ -34,20 +46,18 @@ def resolve_year_bounds(args):
 def scan(path: Path, year_lo: int | None, year_hi: int | None):
     c_state, c_county = Counter(), Counter()
     total = act = 0
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip(): continue
-            r = json.loads(line)
-            total += 1
-            if (r.get("case_status") or "").lower() != "active": continue
-            y = r.get("year") or year_of(r.get("date"))
-            if year_lo is not None and y < year_lo: continue
-            if year_hi is not None and y > year_hi: continue
-            act += 1
-            st = (r.get("state") or "").strip()
-            co = (r.get("county") or "").strip()
-            if st: c_state[st] += 1
-            if co: c_county[co] += 1
+    for r in read_jsonl(path, fields=SCAN_FIELDS):
+        w = weight_of(r)  # weighted (aggregate) records count `count` times
+        total += w
+        if (r.get("case_status") or "").lower() != "active": continue
+        y = r.get("year") or year_of(r.get("date"))
+        if year_lo is not None and y < year_lo: continue
+        if year_hi is not None and y > year_hi: continue
+        act += w
+        st = (r.get("state") or "").strip()
+        co = (r.get("county") or "").strip()
+        if st: c_state[st] += w
+        if co: c_county[co] += w
     return total, act, c_state, c_county
 
 def main():
@@ -58,10 +68,22 @@ def main():
     ap.add_argument("--to-year", type=int, help="Inclusive upper bound (e.g., 2020)")
     ap.add_argument("--year-range", type=str, help="Shorthand 'YYYY-YYYY' (e.g., 2010-2015)")
     ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--watchlist-out", type=Path,
+                    help="Write the top N counties (N=--watchlist-size) to this file, one per line")
+    ap.add_argument("--watchlist-size", type=int, default=1000)
+    ap.add_argument("--no-index", action="store_true", help="Scan the JSONL instead of using the columnar index")
+    ap.add_argument("--index", type=Path, help="Index file (default: <jsonl>.eagle.npz)")
     args = ap.parse_args()
 
     lo, hi = resolve_year_bounds(args)
-    total, act, c_state, c_county = scan(args.jsonl, lo, hi)
+    if args.no_index:
+        total, act, c_state, c_county = scan(args.jsonl, lo, hi)
+    else:
+        from hotspot_index import open_index
+        idx, state = open_index(args.jsonl, args.index)
+        if state != "fresh":
+            print(f"Index {state}: {len(idx.year):,} ACTIVE rows")
+        total, act, c_state, c_county = idx.query(lo, hi)
 
     if lo is not None and hi is not None:
         window = f"{lo}-{hi}"
@@ -91,5 +113,11 @@ def main():
     if lo is not None:
         print(f"set CLASSIFIER_RECENT_YEAR={lo}")
 
+    if args.watchlist_out:
+        top = [c for c, _ in c_county.most_common(args.watchlist_size)]
+        args.watchlist_out.parent.mkdir(parents=True, exist_ok=True)
+        args.watchlist_out.write_text("".join(f"{c}\n" for c in top), encoding="utf-8")
+        print(f"\nWrote {len(top)} counties to {args.watchlist_out} (classifier.rules.table in_file)")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,174 @@
+"""
+Hotspot Index
+Columnar index of ACTIVE records for eagle_scanner (needs numpy).
+
+One row per ACTIVE record: year, state code, county code and weight as small
+integer arrays, with the state/county dictionaries alongside. Window queries
+are masked bincounts over those arrays, so repeated --year-range runs do not
+re-read the JSONL.
+
+The index lives next to the source (<file>.eagle.npz) and remembers how many
+bytes it covers plus a fingerprint of that range (checkpoint.py). When the source only
+grew (monthly appends), just the new lines are parsed and appended; when it
+was rewritten, the index is rebuilt. If the index cannot be written (e.g. a
+read-only data directory), queries are answered from the in-memory index.
+"""
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from checkpoint import fingerprint as _fingerprint
+from eagle_fields import SCAN_FIELDS
+from jsonl_io import decoder
+from weights import weight_of
+
+VERSION = 1
+
+
+def year_of(d):
+    try: return int((d or "1900")[:4])
+    except: return 1900
+
+
+class HotspotIndex:
+    def __init__(self):
+        self.states, self.counties = [], []
+        self._state_code, self._county_code = {}, {}
+        self.year = np.zeros(0, np.int16)
+        self.state = np.zeros(0, np.int32)
+        self.county = np.zeros(0, np.int32)
+        self.weight = np.zeros(0, np.int64)
+        self.total = 0       # weighted records of any status
+        self.offset = 0      # source bytes covered
+        self.fingerprint = ""
+
+    def _code(self, value: str, table: dict, names: list) -> int:
+        if not value:
+            return -1
+        code = table.get(value)
+        if code is None:
+            code = table[value] = len(names)
+            names.append(value)
+        return code
+
+    def _ingest(self, path: Path, start: int) -> int:
+        """Parse complete lines from byte `start`; returns the new offset."""
+        decode = decoder(SCAN_FIELDS)
+        years, states, counties, weights = [], [], [], []
+        end = start
+        with path.open("rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.strip():
+                    end += len(line)
+                    continue
+                try:
+                    r = decode(line)
+                except ValueError:
+                    if line.endswith(b"\n"):
+                        raise
+                    break  # half-written last line; picked up by the next refresh
+                end += len(line)
+                w = weight_of(r)
+                self.total += w
+                if (r.get("case_status") or "").lower() != "active":
+                    continue
+                years.append(r.get("year") or year_of(r.get("date")))
+                states.append(self._code((r.get("state") or "").strip(), self._state_code, self.states))
+                counties.append(self._code((r.get("county") or "").strip(), self._county_code, self.counties))
+                weights.append(w)
+        if years:
+            self.year = np.concatenate([self.year, np.asarray(years, np.int16)])
+            self.state = np.concatenate([self.state, np.asarray(states, np.int32)])
+            self.county = np.concatenate([self.county, np.asarray(counties, np.int32)])
+            self.weight = np.concatenate([self.weight, np.asarray(weights, np.int64)])
+        return end
+
+    def refresh(self, path: Path) -> str:
+        """Bring the index up to date with `path`; returns 'fresh', 'appended' or 'rebuilt'."""
+        size = path.stat().st_size
+        if self.offset and size >= self.offset and _fingerprint(path, self.offset) == self.fingerprint:
+            if size == self.offset:
+                return "fresh"
+            self.offset = self._ingest(path, self.offset)
+            self.fingerprint = _fingerprint(path, self.offset)
+            return "appended"
+        self.__init__()
+        self.offset = self._ingest(path, 0)
+        self.fingerprint = _fingerprint(path, self.offset)
+        return "rebuilt"
+
+    def _counter(self, codes, weights, names) -> Counter:
+        keep = codes >= 0
+        codes, weights = codes[keep], weights[keep]
+        sums = np.bincount(codes, weights=weights, minlength=len(names))
+        # insert in first-seen order so most_common() breaks ties like a streaming scan
+        uniq, first = np.unique(codes, return_index=True)
+        return Counter({names[c]: int(sums[c]) for c in uniq[np.argsort(first, kind="stable")]})
+
+    def query(self, year_lo=None, year_hi=None):
+        """(total, act, c_state, c_county) for ACTIVE records in the window, like eagle_scanner.scan."""
+        mask = np.ones(len(self.year), bool)
+        if year_lo is not None:
+            mask &= self.year >= year_lo
+        if year_hi is not None:
+            mask &= self.year <= year_hi
+        w = self.weight[mask]
+        return (self.total, int(w.sum()),
+                self._counter(self.state[mask], w, self.states),
+                self._counter(self.county[mask], w, self.counties))
+
+    def save(self, path: Path):
+        meta = {"version": VERSION, "states": self.states, "counties": self.counties,
+                "total": self.total, "offset": self.offset, "fingerprint": self.fingerprint}
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            with tmp.open("wb") as f:
+                np.savez(f, year=self.year, state=self.state, county=self.county,
+                         weight=self.weight, meta=np.array(json.dumps(meta)))
+            tmp.replace(path)
+        except OSError:
+            try:
+                tmp.unlink(missing_ok=True)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path: Path) -> "HotspotIndex":
+        idx = cls()
+        if not path.exists():
+            return idx
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                meta = json.loads(str(z["meta"]))
+                if meta.get("version") != VERSION:
+                    return idx
+                idx.year, idx.state, idx.county, idx.weight = z["year"], z["state"], z["county"], z["weight"]
+        except (OSError, ValueError, KeyError):
+            return cls()  # unreadable index: rebuild
+        idx.states, idx.counties = meta["states"], meta["counties"]
+        idx._state_code = {s: i for i, s in enumerate(idx.states)}
+        idx._county_code = {c: i for i, c in enumerate(idx.counties)}
+        idx.total, idx.offset, idx.fingerprint = meta["total"], meta["offset"], meta["fingerprint"]
+        return idx
+
+
+def index_path(source: Path) -> Path:
+    return source.with_name(source.name + ".eagle.npz")
+
+
+def open_index(source: Path, path: Path | None = None):
+    """Load, refresh and (if changed) save the index for `source`; returns (index, state)."""
+    path = path or index_path(source)
+    idx = HotspotIndex.load(path)
+    state = idx.refresh(source)
+    if state != "fresh":
+        try:
+            idx.save(path)
+        except OSError as e:
+            print(f"Warning: index not saved ({e}); using it in memory for this run", file=sys.stderr)
+    return idx, state
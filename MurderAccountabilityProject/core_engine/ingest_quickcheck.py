@@ -10,30 +10,234 @@ Examples (PowerShell):
   # Safe ingest with progress
   $env:LLM_MODE='off'
   python -m ingest_quickcheck .\\data\\ucr_incidents.sample.jsonl --show 2 --top-restricted 5 --heartbeat 1000
+
+  # Full-year run on 8 cores (byte-range shards, merged report)
+  python -m ingest_quickcheck .\\data\\ucr_incidents.jsonl --workers 8 --batch-size 5000
+
+  # Staged streaming: reader thread, 4 routing processes, sink writer thread
+  python -m ingest_quickcheck .\\data\\ucr_incidents.jsonl --stream --workers 4 --batch-size 2000
+
+  # UCR-exploded input: route each distinct record once, replay duplicates
+  python -m ingest_quickcheck .\\data\\ucr_incidents.jsonl --dedup --batch-size 5000
+
+  # Monthly appends: only ingest lines added since the last --incremental run
+  python -m ingest_quickcheck .\\data\\ucr_incidents.jsonl --incremental --batch-size 5000
+
+  # Where does the time go? Per-stage latency, branch/sink/decision counts
+  python -m ingest_quickcheck .\\data\\ucr_incidents.jsonl --stats --stats-out .\\data\\ingest_stats.prom
 """
-import argparse, json
+import argparse, os
+import multiprocessing
 import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
 
-from pipeline import ingest_record
-import storage  # holds RESEARCH_LAKE, RESTRICTED_VAULT, QUARANTINE
+import checkpoint
+import jsonl_io
+from metrics import Metrics
 from status_resolver import resolve_status
 from transforms import minimal_active
-from agent_classifier import _rule_based, MODE, LLM_ENABLED, ESTIMATE_ONLY, MODEL_NAME
-from agent_classifier import MAX_TOKENS, TEMPERATURE, BUDGET
+from weights import weight_of
+from agent_classifier import _rule_based, rule_hits, MODE, LLM_ENABLED, ESTIMATE_ONLY, _model_name
+from agent_classifier import MAX_TOKENS, TEMPERATURE, BUDGET, cache_stats, _ledger
+
+# pipeline/storage (sinks, storage backend) are imported where first needed,
+# so --estimate-only starts without them
 
 def reset_storage():
+    import storage  # holds RESEARCH_LAKE, RESTRICTED_VAULT, QUARANTINE
     storage.RESEARCH_LAKE.clear()
     storage.RESTRICTED_VAULT.clear()
     storage.QUARANTINE.clear()
 
 def read_jsonl(p: Path):
-    # Use utf-8-sig to gracefully handle BOM if present
-    with p.open("r", encoding="utf-8-sig") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                yield json.loads(line)
+    # BOM-tolerant; fast decoder when orjson/msgspec is installed (jsonl_io)
+    return jsonl_io.read_jsonl(p)
+
+def read_jsonl_range(p: Path, start: int, end: int):
+    """Records whose line starts in the byte range [start, end)."""
+    return jsonl_io.read_jsonl(p, start, end)
+
+def shard_offsets(p: Path, n: int, start: int = 0, end: int | None = None) -> list:
+    """Split bytes [start, end) of a file (start on a line boundary) into up to
+    n byte ranges that start and end on line boundaries."""
+    end = p.stat().st_size if end is None else end
+    span = end - start
+    cuts = [start]
+    with p.open("rb") as f:
+        for i in range(1, n):
+            f.seek(max(start + 1, start + span * i // n) - 1)
+            f.readline()  # move to the start of the next line
+            cuts.append(max(cuts[-1], min(f.tell(), end)))
+    cuts.append(end)
+    return [(a, b) for a, b in zip(cuts, cuts[1:]) if b > a]
+
+RULE_PREFIXES = ("recent", "llm_error", "no-rule", "state_override", "recent>=", "watchlist", "rule:")
+
+class Summary:
+    """
+    Report data for one ingest: weighted sink totals, the first `show` records
+    per sink, and Restricted/Research breakdowns. Fed by a storage tap as
+    records are routed; shard summaries merge in file order, so a parallel
+    run prints the same report as a serial one.
+    """
+
+    def __init__(self, show: int):
+        self.show = show
+        self.totals = {"research": 0, "restricted": 0, "quarantine": 0}
+        self.samples = {k: [] for k in self.totals}
+        self.routed_rules = 0
+        self.routed_llm = 0
+        self.county_counts = Counter()
+        self.state_counts = Counter()
+        self.reason_counts = Counter()
+        self.status_counts = Counter()
+        self.linkable_counts = Counter({"linkable_true": 0, "linkable_false": 0})
+        self.llm_cache = Counter({"hits": 0, "misses": 0})
+        self.rule_hits = Counter()
+        self.dedup = Counter({"hits": 0, "misses": 0})
+
+    def add(self, sink: str, r: dict):
+        wt = weight_of(r)
+        self.totals[sink] += wt
+        if len(self.samples[sink]) < self.show:
+            self.samples[sink].append(r)
+        if sink == "restricted":
+            reason = str(r.get("review_reason", ""))
+            if reason.startswith(RULE_PREFIXES): self.routed_rules += wt
+            if reason.startswith("llm:"): self.routed_llm += wt
+            if r.get("county"): self.county_counts[(r.get("county") or "").strip()] += wt
+            if r.get("state"): self.state_counts[(r.get("state") or "").strip()] += wt
+            if r.get("review_reason"): self.reason_counts[reason.strip()] += wt
+        elif sink == "research":
+            self.status_counts[r.get("case_status", "unknown")] += wt
+            if r.get("linkable"): self.linkable_counts["linkable_true"] += wt
+            else: self.linkable_counts["linkable_false"] += wt
+
+    def merge(self, other: "Summary"):
+        for k in self.totals:
+            self.totals[k] += other.totals[k]
+            self.samples[k].extend(other.samples[k][:self.show - len(self.samples[k])])
+        self.routed_rules += other.routed_rules
+        self.routed_llm += other.routed_llm
+        self.county_counts.update(other.county_counts)
+        self.state_counts.update(other.state_counts)
+        self.reason_counts.update(other.reason_counts)
+        self.status_counts.update(other.status_counts)
+        self.linkable_counts.update(other.linkable_counts)
+        self.llm_cache.update(other.llm_cache)
+        self.rule_hits.update(other.rule_hits)
+        self.dedup.update(other.dedup)
+
+    _COUNTERS = ("county_counts", "state_counts", "reason_counts", "status_counts",
+                 "linkable_counts", "llm_cache", "rule_hits", "dedup")
+
+    def to_state(self) -> dict:
+        """JSON-able form, persisted in --incremental checkpoints."""
+        st = {k: dict(getattr(self, k)) for k in self._COUNTERS}
+        st.update(totals=self.totals, samples=self.samples,
+                  routed_rules=self.routed_rules, routed_llm=self.routed_llm)
+        return st
+
+    @classmethod
+    def from_state(cls, show: int, st: dict) -> "Summary":
+        s = cls(show)
+        for k in cls._COUNTERS:
+            getattr(s, k).update(st.get(k, {}))
+        s.totals.update(st["totals"])
+        s.samples = {k: list(v)[:show] for k, v in st["samples"].items()}
+        s.routed_rules, s.routed_llm = st["routed_rules"], st["routed_llm"]
+        return s
+
+def _in_window(rec, year_lo, year_hi) -> bool:
+    y = rec.get("year") or int(str(rec.get("date") or "0")[:4] or 0)
+    return not ((year_lo is not None and y < year_lo) or (year_hi is not None and y > year_hi))
+
+def _ingest_streaming(records, year_lo, year_hi, batch_size, heartbeat, max_records, workers):
+    """ingest_stream via the staged runner (streaming.py); filtering runs in its reader thread."""
+    import storage
+    from streaming import ingest_streaming
+    counts = [0, 0]  # lines, incidents (weighted)
+
+    def selected():
+        for idx, rec in enumerate(records, start=1):
+            counts[0] += 1
+            counts[1] += weight_of(rec)
+            if not _in_window(rec, year_lo, year_hi):
+                continue
+            yield rec
+            if heartbeat and (idx % heartbeat == 0):
+                print(f"... processed {idx} records")
+            if max_records and counts[0] >= max_records:
+                break
+
+    ingest_streaming(selected(), workers=workers, chunk_size=batch_size or 1000)
+    storage.flush_all()
+    return counts[0], counts[1]
+
+def ingest_stream(records, year_lo=None, year_hi=None, batch_size=0, heartbeat=0,
+                  max_records=0, bisect=False, label="", stream_workers=None):
+    """Ingest records (with year filter, batching and guardrails); returns (lines, incidents).
+    stream_workers (not None) runs the staged streaming runner with that many routing processes."""
+    import storage
+    from pipeline import ingest_record, ingest_batch
+    if stream_workers is not None and not bisect:
+        return _ingest_streaming(records, year_lo, year_hi, batch_size, heartbeat, max_records, stream_workers)
+    total = 0  # incidents (weighted)
+    lines = 0
+    batch = []
+    for idx, rec in enumerate(records, start=1):
+        try:
+            lines += 1
+            total += weight_of(rec)
+            if not _in_window(rec, year_lo, year_hi):
+                continue
+            if batch_size and not bisect:
+                batch.append(rec)
+                if len(batch) >= batch_size:
+                    ingest_batch(batch, chunk_size=batch_size)
+                    batch = []
+            else:
+                ingest_record(rec)
+            if heartbeat and (idx % heartbeat == 0):
+                print(f"... {label}processed {idx} records")
+            if max_records and lines >= max_records:
+                break
+        except Exception as e:
+            if bisect:
+                import traceback
+                print(f"Bisection stop at line {idx} due to: {type(e).__name__}: {e}")
+                traceback.print_exc()
+                raise SystemExit(2)
+            else:
+                raise
+    if batch:
+        ingest_batch(batch, chunk_size=batch_size)
+    storage.flush_all()
+    return lines, total
+
+def _ingest_shard(job):
+    """Process-pool entry point: ingest one byte range, return (lines, incidents, Summary, stats)."""
+    import pipeline
+    import storage
+    path, start, end, shard, opts = job
+    storage.set_worker(shard)  # Parquet parts read back in shard order
+    summary = Summary(opts["show"])
+    m = pipeline.enable_metrics() if opts["stats"] else None
+    dd = pipeline.enable_dedup() if opts["dedup"] else None
+    storage.add_tap(summary.add)
+    lines, total = ingest_stream(read_jsonl_range(path, start, end),
+                                 year_lo=opts["year_lo"], year_hi=opts["year_hi"],
+                                 batch_size=opts["batch_size"], heartbeat=opts["heartbeat"],
+                                 label=f"shard {shard}: ")
+    storage.close_all()
+    summary.llm_cache.update(cache_stats())
+    summary.rule_hits.update(rule_hits())
+    if dd:
+        summary.dedup.update(dd.stats())
+    return lines, total, summary, m.snapshot() if m else None
 
 def main():
     ap = argparse.ArgumentParser(
@@ -57,14 +261,29 @@ def main():
                     help="Stop on first failing row; print index and traceback")
     ap.add_argument("--heartbeat", type=int, default=0,
                     help="Print a heartbeat every N records (0=off)")
+    ap.add_argument("--batch-size", type=int, default=0,
+                    help="Ingest in chunks of N records via ingest_batch (0=per-record; ignored with --bisect)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Ingest file shards in N processes and merge the report (ignored with --bisect/--max-records)")
+    ap.add_argument("--stream", action="store_true",
+                    help="Staged streaming ingest: reader thread, --workers routing processes (0=in-process), "
+                         "sink writer thread, bounded queues; chunks of --batch-size (default 1000)")
+    ap.add_argument("--dedup", action="store_true",
+                    help="Route each distinct record once and replay the decision for duplicates "
+                         "(same sinks and totals; rule hits count distinct records)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Resume after the last checkpoint (<jsonl>.quickcheck.ckpt.json) and merge into its report; "
+                         "full rescan if the file was rewritten (ignored with --bisect/--max-records)")
+    ap.add_argument("--stats", action="store_true",
+                    help="Time each pipeline stage and print latency, branch, sink and decision counts")
+    ap.add_argument("--stats-out", type=Path,
+                    help="Also write the stats: Prometheus text for .prom/.txt, JSON snapshot otherwise (implies --stats)")
     args = ap.parse_args()
 
     if not args.jsonl.exists():
         print(f"Config error: Not found: {args.jsonl}")
         raise SystemExit(78)
 
-    reset_storage()
-
     def resolve_year_bounds(args):
         lo = hi = None
         if getattr(args, "year_range", None):
@@ -78,7 +297,7 @@ def main():
 
     # Announce LLM mode and configuration
     if LLM_ENABLED:
-        print(f"LLM classifier mode=on: model={MODEL_NAME} max_tokens={MAX_TOKENS} temperature={TEMPERATURE} budget={BUDGET or 'none'}")
+        print(f"LLM classifier mode=on: model={_model_name()} max_tokens={MAX_TOKENS} temperature={TEMPERATURE} budget={BUDGET or 'none'}")
     elif ESTIMATE_ONLY:
         print("LLM classifier mode=estimate: rules-only, no LLM calls")
     else:
@@ -91,10 +310,11 @@ def main():
         est_llm_candidates = 0
         reasons_rules = {"rules->watchlist_county":0, "rules->state_override":0, "rules->mo_keyword":0, "rules->recent_year":0, "rules->other":0}
         for rec in read_jsonl(args.jsonl):
-            est_total += 1
+            wt = weight_of(rec)
+            est_total += wt
             status = resolve_status(rec)
             if status == "active":
-                est_active += 1
+                est_active += wt
                 y = rec.get("year") or int(str(rec.get("date") or "0")[:4] or 0)
                 if year_lo is not None and y < year_lo: 
                     continue
@@ -105,17 +325,17 @@ def main():
                 if rule:
                     w = str(why).lower()
                     if "watchlist" in w:
-                        reasons_rules["rules->watchlist_county"] += 1
+                        reasons_rules["rules->watchlist_county"] += wt
                     elif "state_override" in w:
-                        reasons_rules["rules->state_override"] += 1
+                        reasons_rules["rules->state_override"] += wt
                     elif "mo_keyword" in w:
-                        reasons_rules["rules->mo_keyword"] += 1
+                        reasons_rules["rules->mo_keyword"] += wt
                     elif w.startswith("recent"):
-                        reasons_rules["rules->recent_year"] += 1
+                        reasons_rules["rules->recent_year"] += wt
                     else:
-                        reasons_rules["rules->other"] += 1
+                        reasons_rules["rules->other"] += wt
                 else:
-                    est_llm_candidates += 1
+                    est_llm_candidates += 1  # one call per record, whatever its weight
         print(f"\nPreflight estimate (no LLM calls made):")
         print(f"  total records: {est_total}")
         print(f"  active records: {est_active}")
@@ -128,41 +348,103 @@ def main():
         if args.estimate_only:
             return
 
-    total = 0
+    import pipeline
+    import storage
+    # --incremental: resume from the checkpoint if the file only grew and the
+    # options that shape the report are unchanged
+    ckpt_file = checkpoint.checkpoint_path(args.jsonl, "quickcheck")
+    ckpt_opts = {"show": args.show, "year_lo": year_lo, "year_hi": year_hi,
+                 "storage": storage.storage_cfg()}
+    incremental = args.incremental
+    if incremental and (args.bisect or args.max_records):
+        print("Note: --incremental ignored with --bisect/--max-records")
+        incremental = False
+    start, end, prior = 0, None, None
+    if incremental:
+        end = checkpoint.complete_end(args.jsonl)
+        ck = checkpoint.load(ckpt_file)
+        offset = checkpoint.resume_offset(ck, args.jsonl) if ck and ck["state"]["opts"] == ckpt_opts else None
+        if offset is None:
+            print("Incremental: no matching checkpoint (new, rewritten file or changed options); full scan")
+        else:
+            start, prior = offset, ck["state"]
+            print(f"Incremental: resuming at byte {start:,} of {end:,}")
+            if (storage.storage_cfg().get("backend") or "memory") == "memory":
+                print("Note: memory storage keeps only this run's records; the report covers the whole file")
+    if prior is None:
+        reset_storage()
+
+    # one ledger run id for this process and its workers
+    os.environ.setdefault("LLM_RUN_ID", time.strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}")
+    summary = Summary(args.show)
+    stats = Metrics() if (args.stats or args.stats_out) else None
     start_time = time.time()
-    for idx, rec in enumerate(read_jsonl(args.jsonl), start=1):
-        try:
-            total += 1
-            y = rec.get("year") or int(str(rec.get("date") or "0")[:4] or 0)
-            if year_lo is not None and y < year_lo:
-                continue
-            if year_hi is not None and y > year_hi:
-                continue
-            ingest_record(rec)
-            if args.heartbeat and (idx % args.heartbeat == 0):
-                print(f"... processed {idx} records")
-            if args.max_records and total >= args.max_records:
-                break
-        except Exception as e:
-            if args.bisect:
-                import traceback
-                print(f"Bisection stop at line {idx} due to: {type(e).__name__}: {e}")
-                traceback.print_exc()
-                raise SystemExit(2)
-            else:
-                raise
+    workers = args.workers
+    stream = args.stream
+    if stream and args.bisect:
+        print("Note: --stream ignored with --bisect")
+        stream = False
+    if stream:
+        workers = 1  # --workers sizes the routing pool instead of sharding the file
+    elif workers > 1 and (args.bisect or args.max_records):
+        print("Note: --workers ignored with --bisect/--max-records (serial run)")
+        workers = 1
+    if workers > 1:
+        opts = {"show": args.show, "year_lo": year_lo, "year_hi": year_hi,
+                "batch_size": args.batch_size, "heartbeat": args.heartbeat, "stats": stats is not None,
+                "dedup": args.dedup}
+        jobs = [(args.jsonl, a, b, i, opts)
+                for i, (a, b) in enumerate(shard_offsets(args.jsonl, workers, start, end), 1)]
+        # spawn: workers build their own sinks/connections instead of inheriting ours
+        ctx = multiprocessing.get_context("spawn")
+        lines = total = 0
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            for n, t, part, snap in pool.map(_ingest_shard, jobs):  # results in shard order
+                lines += n
+                total += t
+                summary.merge(part)
+                if snap:
+                    stats.merge(snap)
+    else:
+        if stats:
+            pipeline.enable_metrics(stats)
+        dd = pipeline.enable_dedup() if args.dedup else None
+        storage.add_tap(summary.add)
+        hits_before = Counter(rule_hits())  # the --estimate-llm pass also evaluates rules
+        records = read_jsonl_range(args.jsonl, start, end) if incremental else read_jsonl(args.jsonl)
+        lines, total = ingest_stream(records, year_lo=year_lo, year_hi=year_hi,
+                                     batch_size=args.batch_size, heartbeat=args.heartbeat,
+                                     max_records=args.max_records, bisect=args.bisect,
+                                     stream_workers=args.workers if stream else None)
+        storage.remove_tap(summary.add)
+        pipeline.disable_metrics()
+        pipeline.disable_dedup()
+        if dd:
+            summary.dedup.update(dd.stats())
+        summary.llm_cache.update(cache_stats())
+        summary.rule_hits.update(Counter(rule_hits()) - hits_before)
+
+    new_lines = lines
+    if prior is not None:
+        merged = Summary.from_state(args.show, prior["summary"])
+        merged.merge(summary)
+        summary = merged
+        lines += prior["lines"]
+        total += prior["total"]
+    if incremental:
+        checkpoint.save(ckpt_file, args.jsonl, end,
+                        {"opts": ckpt_opts, "summary": summary.to_state(), "lines": lines, "total": total})
 
-    rl, rv, q = storage.RESEARCH_LAKE, storage.RESTRICTED_VAULT, storage.QUARANTINE
     print(f"\nTotal ingested: {total}")
-    print(f"Research Lake:   {len(rl)}")
-    print(f"Restricted Vault:{len(rv)}")
-    print(f"Quarantine:      {len(q)}")
+    print(f"Research Lake:   {summary.totals['research']}")
+    print(f"Restricted Vault:{summary.totals['restricted']}")
+    print(f"Quarantine:      {summary.totals['quarantine']}")
     elapsed = max(0.000001, time.time() - start_time)
-    print(f"Processed {total:,} in {elapsed:.1f}s (~{(total/elapsed):,.0f} rec/s)")
+    print(f"Processed {new_lines:,} records in {elapsed:.1f}s (~{(new_lines/elapsed):,.0f} rec/s)")
 
     def show_samples(name, items):
         print(f"\n== {name} (showing up to {args.show}) ==")
-        for i, r in enumerate(items[:args.show], 1):
+        for i, r in enumerate(islice(items, args.show), 1):
             # Minimal peek; avoid PII
             print(f"{i}. status={r.get('case_status')}, "
                   f"access={r.get('access')}, "
@@ -170,57 +452,53 @@ def main():
                   f"geo={r.get('geo_precision')}, "
                   f"keys={sorted(r.keys())[:8]}...")
 
-    show_samples("Research Lake", rl)
-    show_samples("Restricted Vault", rv)
-    show_samples("Quarantine", q)
-    
-    # --- after ingest loop, before printing counts ---
-    routed_rules = sum(1 for r in storage.RESTRICTED_VAULT if str(r.get("review_reason","")).startswith(("recent", "llm_error", "no-rule", "state_override", "recent>=", "watchlist")))
-    routed_llm   = sum(1 for r in storage.RESTRICTED_VAULT if str(r.get("review_reason","")).startswith("llm:"))
+    show_samples("Research Lake", summary.samples["research"])
+    show_samples("Restricted Vault", summary.samples["restricted"])
+    show_samples("Quarantine", summary.samples["quarantine"])
 
-    print(f"\nRestricted routed by rules: {routed_rules}")
-    print(f"Restricted routed by LLM:   {routed_llm}")
+    print(f"\nRestricted routed by rules: {summary.routed_rules}")
+    print(f"Restricted routed by LLM:   {summary.routed_llm}")
 
     # Optional: top Restricted by county/state and review_reason
-    if args.top_restricted and len(rv):
-        from collections import Counter
-        county_counts = Counter((r.get("county") or "").strip() for r in rv if r.get("county"))
-        state_counts = Counter((r.get("state") or "").strip() for r in rv if r.get("state"))
-        reason_counts = Counter(str(r.get("review_reason", "")).strip() for r in rv if r.get("review_reason"))
-
+    if args.top_restricted and summary.totals["restricted"]:
         print(f"\nTop Restricted by county (top {args.top_restricted}):")
-        for k, c in county_counts.most_common(args.top_restricted):
+        for k, c in summary.county_counts.most_common(args.top_restricted):
             print(f"  {k}: {c}")
 
         print(f"\nTop Restricted by state (top {args.top_restricted}):")
-        for k, c in state_counts.most_common(args.top_restricted):
+        for k, c in summary.state_counts.most_common(args.top_restricted):
             print(f"  {k}: {c}")
 
-        if reason_counts:
+        if summary.reason_counts:
             print(f"\nTop review_reason in Restricted (top {args.top_restricted}):")
-            for k, c in reason_counts.most_common(args.top_restricted):
+            for k, c in summary.reason_counts.most_common(args.top_restricted):
                 print(f"  {k}: {c}")
 
-
-
-    # after total ingest loop
-    status_counts = {}
-    linkable_counts = {"linkable_true": 0, "linkable_false": 0}
-
-    for r in rl:  # rl = storage.RESEARCH_LAKE
-        s = r.get("case_status", "unknown")
-        status_counts[s] = status_counts.get(s, 0) + 1
-        if r.get("linkable"): linkable_counts["linkable_true"] += 1
-        else: linkable_counts["linkable_false"] += 1
+        if summary.rule_hits:
+            print(f"\nRule hits (records evaluated, top {args.top_restricted}):")
+            for k, c in summary.rule_hits.most_common(args.top_restricted):
+                print(f"  {k}: {c}")
 
     print("\nBreakdown (Research Lake):")
-    for k in sorted(status_counts):
-        print(f"  {k}: {status_counts[k]}")
-    print(f"  linkable=True:  {linkable_counts['linkable_true']}")
-    print(f"  linkable=False: {linkable_counts['linkable_false']}")
-    
-    
-    
+    for k in sorted(summary.status_counts):
+        print(f"  {k}: {summary.status_counts[k]}")
+    print(f"  linkable=True:  {summary.linkable_counts['linkable_true']}")
+    print(f"  linkable=False: {summary.linkable_counts['linkable_false']}")
+    if LLM_ENABLED:
+        print(f"\nLLM decision cache: hits={summary.llm_cache['hits']} misses={summary.llm_cache['misses']}")
+        ledger = _ledger()
+        run = sum(t for (_, r), (t, _) in ledger.breakdown().items() if r == ledger.run_id)
+        print(f"LLM tokens this run: {run} (ledger total: {ledger.spent()}, budget: {BUDGET or 'none'})")
+    if args.dedup:
+        d = summary.dedup
+        print(f"\nDedup (this run): {d['misses']:,} distinct records routed, {d['hits']:,} duplicates replayed")
+    if stats:
+        print("\nPipeline stats (this run; latency buckets in us):")
+        print(stats.report())
+        if args.stats_out:
+            stats.write(args.stats_out)
+            print(f"Stats written to {args.stats_out}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,196 @@
+"""
+JSONL IO
+Shared JSONL reading and writing for the core_engine tools.
+
+Decoding/encoding uses msgspec or orjson when installed and the stdlib json
+module otherwise (JSONL_BACKEND=json|orjson|msgspec picks one explicitly).
+Anything the fast backend rejects (NaN literals, huge integers, odd key
+types) is retried with the stdlib, so every backend reads and writes the
+same records.
+
+Readers can ask for only the fields they use (`fields=`): with msgspec the
+line is decoded straight into a typed struct holding just those fields,
+skipping the rest of the line; other backends decode the full line.
+Writers batch lines into a large buffer before each write.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+
+_BOM = b"\xef\xbb\xbf"
+
+
+def _pick_backend() -> str:
+    wanted = os.getenv("JSONL_BACKEND", "").lower()
+    for name in ([wanted] if wanted else ["msgspec", "orjson"]):
+        if name == "json":
+            return "json"
+        try:
+            __import__(name)
+            return name
+        except ImportError:
+            continue
+    return "json"
+
+
+BACKEND = _pick_backend()
+
+
+_json_decode = json.JSONDecoder().decode
+
+
+def _json_loads(line):
+    # decoding bytes up front beats json.loads' own encoding sniffing
+    return _json_decode(line.decode("utf-8") if isinstance(line, bytes) else line)
+
+
+def _json_dumps(obj) -> bytes:
+    return json.dumps(obj).encode("utf-8")
+
+
+if BACKEND == "msgspec":
+    import msgspec
+
+    _decode = msgspec.json.Decoder().decode
+    _encode = msgspec.json.Encoder().encode
+    _DECODE_ERRORS = (msgspec.DecodeError,)
+    _ENCODE_ERRORS = (TypeError, msgspec.EncodeError, OverflowError)
+elif BACKEND == "orjson":
+    import orjson
+
+    _decode = orjson.loads
+    _encode = lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)  # noqa: E731
+    _DECODE_ERRORS = (orjson.JSONDecodeError,)
+    _ENCODE_ERRORS = (TypeError, orjson.JSONEncodeError)
+else:
+    _decode = _json_loads
+    _encode = _json_dumps
+    _DECODE_ERRORS = ()
+    _ENCODE_ERRORS = ()
+
+
+def _loads_with_fallback(line):
+    try:
+        return _decode(line)
+    except _DECODE_ERRORS:
+        return _json_loads(line)  # stdlib accepts NaN/Infinity and big ints
+
+
+# loads(line): decode one JSON document (bytes or str); raises ValueError on bad input
+loads = _loads_with_fallback if _DECODE_ERRORS else _decode
+
+
+def dumps(obj) -> bytes:
+    """Encode one record as compact UTF-8 JSON (no trailing newline)."""
+    try:
+        return _encode(obj)
+    except _ENCODE_ERRORS:
+        return _json_dumps(obj)
+
+
+def decoder(fields: Optional[Sequence[str]] = None) -> Callable[[bytes], dict]:
+    """
+    A loads() that only needs to return `fields` (dict access via .get keeps
+    working; absent and null fields are both left out). Without msgspec this
+    is plain loads().
+    """
+    if not fields or BACKEND != "msgspec":
+        return loads
+    struct = msgspec.defstruct("Record", [(f, Any, None) for f in fields])
+    typed = msgspec.json.Decoder(struct).decode
+
+    def decode(line):
+        try:
+            obj = typed(line)
+        except msgspec.DecodeError:
+            rec = _json_loads(line)
+            return {f: rec[f] for f in fields if rec.get(f) is not None}
+        return {f: v for f in fields if (v := getattr(obj, f)) is not None}
+
+    return decode
+
+
+def _lines(f, start: int, end: Optional[int]) -> Iterator[bytes]:
+    if end is None:
+        yield from f
+        return
+    pos = start
+    for line in f:
+        if pos >= end:
+            break
+        pos += len(line)
+        yield line
+
+
+def iter_lines(path: Path, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """Non-blank lines (stripped, BOM removed) whose start lies in [start, end)."""
+    with Path(path).open("rb", buffering=1 << 20) as f:
+        f.seek(start)
+        for line in _lines(f, start, end):
+            line = line.strip()
+            if line:
+                yield line[3:] if line.startswith(_BOM) else line
+
+
+def read_jsonl(path: Path, start: int = 0, end: Optional[int] = None,
+               fields: Optional[Sequence[str]] = None) -> Iterator[dict]:
+    """Records of a JSONL file (optionally a byte range / a field subset)."""
+    decode = decoder(fields)
+    with Path(path).open("rb", buffering=1 << 20) as f:
+        f.seek(start)
+        for line in _lines(f, start, end):
+            if line.startswith(_BOM):
+                line = line[3:]
+            if not line.isspace():
+                yield decode(line)
+
+
+class JsonlWriter:
+    """Buffered JSONL writer; use as a context manager."""
+
+    def __init__(self, path: Path, mode: str = "w", buffer_size: int = 1 << 20):
+        self._fh = Path(path).open(mode.rstrip("b") + "b")
+        self._buf = []
+        self._size = 0
+        self.buffer_size = buffer_size
+        self.count = 0
+
+    def _push(self, data: bytes, n: int):
+        self._buf.append(data)
+        self._size += len(data)
+        self.count += n
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def write(self, rec):
+        self._push(dumps(rec) + b"\n", 1)
+
+    def write_many(self, rec, n: int):
+        """Write the same record n times (encoded once)."""
+        if n > 0:
+            self._push((dumps(rec) + b"\n") * n, n)
+
+    def flush(self):
+        if self._buf:
+            self._fh.write(b"".join(self._buf))
+            self._buf, self._size = [], 0
+        self._fh.flush()
+
+    def close(self):
+        self.flush()
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_jsonl(rows: Iterable[dict], path: Path, mode: str = "w") -> int:
+    """Write rows to path; returns the number written."""
+    with JsonlWriter(path, mode) as w:
+        for r in rows:
+            w.write(r)
+        return w.count
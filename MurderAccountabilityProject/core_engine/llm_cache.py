@@ -0,0 +1,106 @@
+"""
+LLM Cache
+Persistent, content-addressed cache of LLM review decisions.
+
+Keys are sha256(model | temperature | prompt | payload), so a decision is
+reused only for the same compact record slice asked with the same system
+prompt (per-record and batched reviews differ) and model settings. Entries
+expire after `ttl_seconds`; when the table grows past `max_entries` the least
+recently used rows are dropped. The store is a SQLite file in WAL mode, so
+parallel ingest workers can share it; each process opens its own connection
+on first use.
+"""
+import hashlib
+import sqlite3
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+Decision = Tuple[bool, str]
+
+
+class DecisionCache:
+    EVICT_EVERY = 512  # puts between eviction passes
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+        self._puts = 0
+
+    @staticmethod
+    def key(payload: str, model: str, temperature: float, prompt: str) -> str:
+        return hashlib.sha256(f"{model}|{temperature}|{prompt}|{payload}".encode("utf-8")).hexdigest()
+
+    def _conn(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS decisions ("
+                " key TEXT PRIMARY KEY, review INTEGER NOT NULL, reason TEXT NOT NULL,"
+                " created REAL NOT NULL, used REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Decision]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        db = self._conn()
+        now = time.time()
+        found = {}
+        for i in range(0, len(keys), 500):  # stay under SQLite's variable limit
+            part = keys[i:i + 500]
+            rows = db.execute(
+                f"SELECT key, review, reason FROM decisions WHERE created >= ? AND key IN ({','.join('?' * len(part))})",
+                [now - self.ttl, *part],
+            )
+            for k, review, reason in rows:
+                found[k] = (bool(review), reason)
+        if found:
+            db.executemany("UPDATE decisions SET used = ? WHERE key = ?", [(now, k) for k in found])
+            db.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[Decision]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, Decision]):
+        if not items:
+            return
+        db = self._conn()
+        now = time.time()
+        db.executemany(
+            "INSERT OR REPLACE INTO decisions (key, review, reason, created, used) VALUES (?, ?, ?, ?, ?)",
+            [(k, int(review), reason, now, now) for k, (review, reason) in items.items()],
+        )
+        db.commit()
+        self._puts += len(items)
+        if self._puts >= self.EVICT_EVERY:
+            self._puts = 0
+            self.evict()
+
+    def put(self, key: str, decision: Decision):
+        self.put_many({key: decision})
+
+    def evict(self):
+        """Drop expired rows, then the least recently used beyond max_entries."""
+        db = self._conn()
+        db.execute("DELETE FROM decisions WHERE created < ?", (time.time() - self.ttl,))
+        (n,) = db.execute("SELECT COUNT(*) FROM decisions").fetchone()
+        if self.max_entries and n > self.max_entries:
+            db.execute(
+                "DELETE FROM decisions WHERE key IN (SELECT key FROM decisions ORDER BY used ASC LIMIT ?)",
+                (n - self.max_entries,),
+            )
+        db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,139 @@
+"""
+Metrics
+Optional per-stage instrumentation for the ingest pipeline.
+
+A Metrics object holds latency histograms per stage (status, pii_scan,
+minimalize, classify, classify_batch, sink) and counters per branch
+(unknown/active/closed), per sink and per decision source (rule, llm,
+llm_error, none). pipeline.enable_metrics() sets pipeline.METRICS, which
+every stage checks when it runs; while it is None the only cost is that
+check.
+
+Snapshots are plain dicts (merge across worker processes) and export as JSON
+or Prometheus text format:
+  m.write("stats.prom")   # Prometheus text (node_exporter textfile collector)
+  m.write("stats.json")   # JSON snapshot
+"""
+import json
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+
+# histogram bucket upper bounds in microseconds (+Inf is implied)
+BUCKETS_US = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 50000, 100000, 1000000)
+_BOUNDS_NS = tuple(b * 1000 for b in BUCKETS_US)
+
+
+def decision_source(review: bool, reason: str) -> str:
+    """Which part of the classifier made a (review, reason) decision."""
+    reason = str(reason)
+    if reason.startswith("llm_error"):
+        return "llm_error"
+    if reason.startswith("llm:"):
+        return "llm"
+    return "rule" if review else "none"
+
+
+class Histogram:
+    __slots__ = ("counts", "sum_ns", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(_BOUNDS_NS) + 1)
+        self.sum_ns = 0
+        self.count = 0
+
+    def observe(self, ns: int):
+        self.counts[bisect_left(_BOUNDS_NS, ns)] += 1
+        self.sum_ns += ns
+        self.count += 1
+
+    def quantile(self, q: float):
+        """Upper bound (us) of the bucket holding the q-quantile; None past the last bucket."""
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= rank:
+                return BUCKETS_US[i] if i < len(BUCKETS_US) else None
+        return None
+
+    def to_dict(self) -> dict:
+        return {"counts": list(self.counts), "sum_ns": self.sum_ns, "count": self.count}
+
+    def update(self, d: dict):
+        self.counts = [a + b for a, b in zip(self.counts, d["counts"])]
+        self.sum_ns += d["sum_ns"]
+        self.count += d["count"]
+
+
+class Metrics:
+    def __init__(self):
+        self.stages = {}
+        self.branches = Counter()
+        self.sinks = Counter()
+        self.decisions = Counter()
+
+    def observe(self, stage: str, ns: int):
+        h = self.stages.get(stage)
+        if h is None:
+            h = self.stages[stage] = Histogram()
+        h.observe(ns)
+
+    def snapshot(self) -> dict:
+        return {"buckets_us": list(BUCKETS_US),
+                "stages": {k: h.to_dict() for k, h in self.stages.items()},
+                "branches": dict(self.branches), "sinks": dict(self.sinks),
+                "decisions": dict(self.decisions)}
+
+    def merge(self, snap: dict):
+        """Add a snapshot (e.g. from a worker process) into this one."""
+        for k, d in snap["stages"].items():
+            self.stages.setdefault(k, Histogram()).update(d)
+        self.branches.update(snap["branches"])
+        self.sinks.update(snap["sinks"])
+        self.decisions.update(snap["decisions"])
+
+    def to_prometheus(self, prefix: str = "core_engine") -> str:
+        out = [f"# HELP {prefix}_stage_seconds Pipeline stage latency.",
+               f"# TYPE {prefix}_stage_seconds histogram"]
+        for stage, h in sorted(self.stages.items()):
+            cum = 0
+            for b, c in zip(list(BUCKETS_US) + ["+Inf"], h.counts):
+                cum += c
+                le = b if b == "+Inf" else f"{b / 1e6:g}"
+                out.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cum}')
+            out.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {h.sum_ns / 1e9:.9f}')
+            out.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {h.count}')
+        for name, label, counter, help_ in (
+                ("records", "branch", self.branches, "Records per status branch."),
+                ("sink_records", "sink", self.sinks, "Records written per sink."),
+                ("decisions", "source", self.decisions, "Review decisions per source.")):
+            out.append(f"# HELP {prefix}_{name}_total {help_}")
+            out.append(f"# TYPE {prefix}_{name}_total counter")
+            for k, v in sorted(counter.items()):
+                out.append(f'{prefix}_{name}_total{{{label}="{k}"}} {v}')
+        return "\n".join(out) + "\n"
+
+    def write(self, path: Path):
+        """Prometheus text for .prom/.txt paths, JSON snapshot otherwise."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix in (".prom", ".txt"):
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.snapshot(), indent=2)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(path)
+
+    def report(self) -> str:
+        """Human-readable summary (ingest_quickcheck --stats)."""
+        lines = [f"  {'stage':<15}{'calls':>10}{'total s':>10}{'mean us':>10}{'p50<=us':>10}{'p99<=us':>10}"]
+        for stage, h in sorted(self.stages.items(), key=lambda kv: -kv[1].sum_ns):
+            mean = h.sum_ns / h.count / 1000 if h.count else 0
+            p50, p99 = h.quantile(0.5), h.quantile(0.99)
+            lines.append(f"  {stage:<15}{h.count:>10,}{h.sum_ns / 1e9:>10.3f}{mean:>10.1f}"
+                         f"{p50 if p50 is not None else 'inf':>10}{p99 if p99 is not None else 'inf':>10}")
+        for title, counter in (("branches", self.branches), ("sinks", self.sinks),
+                               ("decisions", self.decisions)):
+            lines.append(f"  {title}: " + (", ".join(f"{k}={v}" for k, v in sorted(counter.items())) or "-"))
+        return "\n".join(lines)
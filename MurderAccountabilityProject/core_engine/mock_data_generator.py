@@ -1,13 +1,27 @@
 """
 Mock Data Generator
-Generates data/mock_records.jsonl for quick pipeline checks.
+Generates data/mock_records.jsonl for quick pipeline checks, or synthetic
+datasets of any size for load testing.
 
 Usage:
   python -m mock_data_generator --seed 42
+  # 5M records on 8 cores (same bytes for the same seed, whatever --workers)
+  python -m mock_data_generator --count 5000000 --seed 7 --workers 8 --out data/synthetic.jsonl
+  python -m mock_data_generator --count 1000000 --status-mix active=0.6,closed=0.3,unknown=0.1 --pii-rate 0.2 --years 2000-2024
+
+Synthetic records are produced in fixed-size chunks, each from its own RNG
+seeded by (seed, chunk number), and written in chunk order as they finish,
+so memory stays flat and the output does not depend on the worker count.
 """
 
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import accumulate
 from pathlib import Path
-import json, random, argparse
+import random, argparse, time
+
+import jsonl_io
+from weights import WEIGHT_FIELD
 
 DATA_PATH = Path("data")
 OUT = DATA_PATH / "mock_records.jsonl"
@@ -22,8 +36,7 @@ def rand_email():
     return f"{random.choice(users)}@{random.choice(doms)}"
 
 def write_jsonl(rows, path):
-    with path.open("w", encoding="utf-8") as f:
-        for r in rows: f.write(json.dumps(r) + "\n")
+    return jsonl_io.write_jsonl(rows, path)
 
 def build_records():
     return [
@@ -60,15 +73,171 @@ def build_records():
         },
     ]
 
+# --- synthetic datasets (--count) ---
+CHUNK = 50_000  # records per RNG stream / work unit
+
+# (state, county, ORI prefix); earlier entries are drawn more often (Zipf, --skew)
+GEO = [
+    ("CA", "Los Angeles", "CA019"), ("IL", "Cook", "IL016"), ("TX", "Harris", "TX101"),
+    ("AZ", "Maricopa", "AZ007"), ("CA", "San Diego", "CA037"), ("CA", "Orange", "CA030"),
+    ("FL", "Miami-Dade", "FL013"), ("TX", "Dallas", "TX057"), ("NY", "Kings", "NY024"),
+    ("CA", "Riverside", "CA033"), ("WA", "King", "WA017"), ("NV", "Clark", "NV002"),
+    ("TX", "Tarrant", "TX220"), ("CA", "San Bernardino", "CA036"), ("TX", "Bexar", "TX015"),
+    ("FL", "Broward", "FL006"), ("MI", "Wayne", "MI082"), ("NY", "Queens", "NY041"),
+    ("CA", "Santa Clara", "CA043"), ("NY", "New York", "NY031"), ("CA", "Alameda", "CA001"),
+    ("PA", "Philadelphia", "PA051"), ("MA", "Middlesex", "MA009"), ("NY", "Suffolk", "NY051"),
+    ("CA", "Sacramento", "CA034"), ("FL", "Palm Beach", "FL050"), ("NY", "Bronx", "NY003"),
+    ("FL", "Hillsborough", "FL029"), ("OH", "Franklin", "OH025"), ("FL", "Orange", "FL048"),
+    ("OH", "Cuyahoga", "OH018"), ("PA", "Allegheny", "PA002"), ("TX", "Travis", "TX227"),
+    ("MN", "Hennepin", "MN027"), ("CA", "Contra Costa", "CA007"), ("CA", "Fresno", "CA010"),
+    ("MO", "St. Louis", "MO095"), ("TN", "Shelby", "TN079"), ("MD", "Baltimore", "MD003"),
+    ("OR", "Multnomah", "OR026"), ("WA", "Pierce", "WA027"), ("LA", "Orleans", "LA036"),
+    ("GA", "Fulton", "GA060"), ("NC", "Mecklenburg", "NC060"), ("IN", "Marion", "IN049"),
+    ("CA", "Kern", "CA015"), ("WA", "Spokane", "WA032"), ("OR", "Lane", "OR020"),
+]
+MO_TAGS = ["firearm", "knife", "blunt_object", "strangulation", "asphyxiation",
+           "burns", "poison", "vehicle", "drowning", "unknown"]
+MO_WEIGHTS = [50, 20, 10, 6, 3, 2, 1, 3, 1, 4]
+FIRST = ["John", "Jane", "Alex", "Maria", "David", "Linda", "Jose", "Aisha", "Wei", "Sam"]
+LAST = ["Doe", "Roe", "Smith", "Garcia", "Nguyen", "Johnson", "Brown", "Lee", "Patel", "Khan"]
+STREETS = ["Main St", "Oak Ave", "Pine Rd", "Maple Dr", "Cedar Ln", "Elm St"]
+AGE_BANDS = ["0-17", "18-24", "25-34", "35-44", "45-54", "55-64", "65+"]
+DEFAULT_STATUS_MIX = {"active": 0.35, "closed": 0.40, "convicted": 0.05, "pending": 0.05,
+                      "open": 0.03, "unknown": 0.12}
+
+
+def parse_mix(text: str) -> dict:
+    """'active=0.6,closed=0.3,unknown=0.1' -> {status: weight}"""
+    mix = {}
+    for part in text.split(","):
+        k, _, v = part.partition("=")
+        if k.strip():
+            mix[k.strip()] = float(v)
+    if not mix or min(mix.values()) < 0 or sum(mix.values()) <= 0:
+        raise ValueError(f"Bad --status-mix: {text!r}")
+    return mix
+
+
+def _pii(rng: random.Random) -> dict:
+    """One to three direct identifiers, as fields or inside a narrative."""
+    phone = f"{rng.choice([206, 312, 503, 602, 713])}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}"
+    email = f"{rng.choice(FIRST).lower()}{rng.randint(1, 99)}@{rng.choice(['mail.com', 'example.org', 'site.net'])}"
+    kinds = {
+        "phone": {"phone": phone},
+        "email": {"email": email},
+        "ssn": {"narrative": f"SSN {rng.randint(100, 899)}-{rng.randint(10, 99)}-{rng.randint(1000, 9999)} on file"},
+        "address": {"address": f"{rng.randint(10, 9999)} {rng.choice(STREETS)}"},
+        "gps": {"gps_exact": f"{rng.uniform(25, 48):.4f},{rng.uniform(-123, -71):.4f}"},
+        "handle": {"handles": f"@{rng.choice(FIRST).lower()}_{rng.randint(10, 999)}"},
+        "narrative": {"narrative": f"Contact at {phone} or {email}"},
+    }
+    out = {}
+    for k in rng.sample(list(kinds), rng.randint(1, 3)):
+        out.update(kinds[k])
+    return out
+
+
+def _chunk(job) -> bytes:
+    """Records [index*CHUNK, index*CHUNK + n) as encoded JSONL."""
+    seed, index, n, opts = job
+    rng = random.Random(f"{seed}:{index}")
+    statuses = rng.choices(opts["statuses"], cum_weights=opts["status_cw"], k=n)
+    geos = rng.choices(GEO, cum_weights=opts["geo_cw"], k=n)
+    day0, days = opts["day0"], opts["days"]
+    pii_rate, weighted_rate = opts["pii_rate"], opts["weighted_rate"]
+    mo_cw = list(accumulate(MO_WEIGHTS))
+    lines = []
+    for status, (state, county, ori) in zip(statuses, geos):
+        d = date.fromordinal(day0 + rng.randrange(days))
+        r = {
+            "case_status": status,
+            "date": d.isoformat(),
+            "county": county,
+            "state": state,
+            "mo_tags": list(dict.fromkeys(rng.choices(MO_TAGS, cum_weights=mo_cw, k=rng.choice((0, 1, 1, 1, 2))))),
+            "ori": f"{ori}{rng.randint(0, 99):02d}",
+            "agency": f"{county} PD",
+            "geo_precision": "county",
+        }
+        if status in ("closed", "convicted"):
+            r["name"] = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+            r["conviction_status"] = rng.choice(("convicted", "cleared", "acquitted"))
+        else:
+            r["age_band"] = rng.choice(AGE_BANDS)
+            r["sex"] = rng.choice(("M", "M", "M", "F", "U"))
+            if rng.random() < 0.5:  # raw fields minimization must strip
+                r["name"] = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+                r["exact_dob"] = f"{rng.randint(1940, 2005)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        if rng.random() < pii_rate:
+            r.update(_pii(rng))
+        if weighted_rate and rng.random() < weighted_rate:
+            r[WEIGHT_FIELD] = rng.randint(2, 20)
+        lines.append(jsonl_io.dumps(r))
+    lines.append(b"")
+    return b"\n".join(lines)
+
+
+def generate(path: Path, count: int, seed: int, workers: int = 1, status_mix: dict | None = None,
+             pii_rate: float = 0.05, years: tuple = (1976, 2025), skew: float = 1.0,
+             weighted_rate: float = 0.0) -> int:
+    """Stream `count` synthetic records to `path`; returns the count written."""
+    mix = status_mix or DEFAULT_STATUS_MIX
+    day0 = date(years[0], 1, 1).toordinal()
+    opts = {
+        "statuses": list(mix), "status_cw": list(accumulate(mix.values())),
+        "geo_cw": list(accumulate(1 / (i + 1) ** skew for i in range(len(GEO)))),
+        "day0": day0, "days": date(years[1], 12, 31).toordinal() - day0 + 1,
+        "pii_rate": pii_rate, "weighted_rate": weighted_rate,
+    }
+    jobs = [(seed, i, min(CHUNK, count - i * CHUNK), opts) for i in range((count + CHUNK - 1) // CHUNK)]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as out:
+        if workers <= 1:
+            for job in jobs:
+                out.write(_chunk(job))
+            return count
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # keep at most 2 chunks per worker in flight so memory stays bounded
+            pending, window = [], workers * 2
+            for job in jobs:
+                pending.append(pool.submit(_chunk, job))
+                if len(pending) >= window:
+                    out.write(pending.pop(0).result())
+            for fut in pending:
+                out.write(fut.result())
+    return count
+
+
 def main():
-    ap = argparse.ArgumentParser(description="Generate a tiny mock JSONL dataset")
+    ap = argparse.ArgumentParser(description="Generate a mock JSONL dataset (3 hand-written records, or --count synthetic ones)")
     ap.add_argument("--seed", type=int, default=None, help="Random seed for deterministic output")
+    ap.add_argument("--count", type=int, default=0, help="Generate N synthetic records instead of the 3 examples")
+    ap.add_argument("--out", type=Path, default=OUT, help=f"Output JSONL (default: {OUT})")
+    ap.add_argument("--workers", type=int, default=1, help="Processes generating chunks (output is identical)")
+    ap.add_argument("--status-mix", type=parse_mix, default=None,
+                    help="Status weights, e.g. active=0.35,closed=0.4,convicted=0.05,pending=0.05,open=0.03,unknown=0.12")
+    ap.add_argument("--pii-rate", type=float, default=0.05, help="Share of records carrying direct PII (default 0.05)")
+    ap.add_argument("--years", default="1976-2025", help="Date span 'YYYY-YYYY' (default 1976-2025)")
+    ap.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of the county distribution (0=uniform)")
+    ap.add_argument("--weighted-rate", type=float, default=0.0,
+                    help=f"Share of records carrying a `{WEIGHT_FIELD}` weight (aggregate rows)")
     args = ap.parse_args()
+
+    if args.count:
+        seed = args.seed if args.seed is not None else random.randrange(2**32)
+        lo, hi = (int(y) for y in args.years.split("-", 1))
+        t0 = time.time()
+        n = generate(args.out, args.count, seed, workers=args.workers, status_mix=args.status_mix,
+                     pii_rate=args.pii_rate, years=(lo, hi), skew=args.skew, weighted_rate=args.weighted_rate)
+        elapsed = max(1e-6, time.time() - t0)
+        print(f"Wrote {n:,} synthetic records (seed={seed}) → {args.out} in {elapsed:.1f}s (~{n / elapsed:,.0f} rec/s)")
+        return
+
     if args.seed is not None:
         random.seed(args.seed)
     records = build_records()
-    write_jsonl(records, OUT)
-    print(f"Wrote {len(records)} mock records → {OUT}")
+    write_jsonl(records, args.out)
+    print(f"Wrote {len(records)} mock records → {args.out}")
 
 if __name__ == "__main__":
     main()
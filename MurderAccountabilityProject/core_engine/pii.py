@@ -1,4 +1,8 @@
+import math
 import re
+from functools import lru_cache
+
+from weights import WEIGHT_FIELD
 
 PATTERNS = {
     "EMAIL": re.compile(r"\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}\b", re.I),
@@ -10,19 +14,57 @@ PATTERNS = {
     "GPS_COORD": re.compile(r"\b-?\d{1,2}\.\d{3,},\s?-?\d{1,3}\.\d{3,}\b"),
 }
 
-def scan_pii(record: dict) -> dict:
-    """Return risk score in [0,1] and matched keys."""
+# Coarse fields written by our own adapters/transforms; never free text.
+SAFE_FIELDS = frozenset({"year", "state", "geo_precision", WEIGHT_FIELD})
+
+# Shortest string any pattern can match (HANDLE: "@abc").
+_MIN_LEN = 4
+
+
+def _combine(patterns: dict):
+    """One alternation of all patterns, each in a named group with its own flags."""
+    parts = []
+    for name, rx in patterns.items():
+        scope = "(?i:" if rx.flags & re.I else "(?:"
+        parts.append(f"(?P<{name}>{scope}{rx.pattern}))")
+    return re.compile("|".join(parts))
+
+
+_COMBINED = _combine(PATTERNS)
+
+
+@lru_cache(maxsize=65536)
+def _scan_text(s: str) -> frozenset:
+    """Categories matching s. Field values repeat heavily (county, date, agency), so memoize."""
+    m = _COMBINED.search(s)
+    if m is None:
+        return frozenset()
+    # Alternation reports only the first category at the leftmost match; the
+    # others can only match from there on, so recheck them from that offset.
+    found = {m.lastgroup}
+    for name, rx in PATTERNS.items():
+        if name not in found and rx.search(s, m.start()):
+            found.add(name)
+    return frozenset(found)
+
+
+def scan_pii(record: dict, skip=SAFE_FIELDS) -> dict:
+    """
+    Return risk score in [0,1] and matched keys.
+    Skips None/bool values, fields in `skip` (pass skip=() to scan everything)
+    and strings too short to match; stops once every category has hit.
+    """
     hits = set()
-    text_fields = []
+    n_categories = len(PATTERNS)
     for k, v in record.items():
-        if v is None: 
+        if v is None or isinstance(v, bool) or k in skip:
+            continue
+        s = v if isinstance(v, str) else str(v)
+        if len(s) < _MIN_LEN:
             continue
-        s = str(v)
-        text_fields.append(s)
-        for name, rx in PATTERNS.items():
-            if rx.search(s):
-                hits.add(name)
+        hits |= _scan_text(s)
+        if len(hits) == n_categories:
+            break
     # crude score: 1 - exp(-hits/4)
-    import math
     score = 1 - math.exp(-len(hits)/4 or 0)
     return {"risk": score, "matches": sorted(hits)}
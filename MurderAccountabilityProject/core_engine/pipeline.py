@@ -7,20 +7,29 @@ applies rule-first routing (and optional LLM check), and sends to a sink:
   - Restricted Vault (review)
   - Quarantine (high PII risk)
 
-Import `ingest_record(rec)` to process one record.
+Import `ingest_record(rec)` to process one record, or `ingest_batch(records)` /
+`ingest_frame(df)` to process many in chunks with identical routing.
+`enable_metrics()` turns on per-stage timing and counters (metrics.py);
+`enable_dedup()` routes each distinct record once and replays the decision
+for duplicates (dedup.py).
 """
 # --- AFTER (drop in) ---
+import time
+
 from status_resolver import resolve_status
 from pii import scan_pii
 from transforms import minimal_active
 from tagging import tag_access
-from config import get_cfg
+from config import Policy, get_policy
 from storage import to_research, to_restricted, to_quarantine
+from weights import carry_weight
+from metrics import Metrics, decision_source
+from dedup import Deduper
 # add import at top
-from agent_classifier import should_route_for_review
-from dotenv import load_dotenv
+from agent_classifier import should_route_for_review, review_batch
+from config import load_env
 
-load_dotenv()
+load_env()
 
 
 # add near top (after imports)
@@ -35,62 +44,252 @@ def _ensure_access(rec: dict, default_access: str, linkable: bool) -> dict:
 def retain_fields(rec, keep):
     return {k: rec.get(k) for k in keep if k in rec}
 
-def ingest_record(rec: dict) -> str:
-    cfg = get_cfg()
-    status = resolve_status(rec)
-    pii_pre = scan_pii(rec)
-    high_pre = pii_pre["risk"] >= cfg["pii_scanner"]["thresholds"]["high"]
+
+_SINKS = {"research": to_research, "restricted": to_restricted, "quarantine": to_quarantine}
+
+
+def _prepare_active(rec2: dict, pii_post: dict, pol: Policy):
+    """Return (record, high_active) for an ACTIVE record that was already minimalized and rescanned."""
+    high_active = (
+        pii_post["risk"] >= 0.30
+        or any(m in ("EMAIL", "PHONE", "SSN") for m in pii_post["matches"])
+    )
+    rec2 = retain_fields(rec2, pol.active_retain)
+    rec2 = tag_access(rec2, "active", pii_post["risk"])
+    rec2 = _ensure_access(rec2, "research", False)
+    return rec2, high_active
+
+
+def _decide_active(rec2: dict, high_active: bool, review: bool, reason: str, pol: Policy):
+    """Return (sink, record) given the classifier decision for a prepared ACTIVE record."""
+    if review and not high_active:
+        sink = pol.review_sink
+        rec2["review_reason"] = reason
+        if sink == "quarantine":
+            return "quarantine", rec2
+        # Ensure access label matches sink
+        rec2["access"] = "restricted"
+        return "restricted", rec2
+
+    if high_active:
+        return "quarantine", rec2
+    return "research", rec2
+
+
+def _route_active(rec2: dict, pii_post: dict, pol: Policy):
+    rec2, high_active = _prepare_active(rec2, pii_post, pol)
+    # Optional Galton-board classifier; high-PII records land in quarantine
+    # whatever the decision, so (as in _route_chunk) they are not reviewed
+    review, reason = _classify(rec2) if not high_active else (False, "")
+    return _decide_active(rec2, high_active, review, reason, pol)
+
+
+def _route_closed(rec: dict, pii_pre: dict, pol: Policy):
+    """Return (sink, record) for a CLOSED record given its pre-scan."""
+    rec3 = retain_fields(rec, pol.closed_retain)
+    rec3 = tag_access(rec3, "closed", pii_pre["risk"])
+    rec3 = _ensure_access(rec3, "research", True)
+
+    if pii_pre["risk"] >= pol.pii_high:
+        return "restricted", rec3
+    return "research", rec3
+
+
+def route_record(rec: dict):
+    """(sink, record) for one record without writing it: the routing half of ingest_record."""
+    pol = get_policy()  # compiled policies.yaml snapshot (hot-reloadable, see config.py)
+    status = _status(rec)
+    # ACTIVE records only need the post-minimalization scan
+    pii_pre = _timed("pii_scan", scan_pii, rec) if status != "active" else None
 
     # --- UNKNOWN branch ---
     if status == "unknown":
-        rec = tag_access(rec, "unknown", pii_pre["risk"])
-        to_quarantine(rec)
-        return "quarantine"
+        return "quarantine", tag_access(rec, "unknown", pii_pre["risk"])
 
     # --- ACTIVE branch ---
     if status == "active":
         # Minimalize first, then rescan
-        rec2 = minimal_active(rec)
-        pii_post = scan_pii(rec2)
-        high_active = (
-            pii_post["risk"] >= 0.30
-            or any(m in ("EMAIL", "PHONE", "SSN") for m in pii_post["matches"])
-        )
-        rec2 = retain_fields(rec2, cfg["policy"]["active_cases"]["retain_fields"])
-        rec2 = tag_access(rec2, "active", pii_post["risk"])
-        rec2 = _ensure_access(rec2, "research", False)
-
-        # Optional Galton-board classifier
-        review, reason = should_route_for_review(rec2)
-        if review and not high_active:
-            sink = (cfg.get("classifier", {}) or {}).get("route_active_review_to", "restricted")
-            rec2["review_reason"] = reason
-            if sink == "quarantine":
-                to_quarantine(rec2)
-                return "quarantine"
-            else:
-                # Ensure access label matches sink
-                rec2["access"] = "restricted"
-                to_restricted(rec2)
-                return "restricted"
-
-        if high_active:
-            to_quarantine(rec2)
-            return "quarantine"
-
-        to_research(rec2)
-        return "research"
-
+        rec2 = _timed("minimalize", minimal_active, rec)
+        sink, rec2 = _route_active(rec2, _timed("pii_scan", scan_pii, rec2), pol)
     # --- CLOSED branch ---
-    keep = cfg["policy"]["closed_cases"]["retain_fields"]
-    rec3 = retain_fields(rec, keep)
-    rec3 = tag_access(rec3, "closed", pii_pre["risk"])
-    rec3 = _ensure_access(rec3, "research", True)
+    else:
+        sink, rec2 = _route_closed(rec, pii_pre, pol)
+
+    # Aggregate-derived records keep their weight through retain_fields
+    return sink, carry_weight(rec, rec2)
+
+
+def ingest_record(rec: dict) -> str:
+    sink, rec2 = route_record(rec) if DEDUP is None else DEDUP.route_one(rec, route_record)
+    write_sink(sink, rec2)
+    return sink
+
+
+def route_chunk(chunk: list) -> list:
+    """
+    (sink, record) for each record of chunk, in input order, without writing
+    anything: the routing half of ingest_batch (streaming.py runs it in
+    worker processes and writes the sinks itself).
+    """
+    return _route_chunk(chunk) if DEDUP is None else DEDUP.route_chunk(chunk, _route_chunk)
+
+
+def _route_chunk(chunk: list) -> list:
+    pol = get_policy()
+    statuses = [_status(r) for r in chunk]
+    active_idx = [i for i, s in enumerate(statuses) if s == "active"]
+    other_idx = [i for i, s in enumerate(statuses) if s != "active"]
+
+    # ACTIVE records only need the post-minimalization scan; the pre-scan
+    # result is never read on that branch.
+    pii_pre = {i: _timed("pii_scan", scan_pii, chunk[i]) for i in other_idx}
+    minimal = [_timed("minimalize", minimal_active, chunk[i]) for i in active_idx]
+    pii_post = [_timed("pii_scan", scan_pii, r) for r in minimal]
+
+    prepared = [_prepare_active(rec2, post, pol) for rec2, post in zip(minimal, pii_post)]
+    # Review decisions for the whole chunk at once (LLM checks go out batched
+    # and concurrently). High-PII records land in quarantine whatever the
+    # decision, so they are not sent for review.
+    to_review = [j for j, (_, high) in enumerate(prepared) if not high]
+    decisions = dict(zip(to_review, _classify_batch([prepared[j][0] for j in to_review])))
+
+    routed = [None] * len(chunk)
+    for j, (i, (rec2, high)) in enumerate(zip(active_idx, prepared)):
+        review, reason = decisions.get(j, (False, ""))
+        routed[i] = _decide_active(rec2, high, review, reason, pol)
+    for i in other_idx:
+        if statuses[i] == "unknown":
+            routed[i] = ("quarantine", tag_access(chunk[i], "unknown", pii_pre[i]["risk"]))
+        else:
+            routed[i] = _route_closed(chunk[i], pii_pre[i], pol)
+
+    return [(sink, carry_weight(rec, r)) for rec, (sink, r) in zip(chunk, routed)]
+
+
+def _ingest_chunk(chunk: list) -> list:
+    routed = route_chunk(chunk)
+    # Sink in input order so each sink sees the same sequence as ingest_record
+    for sink, r in routed:
+        write_sink(sink, r)
+    return [sink for sink, _ in routed]
+
+
+def ingest_batch(records, chunk_size: int = 10000) -> list:
+    """
+    Batch counterpart of ingest_record: a chunked loop, not columnar. Each
+    stage (status, PII scan, minimalization, routing) calls the per-record
+    function for the whole chunk before the next stage runs, so a chunk's
+    review decisions go out as one batch. Returns the sink name per record,
+    in input order; sink assignments match calling ingest_record on each record.
+    """
+    routes, chunk = [], []
+    for rec in records:
+        chunk.append(rec)
+        if len(chunk) >= chunk_size:
+            routes.extend(_ingest_chunk(chunk))
+            chunk = []
+    if chunk:
+        routes.extend(_ingest_chunk(chunk))
+    return routes
+
+
+def ingest_frame(df, chunk_size: int = 10000) -> list:
+    """
+    DataFrame entry point for ingest_batch (one row per record). Missing cells
+    (NaN/None/NA) are treated as absent keys, as in the sparse JSONL input.
+    Each chunk of rows is turned into records a column at a time.
+    """
+    routes = []
+    for start in range(0, len(df), chunk_size):
+        routes.extend(_ingest_chunk(_frame_records(df.iloc[start:start + chunk_size])))
+    return routes
+
+
+def _frame_records(df) -> list:
+    """One dict per row, keys in column order, missing cells left out."""
+    recs = [{} for _ in range(len(df))]
+    for col in df.columns:
+        s = df[col]
+        for rec, v, present in zip(recs, s.tolist(), s.notna().tolist()):
+            if present:
+                rec[col] = v
+    return recs
+
+
+# --- optional dedup ---
+DEDUP = None
+
+
+def enable_dedup(max_entries: int | None = None) -> Deduper:
+    """Route each distinct record once and replay its decision for duplicates."""
+    global DEDUP
+    DEDUP = Deduper() if max_entries is None else Deduper(max_entries)
+    return DEDUP
+
+
+def disable_dedup():
+    global DEDUP
+    DEDUP = None
+
+
+# --- optional instrumentation ---
+# Stages read METRICS at call time, so callers that bound pipeline functions
+# before enable_metrics() (streaming workers, tests) are instrumented too.
+METRICS = None
+
+
+def _timed(stage: str, fn, arg):
+    """fn(arg), with its latency recorded under `stage` while metrics are on."""
+    m = METRICS
+    if m is None:
+        return fn(arg)
+    t = time.perf_counter_ns()
+    out = fn(arg)
+    m.observe(stage, time.perf_counter_ns() - t)
+    return out
+
+
+def _status(rec: dict) -> str:
+    status = _timed("status", resolve_status, rec)
+    if METRICS is not None:
+        METRICS.branches[status] += 1
+    return status
+
+
+def _classify(rec: dict):
+    review, reason = _timed("classify", should_route_for_review, rec)
+    if METRICS is not None:
+        METRICS.decisions[decision_source(review, reason)] += 1
+    return review, reason
+
+
+def _classify_batch(recs: list) -> list:
+    out = _timed("classify_batch", review_batch, recs)
+    if METRICS is not None:
+        METRICS.decisions.update(decision_source(review, reason) for review, reason in out)
+    return out
+
+
+def write_sink(sink: str, rec: dict):
+    """Append rec to the named sink (one of _SINKS), counted and timed while metrics are on."""
+    m = METRICS
+    if m is None:
+        _SINKS[sink](rec)
+        return
+    t = time.perf_counter_ns()
+    _SINKS[sink](rec)
+    m.observe("sink", time.perf_counter_ns() - t)
+    m.sinks[sink] += 1
+
 
-    if high_pre:
-        to_restricted(rec3)
-        return "restricted"
+def enable_metrics(m: Metrics | None = None) -> Metrics:
+    """Time every stage and count branches/sinks/decisions into `m` (a new Metrics by default)."""
+    global METRICS
+    METRICS = m or Metrics()
+    return METRICS
 
-    to_research(rec3)
-    return "research"
 
+def disable_metrics():
+    """Stop recording; the stages go back to a single None check each."""
+    global METRICS
+    METRICS = None
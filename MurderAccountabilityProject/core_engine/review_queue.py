@@ -0,0 +1,120 @@
+"""
+Review Queue
+Async, batched LLM review for ACTIVE records that passed the rules.
+
+Payloads (the compact JSON slices built by agent_classifier) are deduplicated,
+packed `batch_size` per request and sent with at most `concurrency` requests
+in flight. Before a request is sent its worst-case token cost (prompt estimate
++ max completion) is reserved in the budget ledger (budget_ledger.py); a batch
+that does not fit is not sent and its items resolve to
+`llm_error:BudgetExceeded`. Actual usage is settled against the reservation
+when the response arrives.
+
+Point LLM_BASE_URL at a local stub (see stub_llm_server.py) to exercise the
+queue without token spend.
+"""
+import asyncio
+import json
+import logging
+import os
+
+SYSTEM_PROMPT = (
+    "You triage case records for human review. For every item return strict JSON: "
+    "{\"results\":[{\"id\":int,\"review\":bool,\"reason\":string}]}"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 chars/token for compact JSON, plus per-message overhead
+    return len(text) // 4 + 16
+
+
+class _Unmetered:
+    """Ledger stand-in when no budget ledger is given."""
+
+    def reserve(self, n: int) -> int:
+        return 0
+
+    def settle(self, ticket: int, used: int, model: str = "?"):
+        pass
+
+
+class ReviewQueue:
+    def __init__(self, model: str, max_tokens: int, temperature: float,
+                 batch_size: int = 8, concurrency: int = 4,
+                 ledger=None, client=None):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.ledger = ledger or _Unmetered()
+        self._client = client
+
+    async def _send(self, client, sem, items: list) -> list:
+        """One request for a batch of payloads; returns one (review, reason) per item."""
+        user = json.dumps([{"id": i, "rec": json.loads(p)} for i, p in enumerate(items)],
+                          separators=(",", ":"))
+        completion = self.max_tokens * len(items)
+        need = estimate_tokens(SYSTEM_PROMPT + user) + completion
+        async with sem:
+            ticket = self.ledger.reserve(need)
+            if ticket is None:
+                return [(False, "llm_error:BudgetExceeded")] * len(items)
+            used = 0
+            try:
+                rsp = await client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": user},
+                    ],
+                    temperature=self.temperature,
+                    max_tokens=completion,
+                )
+                u = getattr(rsp, "usage", None)
+                used = getattr(u, "total_tokens", None) or 0
+                logging.info("LLM batch model=%s items=%s total=%s reserved=%s",
+                             getattr(rsp, "model", "?"), len(items), used or "?", need)
+                data = json.loads(rsp.choices[0].message.content.strip())
+            except Exception as e:
+                return [(False, f"llm_error:{type(e).__name__}")] * len(items)
+            finally:
+                self.ledger.settle(ticket, used, self.model)
+
+        by_id = {}
+        for r in data.get("results", []) if isinstance(data, dict) else []:
+            try:
+                by_id[int(r.get("id"))] = r
+            except (TypeError, ValueError, AttributeError):
+                continue
+        out = []
+        for i in range(len(items)):
+            r = by_id.get(i)
+            if r is None:
+                out.append((False, "llm_error:MissingItem"))
+            else:
+                out.append((bool(r.get("review", False)), f"llm:{str(r.get('reason', ''))[:60]}"))
+        return out
+
+    async def review(self, payloads: list) -> list:
+        """Decisions for payloads, in order; identical payloads share one review."""
+        uniq = list(dict.fromkeys(payloads))
+        batches = [uniq[i:i + self.batch_size] for i in range(0, len(uniq), self.batch_size)]
+        client = self._client
+        if client is None:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(timeout=15, base_url=os.getenv("LLM_BASE_URL") or None)
+        sem = asyncio.Semaphore(self.concurrency)
+        try:
+            results = await asyncio.gather(*(self._send(client, sem, b) for b in batches))
+        finally:
+            if self._client is None:
+                await client.close()
+        decided = {}
+        for batch, res in zip(batches, results):
+            decided.update(zip(batch, res))
+        return [decided[p] for p in payloads]
+
+    def review_sync(self, payloads: list) -> list:
+        return asyncio.run(self.review(payloads))
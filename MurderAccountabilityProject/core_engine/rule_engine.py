@@ -0,0 +1,236 @@
+"""
+Rule Engine
+Compiled review rules for ACTIVE records (agent_classifier._rule_based).
+
+Rules come from `classifier.rules.table` in policies.yaml, preceded by the
+legacy env-var rules (CLASSIFIER_WATCHLIST_COUNTIES, CLASSIFIER_FORCE_REVIEW_STATES,
+CLASSIFIER_MO_KEYWORDS). Each rule is compiled once: value lists become
+frozensets, year windows and numeric bounds become plain comparisons.
+Rules are tried in order and the first match decides; records that are not
+ACTIVE never match.
+
+Rule keys (all predicates given must hold):
+  name       label used in hit counters and the default reason
+  field      record field to test; for list fields (e.g. mo_tags) any element may match
+  in         list of values            in_file  text file, one value per line
+                                       (relative to policies.yaml's directory)
+  not_in     list of values            eq / ne  single value
+  gte / lte  numeric bounds
+  casefold   lower-case values and entries (default true)
+  from_year  inclusive lower year bound (default: classifier.rules.recent_year)
+  to_year    inclusive upper year bound
+  reason     format string; {value}, {name}, {from_year}, {to_year} available
+An empty field never matches, so a rule with no predicates means "field is set".
+"""
+import math
+from collections import Counter
+from pathlib import Path
+from typing import List, Tuple
+
+Decision = Tuple[bool, str]
+
+_NO_VALUE = object()
+
+
+def year_of(rec) -> int:
+    # rec["date"] like 'YYYY-MM-DD'
+    d = (rec.get("date") or "1900-01-01")
+    try:
+        return int(d[:4])
+    except Exception:
+        return 1900
+
+
+def _is_active(rec) -> bool:
+    return (rec.get("case_status") or "").lower() == "active"
+
+
+class Rule:
+    __slots__ = ("name", "field", "casefold", "members", "excluded", "eq", "ne",
+                 "gte", "lte", "from_year", "to_year", "reason")
+
+    def __init__(self, name: str, field: str, *, casefold: bool = True, members=None, excluded=None,
+                 eq=None, ne=None, gte=None, lte=None,
+                 from_year=None, to_year=None, reason: str = ""):
+        norm = (lambda v: str(v).strip().lower()) if casefold else (lambda v: str(v).strip())
+        self.name = name
+        self.field = field
+        self.casefold = casefold
+        self.members = None if members is None else frozenset(norm(v) for v in members)
+        self.excluded = None if excluded is None else frozenset(norm(v) for v in excluded)
+        self.eq = None if eq is None else norm(eq)
+        self.ne = None if ne is None else norm(ne)
+        self.gte = None if gte is None else float(gte)
+        self.lte = None if lte is None else float(lte)
+        self.from_year = from_year
+        self.to_year = to_year
+        self.reason = reason or "rule:{name}={value}"
+
+    def _test(self, v: str) -> bool:
+        if not v:
+            return False
+        if self.members is not None and v not in self.members:
+            return False
+        if self.excluded is not None and v in self.excluded:
+            return False
+        if self.eq is not None and v != self.eq:
+            return False
+        if self.ne is not None and v == self.ne:
+            return False
+        if self.gte is not None or self.lte is not None:
+            try:
+                x = float(v)
+            except ValueError:
+                return False
+            if (self.gte is not None and x < self.gte) or (self.lte is not None and x > self.lte):
+                return False
+        return True
+
+    def value(self, rec):
+        """Matched (normalized) value of the rule's field, or _NO_VALUE."""
+        return self.value_of(rec.get(self.field))
+
+    def value_of(self, raw):
+        if isinstance(raw, (list, tuple)):
+            # list elements are compared as-is (no strip), like the original mo_tags rule
+            for m in raw:
+                v = str(m).lower() if self.casefold else str(m)
+                if self._test(v):
+                    return v
+            return _NO_VALUE
+        v = str(raw or "").strip()
+        if self.casefold:
+            v = v.lower()
+        return v if self._test(v) else _NO_VALUE
+
+    def values(self, column: list) -> list:
+        """value_of over a column of raw field values, computed once per distinct text value."""
+        try:
+            distinct = set(column)
+        except TypeError:  # unhashable values (e.g. dicts)
+            distinct = None
+        # Only text is deduplicated: 1, 1.0 and True are equal keys but different strings
+        if distinct is None or not all(_is_text(raw) for raw in distinct):
+            return [self.value_of(raw) for raw in column]
+        found = {raw: self.value_of(raw) for raw in distinct}
+        return [found[raw] for raw in column]
+
+    def in_window(self, yr: int) -> bool:
+        return (self.from_year is None or yr >= self.from_year) and (self.to_year is None or yr <= self.to_year)
+
+    def explain(self, value) -> str:
+        return self.reason.format(value=value, name=self.name, from_year=self.from_year, to_year=self.to_year)
+
+
+class RuleEngine:
+    def __init__(self, rules: List[Rule], recent_year: int):
+        self.rules = rules
+        self.recent_year = recent_year
+        self.hits = Counter()
+
+    def check(self, rec: dict) -> Decision:
+        if not _is_active(rec):
+            return (False, "non-active")
+        yr = year_of(rec)
+        for rule in self.rules:
+            if rule.in_window(yr):
+                v = rule.value(rec)
+                if v is not _NO_VALUE:
+                    self.hits[rule.name] += 1
+                    return (True, rule.explain(v))
+        return (False, "no-rule-trigger")
+
+    def check_batch(self, recs: list) -> List[Decision]:
+        """
+        check() over many records. Each field the rules test is read once as a
+        column over the ACTIVE records; each rule then tests every distinct
+        value of its column once, and takes the matching rows in its year
+        window that no earlier rule has decided.
+        """
+        out: List[Decision] = [(False, "non-active")] * len(recs)
+        active = [i for i, r in enumerate(recs) if _is_active(r)]
+        years = [year_of(recs[i]) for i in active]
+        columns, decided = {}, {}
+        for rule in self.rules:
+            if len(decided) == len(active):
+                break
+            col = columns.get(rule.field)
+            if col is None:
+                col = columns[rule.field] = _column(recs, active, rule.field)
+            lo = -math.inf if rule.from_year is None else rule.from_year
+            hi = math.inf if rule.to_year is None else rule.to_year
+            hit = {i: v for i, v, yr in zip(active, rule.values(col), years)
+                   if v is not _NO_VALUE and lo <= yr <= hi and i not in decided}
+            if hit:
+                reasons = {v: rule.explain(v) for v in set(hit.values())}
+                for i, v in hit.items():
+                    decided[i] = (True, reasons[v])
+                self.hits[rule.name] += len(hit)
+        for i in active:
+            out[i] = decided.get(i, (False, "no-rule-trigger"))
+        return out
+
+
+def _is_text(raw) -> bool:
+    if raw.__class__ is tuple:
+        return all(m.__class__ is str for m in raw)
+    return raw is None or raw.__class__ is str
+
+
+def _column(recs: list, rows: list, field: str) -> list:
+    """Raw values of `field` for recs[rows]; lists become tuples so the values hash."""
+    col = [recs[i].get(field) for i in rows]
+    try:
+        set(col)
+    except TypeError:
+        col = [tuple(v) if isinstance(v, list) else v for v in col]
+    return col
+
+
+def _read_values(path: Path) -> List[str]:
+    return [ln.strip() for ln in path.read_text(encoding="utf-8").splitlines()
+            if ln.strip() and not ln.lstrip().startswith("#")]
+
+
+def compile_rule(spec: dict, recent_year: int, base_dir: Path | None = None) -> Rule:
+    """Compile one table entry; a relative in_file is read from base_dir (policies.yaml's directory)."""
+    name = spec.get("name") or spec.get("field")
+    if not spec.get("field"):
+        raise ValueError(f"classifier rule {name!r}: 'field' is required")
+    members = None
+    if "in" in spec or "in_file" in spec:
+        members = list(spec.get("in") or [])
+        if spec.get("in_file"):
+            members += _read_values(Path(base_dir or ".") / spec["in_file"])
+    return Rule(
+        name, spec["field"],
+        casefold=spec.get("casefold", True),
+        members=members, excluded=spec.get("not_in"),
+        eq=spec.get("eq"), ne=spec.get("ne"), gte=spec.get("gte"), lte=spec.get("lte"),
+        from_year=spec.get("from_year", recent_year), to_year=spec.get("to_year"),
+        reason=spec.get("reason", ""),
+    )
+
+
+def legacy_rules(recent_year: int, counties, states, mo_keywords) -> List[Rule]:
+    """The original env-var rules, with their original reasons and matching."""
+    rules = []
+    if counties:
+        rules.append(Rule("watchlist_county", "county", members=counties, from_year=recent_year,
+                          reason="recent>= {from_year} & watchlist_county={value}"))
+    if states:
+        # states are matched as written against the (lower-cased) env list, as before
+        rules.append(Rule("state_override", "state", casefold=False, members=states, from_year=recent_year,
+                          reason="recent>= {from_year} & state_override={value}"))
+    if mo_keywords:
+        rules.append(Rule("mo_keyword", "mo_tags", members=mo_keywords, from_year=recent_year,
+                          reason="recent & mo_keyword"))
+    return rules
+
+
+def build_engine(rules_cfg: dict, recent_year: int, counties=(), states=(), mo_keywords=(),
+                 base_dir: Path | None = None) -> RuleEngine:
+    """Env-var rules first, then the policies.yaml table in order."""
+    rules = legacy_rules(recent_year, counties, states, mo_keywords)
+    rules += [compile_rule(spec, recent_year, base_dir) for spec in (rules_cfg or {}).get("table") or []]
+    return RuleEngine(rules, recent_year)
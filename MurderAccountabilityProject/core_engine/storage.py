@@ -1,13 +1,342 @@
-RESEARCH_LAKE = []
-RESTRICTED_VAULT = []
-QUARANTINE = []
+"""
+Storage
+Sinks for routed records: RESEARCH_LAKE, RESTRICTED_VAULT, QUARANTINE.
+
+The backend comes from `storage` in policies.yaml:
+  - memory  (default) plain in-process lists
+  - jsonl   one append-only <sink>.jsonl per sink under `path`
+  - sqlite  one table per sink in the database file `path`
+  - parquet one part file per flushed batch under `path`/<sink>/ (needs pyarrow)
+
+Records read back exactly as written (same keys, key order and values).
+Parquet parts are named per worker (set_worker) and per-process sequence,
+so reads return worker 0's batches in write order, then worker 1's, ...;
+the interleaving of concurrent workers' appends is not preserved.
+
+Persistent sinks buffer `batch_size` records, then write them in one go
+(fsync'd when `fsync: true`), so memory stays flat during large ingests.
+All sinks support append, len(), iteration (streams from disk), clear(),
+flush() and close().
+
+A relative `path` is resolved against the directory of policies.yaml, like
+the other paths in that file, so runs write to the same place whatever the
+working directory.
+"""
+import atexit
+import json
+import os
+from pathlib import Path
+
+from config import get_cfg, get_policy
+
+WORKER = 0  # worker index in Parquet part names (see set_worker)
+
+
+def set_worker(n: int):
+    """Tag this process's later Parquet writes as coming from worker n (e.g. the shard number)."""
+    global WORKER
+    WORKER = int(n)
+
+
+class MemorySink(list):
+    """In-process list (original behavior); flush/close are no-ops."""
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class BufferedSink:
+    """Append-only sink that persists records in batches. Subclasses implement
+    _write(batch), _read(), _count() and _truncate()."""
+
+    def __init__(self, name: str, batch_size: int = 1000, fsync: bool = False):
+        self.name = name
+        self.batch_size = max(1, int(batch_size))
+        self.fsync = bool(fsync)
+        self._buf = []
+        self._persisted = None  # lazily counted on first len()
+
+    def append(self, rec: dict):
+        self._buf.append(rec)
+        if len(self._buf) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buf:
+            return
+        self._write(self._buf)
+        if self._persisted is not None:
+            self._persisted += len(self._buf)
+        self._buf = []
+
+    def clear(self):
+        self._buf = []
+        self._truncate()
+        self._persisted = 0
+
+    def close(self):
+        self.flush()
+
+    def __len__(self):
+        if self._persisted is None:
+            self._persisted = self._count()
+        return self._persisted + len(self._buf)
+
+    def __iter__(self):
+        self.flush()
+        return iter(self._read())
+
+
+class JsonlSink(BufferedSink):
+    def __init__(self, path: Path, name: str, **kw):
+        super().__init__(name, **kw)
+        self.path = Path(path) / f"{name}.jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = None
+
+    def _write(self, batch):
+        if self._fh is None:
+            self._fh = self.path.open("a", encoding="utf-8")
+        self._fh.write("".join(json.dumps(r) + "\n" for r in batch))
+        self._fh.flush()
+        if self.fsync:
+            os.fsync(self._fh.fileno())
+
+    def _read(self):
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _count(self):
+        if not self.path.exists():
+            return 0
+        with self.path.open("rb") as f:
+            return sum(1 for line in f if line.strip())
+
+    def _truncate(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        self.path.write_text("", encoding="utf-8")
+
+    def close(self):
+        super().close()
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class SqliteSink(BufferedSink):
+    def __init__(self, path: Path, name: str, **kw):
+        import sqlite3
+
+        super().__init__(name, **kw)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={'FULL' if self.fsync else 'OFF'}")
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS {name} (id INTEGER PRIMARY KEY, rec TEXT NOT NULL)")
+        self._db.commit()
+
+    def _write(self, batch):
+        self._db.executemany(f"INSERT INTO {self.name} (rec) VALUES (?)",
+                             [(json.dumps(r),) for r in batch])
+        self._db.commit()
+
+    def _read(self):
+        for (txt,) in self._db.execute(f"SELECT rec FROM {self.name} ORDER BY id"):
+            yield json.loads(txt)
+
+    def _count(self):
+        return self._db.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+
+    def _truncate(self):
+        self._db.execute(f"DELETE FROM {self.name}")
+        self._db.commit()
+
+    def close(self):
+        super().close()
+        self._db.close()
+
+
+class ParquetSink(BufferedSink):
+    """One part file per batch: a column per key in the batch plus __keys__,
+    each record's own key list (which fields it had, in order). A column whose
+    values are not all one scalar type (str, int, float, bool) is stored as
+    JSON text and listed in the schema metadata, and decoded again on read.
+
+    Parts are named part-w<worker>-<seq>-<pid>: seq continues after this
+    worker's existing parts, pid keeps concurrent writers apart."""
+
+    _KEYS = "__keys__"
+
+    def __init__(self, path: Path, name: str, **kw):
+        import pyarrow  # noqa: F401  (fail at startup, not on first flush)
+
+        super().__init__(name, **kw)
+        self.dir = Path(path) / name
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._seq = {}  # worker -> next part sequence number
+
+    def _parts(self):
+        return sorted(self.dir.glob("part-*.parquet"))
+
+    def _next_part(self) -> Path:
+        w = WORKER
+        if w not in self._seq:
+            seqs = [int(p.name.split("-")[2]) for p in self.dir.glob(f"part-w{w:04d}-*.parquet")]
+            self._seq[w] = max(seqs, default=-1) + 1
+        seq = self._seq[w]
+        self._seq[w] += 1
+        return self.dir / f"part-w{w:04d}-{seq:08d}-{os.getpid()}.parquet"
+
+    def _write(self, batch):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        keys = list(dict.fromkeys(k for r in batch for k in r))
+        cols, as_json = {self._KEYS: pa.array([list(r) for r in batch], pa.list_(pa.string()))}, []
+        for k in keys:
+            vals = [r.get(k) for r in batch]
+            types = {type(v) for v in vals if v is not None}
+            arr = None
+            if len(types) <= 1 and types <= {str, int, float, bool}:
+                try:
+                    arr = pa.array(vals)
+                except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+                    pass  # e.g. ints beyond int64
+            if arr is None:
+                arr = pa.array([None if v is None else json.dumps(v) for v in vals], pa.string())
+                as_json.append(k)
+            cols[k] = arr
+        table = pa.table(cols).replace_schema_metadata({"json_columns": json.dumps(as_json)})
+        part = self._next_part()
+        tmp = part.with_suffix(".tmp")  # readers only glob finished parts
+        pq.write_table(table, tmp)
+        if self.fsync:
+            with tmp.open("rb") as f:
+                os.fsync(f.fileno())
+        os.replace(tmp, part)
+
+    def _read(self):
+        import pyarrow.parquet as pq
+
+        for part in self._parts():
+            table = pq.read_table(part)
+            as_json = set(json.loads((table.schema.metadata or {}).get(b"json_columns", b"[]")))
+            cols = {name: table.column(name).to_pylist() for name in table.column_names}
+            for i, keys in enumerate(cols.pop(self._KEYS)):
+                rec = {}
+                for k in keys:
+                    v = cols[k][i]
+                    rec[k] = json.loads(v) if k in as_json and v is not None else v
+                yield rec
+
+    def _count(self):
+        import pyarrow.parquet as pq
+
+        return sum(pq.ParquetFile(p).metadata.num_rows for p in self._parts())
+
+    def _truncate(self):
+        for p in self._parts():
+            p.unlink()
+
+
+_BACKENDS = {"jsonl": JsonlSink, "sqlite": SqliteSink, "parquet": ParquetSink}
+
+
+def make_sink(name: str, cfg: dict | None = None, base_dir: Path | None = None):
+    """Build the sink `name` from a `storage` config block (see module docstring).
+    A relative path is taken relative to base_dir (default: this package)."""
+    cfg = cfg or {}
+    backend = (cfg.get("backend") or "memory").lower()
+    if backend == "memory":
+        return MemorySink()
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend!r}")
+    default_path = "data/sinks.db" if backend == "sqlite" else "data/sinks"
+    return _BACKENDS[backend](
+        Path(base_dir or Path(__file__).resolve().parent) / (cfg.get("path") or default_path), name,
+        batch_size=cfg.get("batch_size", 1000),
+        fsync=cfg.get("fsync", False),
+    )
+
+
+# The sinks are built from policies.yaml on first use, so importing storage
+# (or pipeline) neither reads the config nor creates files.
+_STORAGE_CFG = None
+_OPEN = None  # sink name -> sink
+_ATTRS = {"RESEARCH_LAKE": "research_lake", "RESTRICTED_VAULT": "restricted_vault", "QUARANTINE": "quarantine"}
+
+
+def storage_cfg() -> dict:
+    """The `storage` block of policies.yaml (read once per process)."""
+    global _STORAGE_CFG
+    if _STORAGE_CFG is None:
+        _STORAGE_CFG = (get_cfg() or {}).get("storage") or {}
+    return _STORAGE_CFG
+
+
+def _open() -> dict:
+    global _OPEN
+    if _OPEN is None:
+        cfg, base_dir = storage_cfg(), get_policy().path.parent
+        _OPEN = {name: make_sink(name, cfg, base_dir) for name in _ATTRS.values()}
+    return _OPEN
+
+
+def _sink(name: str):
+    return (_OPEN or _open())[name]
+
+
+def __getattr__(name):
+    # storage.RESEARCH_LAKE / RESTRICTED_VAULT / QUARANTINE, built on first access
+    if name in _ATTRS:
+        return _sink(_ATTRS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def flush_all():
+    for sink in (_OPEN or {}).values():
+        sink.flush()
+
+
+def close_all():
+    for sink in (_OPEN or {}).values():
+        sink.close()
+
+
+atexit.register(close_all)
+
+
+_TAPS = []
+
+
+def add_tap(fn):
+    """Call fn(sink, rec) for every routed record; sink is research|restricted|quarantine.
+    Lets callers keep running summaries without reading the sinks back."""
+    _TAPS.append(fn)
+
+
+def remove_tap(fn):
+    _TAPS.remove(fn)
+
 
 def to_research(rec):
     assert rec.get("access") in {"research","restricted","quarantine"}
-    RESEARCH_LAKE.append(rec)
+    _sink("research_lake").append(rec)
+    for tap in _TAPS: tap("research", rec)
 def to_restricted(rec):
     assert rec.get("access") in {"research","restricted","quarantine"}
-    RESTRICTED_VAULT.append(rec)
+    _sink("restricted_vault").append(rec)
+    for tap in _TAPS: tap("restricted", rec)
 def to_quarantine(rec):
     assert rec.get("access") in {"research","restricted","quarantine"}
-    QUARANTINE.append(rec)
+    _sink("quarantine").append(rec)
+    for tap in _TAPS: tap("quarantine", rec)
@@ -0,0 +1,173 @@
+"""
+Streaming
+Staged ingest with overlapping IO and CPU work.
+
+  reader thread --chunks--> worker processes --routed--> sink writer thread
+                 (bounded)   (pipeline.route_chunk)     (bounded)
+
+The reader parses JSONL into chunks, the workers run status/PII/minimalize/
+classify on whole chunks, and one writer thread appends the results to the
+sinks in input order, so every sink sees the same sequence as ingest_record.
+Queues hold at most `queue_chunks` chunks each: a slow stage blocks the one
+before it instead of buffering the whole file.
+
+Worker rule hits, decision-cache counts, pipeline metrics and dedup counts
+(when pipeline.enable_metrics()/enable_dedup() are on in the caller) are
+folded back into this process, so they read as after a serial run. Each
+worker keeps its own dedup memo across the chunks it routes.
+"""
+import multiprocessing
+import queue
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pipeline
+from agent_classifier import _decision_cache, _rules, cache_stats, rule_hits
+
+_DONE = object()
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Blocking put that gives up once `stop` is set."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event, block: bool = True):
+    """Next item; None if nothing is ready (block=False), _DONE once `stop` is set."""
+    if not block:
+        try:
+            return q.get_nowait()
+        except queue.Empty:
+            return None
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def _route_job(job):
+    """Worker entry point: route one chunk; returns (routed, rule hits, cache stats, metrics, dedup)."""
+    chunk, stats, dedup = job
+    if dedup and pipeline.DEDUP is None:
+        pipeline.enable_dedup()  # lives as long as the worker process
+    dd = Counter(pipeline.DEDUP.stats()) if dedup else Counter()
+    hits, cache = Counter(rule_hits()), Counter(cache_stats())
+    m = pipeline.enable_metrics() if stats else None
+    try:
+        routed = pipeline.route_chunk(chunk)
+    finally:
+        if m:
+            pipeline.disable_metrics()
+    return (routed, Counter(rule_hits()) - hits, Counter(cache_stats()) - cache,
+            m.snapshot() if m else None,
+            Counter(pipeline.DEDUP.stats()) - dd if dedup else Counter())
+
+
+def _fold(hits: Counter, cache: Counter, snap, dd: Counter):
+    if hits:
+        _rules().hits.update(hits)
+    if cache and _decision_cache():
+        _decision_cache().hits += cache["hits"]
+        _decision_cache().misses += cache["misses"]
+    if snap and pipeline.METRICS is not None:
+        pipeline.METRICS.merge(snap)
+    if dd and pipeline.DEDUP is not None:
+        pipeline.DEDUP.hits += dd["hits"]
+        pipeline.DEDUP.misses += dd["misses"]
+
+
+def ingest_streaming(records, workers: int = 2, chunk_size: int = 1000, queue_chunks: int = 0) -> Counter:
+    """
+    Ingest records through the staged runner; returns records per sink.
+    workers=0 routes in the calling thread (reads and sink writes still
+    overlap with it). Routing matches ingest_batch / ingest_record.
+    """
+    queue_chunks = queue_chunks or 2 * max(1, workers)
+    chunks = queue.Queue(maxsize=queue_chunks)
+    routed_q = queue.Queue(maxsize=queue_chunks)
+    stop = threading.Event()
+    errors = []
+    routes = Counter()
+
+    def reader():
+        try:
+            chunk = []
+            for rec in records:
+                chunk.append(rec)
+                if len(chunk) >= chunk_size:
+                    if not _put(chunks, chunk, stop):
+                        return
+                    chunk = []
+            if chunk:
+                _put(chunks, chunk, stop)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(chunks, _DONE, stop)
+
+    def writer():
+        while True:
+            routed = routed_q.get()
+            if routed is _DONE:
+                return
+            if stop.is_set():
+                continue  # keep draining so the dispatcher never blocks
+            try:
+                for sink, r in routed:
+                    pipeline.write_sink(sink, r)  # counted/timed when metrics are on
+                    routes[sink] += 1
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+    threads = [threading.Thread(target=reader, name="ingest-reader", daemon=True),
+               threading.Thread(target=writer, name="ingest-writer", daemon=True)]
+    for t in threads:
+        t.start()
+    try:
+        if workers <= 0:
+            while True:
+                chunk = _get(chunks, stop)
+                if chunk is _DONE:
+                    break
+                _put(routed_q, pipeline.route_chunk(chunk), stop)
+        else:
+            stats, dedup = pipeline.METRICS is not None, pipeline.DEDUP is not None
+            # spawn: workers build their own config/classifier instead of inheriting ours
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                pending, done = deque(), False
+                while (pending or not done) and not stop.is_set():
+                    while not done and len(pending) < queue_chunks:
+                        # only wait on the reader when no chunk is in flight
+                        chunk = _get(chunks, stop, block=not pending)
+                        if chunk is None:
+                            break
+                        if chunk is _DONE:
+                            done = True
+                        else:
+                            pending.append(pool.submit(_route_job, (chunk, stats, dedup)))
+                    if pending:
+                        routed, hits, cache, snap, dd = pending.popleft().result()  # input order
+                        _fold(hits, cache, snap, dd)
+                        _put(routed_q, routed, stop)
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        routed_q.put(_DONE)
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+    return routes
@@ -0,0 +1,74 @@
+r"""
+Stub LLM Server
+Local OpenAI-compatible /v1/chat/completions endpoint for exercising LLM mode
+without token spend. Flags records for review when their county is in
+--review-counties; everything else passes.
+
+Usage (PowerShell):
+  python -m stub_llm_server --port 8765 --review-counties King,Cook --delay 0.2
+  $env:LLM_MODE='on'; $env:LLM_BASE_URL='http://127.0.0.1:8765/v1'; $env:OPENAI_API_KEY='stub'
+  python -m ingest_quickcheck .\data\ucr_incidents.sample.jsonl --batch-size 500
+"""
+import argparse, json, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _decide(rec: dict, counties: set) -> dict:
+    county = (rec.get("county") or "").strip().lower()
+    if county in counties:
+        return {"review": True, "reason": f"stub:county={county}"}
+    return {"review": False, "reason": "stub:pass"}
+
+
+def make_handler(counties: set, delay: float):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            user = next((m["content"] for m in reversed(body.get("messages", [])) if m.get("role") == "user"), "{}")
+            items = json.loads(user)
+            if isinstance(items, list):  # batched review (review_queue)
+                content = {"results": [dict(id=it["id"], **_decide(it["rec"], counties)) for it in items]}
+            else:  # single record (agent_classifier._llm_check_cached)
+                content = _decide(items, counties)
+            if delay:
+                time.sleep(delay)
+            prompt_tokens = len(user) // 4
+            completion = json.dumps(content)
+            rsp = {
+                "id": "stub", "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": completion}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(completion) // 4,
+                          "total_tokens": prompt_tokens + len(completion) // 4},
+            }
+            out = json.dumps(rsp).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, fmt, *args):  # keep the console quiet
+            pass
+
+    return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local stub for the OpenAI chat completions API.")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--review-counties", default="", help="Comma-separated counties to flag for review")
+    ap.add_argument("--delay", type=float, default=0.0, help="Seconds to sleep per request (simulated latency)")
+    args = ap.parse_args()
+    counties = {c.strip().lower() for c in args.review_counties.split(",") if c.strip()}
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(counties, args.delay))
+    print(f"Stub LLM listening on http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
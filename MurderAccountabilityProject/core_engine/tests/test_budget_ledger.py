@@ -0,0 +1,42 @@
+import multiprocessing
+import os
+import sys
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from budget_ledger import BudgetLedger
+
+
+def _spend_until_refused(args):
+    """Worker: reserve/settle 10-token calls until the ledger refuses; returns calls made."""
+    path, limit = args
+    ledger = BudgetLedger(path, limit=limit, run_id="test")
+    calls = 0
+    while True:
+        ticket = ledger.reserve(10)
+        if ticket is None:
+            return calls
+        ledger.settle(ticket, 10, model="m")
+        calls += 1
+
+
+def test_reservations_hold_the_limit_across_processes(tmp_path):
+    path, limit = str(tmp_path / "ledger.sqlite"), 995
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(2) as pool:
+        calls = pool.map(_spend_until_refused, [(path, limit)] * 2)
+    ledger = BudgetLedger(path, limit=limit)
+    assert ledger.spent() == 10 * sum(calls) == 990  # never over, and the budget is used up
+    assert ledger.breakdown() == {("m", "test"): (990, 99)}
+
+
+def test_outstanding_reservations_count_against_the_limit(tmp_path):
+    a = BudgetLedger(str(tmp_path / "ledger.sqlite"), limit=100)
+    b = BudgetLedger(str(tmp_path / "ledger.sqlite"), limit=100)
+    held = a.reserve(60)
+    assert held and b.reserve(50) is None
+    a.settle(held, 20)
+    assert b.reserve(50) and a.spent() == 20
@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import checkpoint
+import mock_data_generator
+
+
+def _lines(tmp_path, count=600):
+    path = tmp_path / "all.jsonl"
+    mock_data_generator.generate(path, count, seed=3, pii_rate=0.3)
+    return path.read_bytes().splitlines(keepends=True)
+
+
+def _quickcheck(path, *opts):
+    """The report totals printed by ingest_quickcheck (plus its incremental notes)."""
+    env = dict(os.environ, LLM_MODE="off")
+    out = subprocess.run([sys.executable, os.path.join(ROOT, "ingest_quickcheck.py"), str(path), "--show", "0", *opts],
+                         cwd=path.parent, env=env, check=True, capture_output=True, text=True).stdout
+    return [ln for ln in out.splitlines()
+            if ln.startswith(("Total ingested", "Research Lake", "Restricted Vault", "Quarantine", "Incremental"))]
+
+
+def _report(lines):
+    return [ln for ln in lines if not ln.startswith("Incremental")]
+
+
+def test_resume_after_appended_lines(tmp_path):
+    lines = _lines(tmp_path)
+    src = tmp_path / "feed.jsonl"
+    src.write_bytes(b"".join(lines[:400]))
+    head = checkpoint.complete_end(src)
+    ck = tmp_path / "feed.ckpt.json"
+    checkpoint.save(ck, src, head, {})
+    with src.open("ab") as f:
+        f.write(b"".join(lines[400:]))
+    assert checkpoint.resume_offset(checkpoint.load(ck), src) == head
+
+    full = _quickcheck(tmp_path / "all.jsonl")
+    src.write_bytes(b"".join(lines[:400]))
+    _quickcheck(src, "--incremental")
+    with src.open("ab") as f:
+        f.write(b"".join(lines[400:]))
+    resumed = _quickcheck(src, "--incremental")
+    assert f"Incremental: resuming at byte {head:,} of {src.stat().st_size:,}" in resumed
+    assert _report(resumed) == _report(full)
+
+
+def test_rotated_or_truncated_file_is_rescanned(tmp_path):
+    lines = _lines(tmp_path)
+    src = tmp_path / "feed.jsonl"
+    src.write_bytes(b"".join(lines[:400]))
+    ck = tmp_path / "feed.ckpt.json"
+    checkpoint.save(ck, src, src.stat().st_size, {})
+
+    src.write_bytes(b"".join(lines[:200]))  # truncated
+    assert checkpoint.resume_offset(checkpoint.load(ck), src) is None
+    src.write_bytes(b"".join(lines[100:]))  # rotated: same size or larger, different bytes
+    assert src.stat().st_size >= checkpoint.load(ck)["offset"]
+    assert checkpoint.resume_offset(checkpoint.load(ck), src) is None
+
+    src.write_bytes(b"".join(lines[:400]))
+    _quickcheck(src, "--incremental")
+    src.write_bytes(b"".join(lines[100:]))
+    rescanned = _quickcheck(src, "--incremental")
+    assert any("full scan" in ln for ln in rescanned)
+    only = tmp_path / "only.jsonl"
+    only.write_bytes(b"".join(lines[100:]))
+    assert _report(rescanned) == _report(_quickcheck(only))
+
+
+def test_partial_last_line_waits_for_its_newline(tmp_path):
+    lines = _lines(tmp_path)
+    src = tmp_path / "feed.jsonl"
+    cut = len(lines[400]) // 2
+    src.write_bytes(b"".join(lines[:400]) + lines[400][:cut])  # writer is mid-line
+    done = len(b"".join(lines[:400]))
+    assert checkpoint.complete_end(src) == done
+
+    first = _quickcheck(src, "--incremental")
+    assert "Total ingested: 400" in first
+    assert checkpoint.load(src.with_name("feed.jsonl.quickcheck.ckpt.json"))["offset"] == done
+
+    with src.open("ab") as f:
+        f.write(lines[400][cut:] + b"".join(lines[401:]))
+    resumed = _quickcheck(src, "--incremental")
+    assert f"Incremental: resuming at byte {done:,} of {src.stat().st_size:,}" in resumed
+    assert _report(resumed) == _report(_quickcheck(tmp_path / "all.jsonl"))
@@ -0,0 +1,100 @@
+import logging
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import config
+
+yaml = pytest.importorskip("yaml")
+
+with open(os.path.join(ROOT, "policies.yaml"), encoding="utf-8") as f:
+    BASE = yaml.safe_load(f)
+
+
+def _write(path, raw, stamp):
+    """Write policies.yaml with a distinct mtime (stamp seconds), as an editor save would."""
+    path.write_text(raw if isinstance(raw, str) else yaml.safe_dump(raw), encoding="utf-8")
+    os.utime(path, (stamp, stamp))
+
+
+def _edit(**changes):
+    raw = yaml.safe_load(yaml.safe_dump(BASE))
+    for dotted, value in changes.items():
+        *parents, key = dotted.split("__")
+        node = raw
+        for p in parents:
+            node = node.setdefault(p, {})
+        node[key] = value
+    return raw
+
+
+@pytest.fixture
+def policies(tmp_path, monkeypatch):
+    """A private policies.yaml, fresh module state and a manual clock."""
+    path = tmp_path / "policies.yaml"
+    _write(path, BASE, 1_000_000)
+    clock = [100.0]
+    monkeypatch.setattr(config, "POLICIES_FILE", path)
+    monkeypatch.setattr(config, "_POLICY", None)
+    monkeypatch.setattr(config, "_NEXT_CHECK", 0.0)
+    monkeypatch.setattr(config, "_SEEN_MTIME", None)
+    monkeypatch.setattr(config.time, "monotonic", lambda: clock[0])
+    return path, clock
+
+
+@pytest.mark.parametrize("raw, key", [
+    ("policy: [unclosed", "while parsing"),
+    ("- just\n- a list\n", "top level"),
+    (_edit(policy__closed_cases__retain_fields="county"), "policy.closed_cases.retain_fields"),
+    (_edit(policy__active_cases__retain_fields=["county", 3]), "policy.active_cases.retain_fields"),
+    (_edit(pii_scanner__thresholds__high=1.5), "pii_scanner.thresholds.high"),
+    (_edit(pii_scanner__thresholds__high=True), "pii_scanner.thresholds.high"),
+    (_edit(classifier__route_active_review_to="research"), "classifier.route_active_review_to"),
+    (_edit(storage__backend="s3"), "storage.backend"),
+])
+def test_malformed_policies_are_rejected(policies, raw, key):
+    path, _ = policies
+    _write(path, raw, 1_000_010)
+    with pytest.raises(ValueError, match=key.replace(".", r"\.")):
+        config.reload_policy()
+
+
+def test_reload_after_interval_keeps_last_good_snapshot(policies, monkeypatch, caplog):
+    path, clock = policies
+    monkeypatch.setattr(config, "RELOAD_SECONDS", 10.0)
+    first = config.get_policy()
+    assert first.version == 1 and config.get_policy() is first  # checks now, next check at t=110
+
+    _write(path, _edit(pii_scanner__thresholds__high=0.25), 1_000_010)
+    clock[0] = 105.0
+    assert config.get_policy() is first  # interval not up yet
+    clock[0] = 110.0
+    second = config.get_policy()
+    assert (second.version, second.pii_high) == (2, 0.25)
+
+    _write(path, _edit(storage__backend="s3"), 1_000_020)
+    clock[0] = 120.0
+    with caplog.at_level(logging.WARNING):
+        assert config.get_policy() is second
+    assert "invalid edit ignored, keeping version 2" in caplog.text
+    clock[0] = 130.0
+    assert config.get_policy() is second  # the bad file is not re-parsed every interval
+
+    _write(path, _edit(classifier__route_active_review_to="quarantine"), 1_000_030)
+    clock[0] = 140.0
+    third = config.get_policy()
+    assert (third.version, third.review_sink, third.pii_high) == (3, "quarantine", BASE["pii_scanner"]["thresholds"]["high"])
+
+
+def test_no_reload_without_interval(policies):
+    path, clock = policies
+    first = config.get_policy()
+    _write(path, _edit(pii_scanner__thresholds__high=0.25), 1_000_010)
+    clock[0] = 10_000.0
+    assert config.get_policy() is first
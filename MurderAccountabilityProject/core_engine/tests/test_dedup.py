@@ -0,0 +1,68 @@
+import json
+import os
+import sys
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import config
+import jsonl_io
+import mock_data_generator
+import pipeline
+
+
+def _routes(ingest, recs, monkeypatch):
+    out = []
+    monkeypatch.setattr(pipeline, "_SINKS", {name: (lambda r, name=name: out.append((name, json.dumps(r))))
+                                             for name in ("research", "restricted", "quarantine")})
+    ingest(json.loads(json.dumps(recs)))
+    return out
+
+
+def test_dedup_follows_policy_reload(tmp_path, monkeypatch):
+    src = tmp_path / "mock.jsonl"
+    mock_data_generator.generate(src, 600, seed=4, pii_rate=0.3)
+    recs = [dict(r, count=2) for r in jsonl_io.read_jsonl(src)]
+    copies = [dict(r, count=3) for r in recs]  # same content, new weight: replayed under dedup
+
+    policies = tmp_path / "policies.yaml"
+    text = config.POLICIES_FILE.read_text(encoding="utf-8")
+    policies.write_text(text, encoding="utf-8")
+    monkeypatch.setattr(config, "POLICIES_FILE", policies)
+    monkeypatch.setattr(config, "RELOAD_SECONDS", 1e-9)  # check the file on every get_policy()
+    config.reload_policy()
+    edited = (text.replace("conviction_status, mo_tags, date, county,", "conviction_status, mo_tags, date,")
+                  .replace('route_active_review_to: "restricted"', 'route_active_review_to: "quarantine"'))
+    assert edited != text
+
+    def edit_policy():
+        policies.write_text(edited, encoding="utf-8")
+        os.utime(policies, ns=(0, policies.stat().st_mtime_ns + 10**9))
+
+    try:
+        for ingest in (lambda rs: [pipeline.ingest_record(r) for r in rs],
+                       lambda rs: pipeline.ingest_batch(rs, chunk_size=100)):
+            policies.write_text(text, encoding="utf-8")
+            config.reload_policy()
+            expected = _routes(ingest, recs, monkeypatch)
+            edit_policy()
+            expected += _routes(ingest, copies, monkeypatch)
+            # the edit changes routing, so replaying the old decisions would show
+            assert expected[:len(recs)] != [(s, r.replace('"count": 3', '"count": 2')) for s, r in expected[len(recs):]]
+
+            policies.write_text(text, encoding="utf-8")
+            config.reload_policy()
+            dedup = pipeline.enable_dedup()
+            try:
+                got = _routes(ingest, recs, monkeypatch)
+                edit_policy()  # hot reload between the originals and their copies
+                got += _routes(ingest, copies, monkeypatch)
+            finally:
+                pipeline.disable_dedup()
+            assert got == expected
+            assert dedup.hits == 0  # every copy came after the reload
+    finally:
+        policies.write_text(text, encoding="utf-8")
+        config.reload_policy()
@@ -0,0 +1,25 @@
+import os
+import sys
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import hotspot_index
+import mock_data_generator
+from eagle_scanner import scan
+
+
+def test_unwritable_index_still_answers(tmp_path, monkeypatch, capsys):
+    src = tmp_path / "mock.jsonl"
+    mock_data_generator.generate(src, 500, seed=2, weighted_rate=0.2)
+
+    def read_only(self, path):
+        raise PermissionError(13, "Permission denied", str(path))
+
+    monkeypatch.setattr(hotspot_index.HotspotIndex, "save", read_only)
+    idx, state = hotspot_index.open_index(src)
+    assert state == "rebuilt" and "index not saved" in capsys.readouterr().err
+    assert idx.query(2000, 2020) == scan(src, 2000, 2020)
+    assert os.listdir(tmp_path) == ["mock.jsonl"]
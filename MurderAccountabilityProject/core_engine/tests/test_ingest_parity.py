@@ -0,0 +1,78 @@
+import json
+import os
+import random
+import sys
+
+import pytest
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import jsonl_io
+import mock_data_generator
+import pipeline
+from streaming import ingest_streaming
+
+RUNS = {
+    "batch": lambda rs: pipeline.ingest_batch(rs, chunk_size=300),
+    "streaming in-process": lambda rs: ingest_streaming(rs, workers=0, chunk_size=300),
+    "streaming 2 workers": lambda rs: ingest_streaming(rs, workers=2, chunk_size=300),
+}
+
+
+def _records(tmp_path, count=2000):
+    """Synthetic records plus re-weighted copies of some of them (what UCR explosion looks like)."""
+    path = tmp_path / "mock.jsonl"
+    mock_data_generator.generate(path, count, seed=11, pii_rate=0.3, weighted_rate=0.2)
+    recs = list(jsonl_io.read_jsonl(path))
+    rng = random.Random(5)
+    for rec in rng.sample(recs, count // 4):
+        recs.insert(rng.randrange(len(recs)), dict(rec, count=rng.randint(2, 9)))
+    return recs
+
+
+def _per_record(recs):
+    for rec in recs:
+        pipeline.ingest_record(rec)
+
+
+def _sink_lines(monkeypatch, ingest, recs):
+    """[(sink, JSON line)] in the order the sinks receive them."""
+    out = []
+    sinks = {name: (lambda r, name=name: out.append((name, json.dumps(r))))
+             for name in ("research", "restricted", "quarantine")}
+    monkeypatch.setattr(pipeline, "_SINKS", sinks)
+    ingest(json.loads(json.dumps(recs)))  # fresh copies: no run sees another's edits
+    return out
+
+
+def test_chunked_paths_match_ingest_record(tmp_path, monkeypatch):
+    recs = _records(tmp_path)
+    expected = _sink_lines(monkeypatch, _per_record, recs)
+    assert {sink for sink, _ in expected} == {"research", "restricted", "quarantine"}
+    for name, ingest in RUNS.items():
+        assert _sink_lines(monkeypatch, ingest, recs) == expected, name
+
+
+def test_dedup_matches_ingest_record(tmp_path, monkeypatch):
+    recs = _records(tmp_path)
+    expected = _sink_lines(monkeypatch, _per_record, recs)
+    dedup = pipeline.enable_dedup()
+    try:
+        for name, ingest in dict(RUNS, record=_per_record).items():
+            assert _sink_lines(monkeypatch, ingest, recs) == expected, f"{name} --dedup"
+        assert dedup.hits > 0
+    finally:
+        pipeline.disable_dedup()
+
+
+def test_ingest_frame_matches_ingest_record(tmp_path, monkeypatch):
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame(_records(tmp_path))
+    # what the frame means record by record: missing cells are absent keys
+    rows = [{k: v for k, v in row.items() if not (pd.api.types.is_scalar(v) and pd.isna(v))}
+            for row in df.to_dict("records")]
+    expected = _sink_lines(monkeypatch, _per_record, rows)
+    assert _sink_lines(monkeypatch, lambda _: pipeline.ingest_frame(df, chunk_size=300), rows) == expected
@@ -0,0 +1,47 @@
+import os
+import sys
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import llm_cache
+from llm_cache import DecisionCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(llm_cache, "time", clock)
+    cache = DecisionCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60, max_entries=0)
+    cache.put("k", (True, "llm:yes"))
+    clock.now += 59
+    assert cache.get("k") == (True, "llm:yes")
+    clock.now += 2
+    assert cache.get("k") is None
+    cache.evict()
+    assert cache._conn().execute("SELECT COUNT(*) FROM decisions").fetchone()[0] == 0
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_evict_drops_least_recently_used(tmp_path, monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(llm_cache, "time", clock)
+    cache = DecisionCache(str(tmp_path / "cache.sqlite"), ttl_seconds=3600, max_entries=2)
+    for key in ("a", "b"):
+        clock.now += 1
+        cache.put(key, (False, "llm:no"))
+    clock.now += 1
+    assert cache.get("a")  # a is now more recently used than b
+    clock.now += 1
+    cache.put("c", (True, "llm:yes"))
+    cache.evict()
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
@@ -0,0 +1,41 @@
+import os
+import sys
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import jsonl_io
+import mock_data_generator
+import pipeline
+from streaming import ingest_streaming
+
+
+def test_metrics_count_every_path_and_leave_sinks_alone(tmp_path, monkeypatch):
+    path = tmp_path / "mock.jsonl"
+    mock_data_generator.generate(path, 500, seed=3, pii_rate=0.3)
+    recs = list(jsonl_io.read_jsonl(path))
+    written = []
+    sinks = {name: (lambda r, name=name: written.append(name)) for name in ("research", "restricted", "quarantine")}
+    monkeypatch.setattr(pipeline, "_SINKS", sinks)
+    ingest_record, write_sink = pipeline.ingest_record, pipeline.write_sink  # bound before enabling
+
+    m = pipeline.enable_metrics()
+    try:
+        for rec in recs:
+            ingest_record(dict(rec))
+        pipeline.ingest_batch([dict(r) for r in recs], chunk_size=64)
+        ingest_streaming([dict(r) for r in recs], workers=0, chunk_size=64)
+        write_sink("research", {})
+    finally:
+        pipeline.disable_metrics()
+
+    assert sum(m.branches.values()) == 3 * len(recs)
+    assert sum(m.sinks.values()) == 3 * len(recs) + 1 == len(written)
+    assert m.stages["status"].count == 3 * len(recs)
+    assert {"pii_scan", "sink", "classify", "classify_batch"} <= set(m.stages)
+    assert pipeline._SINKS is sinks  # enabling/disabling does not replace the sinks
+
+    pipeline.ingest_record(dict(recs[0]))
+    assert sum(m.sinks.values()) == len(written) - 1  # nothing recorded once disabled
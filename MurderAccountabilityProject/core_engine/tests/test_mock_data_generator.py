@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import jsonl_io
+import mock_data_generator
+from weights import WEIGHT_FIELD
+
+OPTS = {"pii_rate": 0.3, "weighted_rate": 0.2}
+
+
+def _generate(tmp_path, name, count, seed=7, workers=1):
+    path = tmp_path / f"{name}.jsonl"
+    assert mock_data_generator.generate(path, count, seed, workers=workers, **OPTS) == count
+    return path.read_bytes()
+
+
+@pytest.mark.parametrize("count", [1, 99, 100, 101, 250, 400])
+def test_same_seed_same_bytes_whatever_the_workers(tmp_path, monkeypatch, count):
+    monkeypatch.setattr(mock_data_generator, "CHUNK", 100)  # several chunk boundaries in a small file
+    serial = _generate(tmp_path, "serial", count)
+    assert serial.count(b"\n") == count
+    assert _generate(tmp_path, "again", count) == serial
+    assert _generate(tmp_path, "pool", count, workers=3) == serial
+    assert _generate(tmp_path, "other", count, seed=8) != serial
+
+
+def test_whole_chunks_are_a_prefix_of_larger_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(mock_data_generator, "CHUNK", 100)
+    small, large = _generate(tmp_path, "small", 200), _generate(tmp_path, "large", 345, workers=2)
+    assert large.startswith(small)
+
+
+def test_weighted_records_use_the_weight_field(tmp_path):
+    path = tmp_path / "w.jsonl"
+    mock_data_generator.generate(path, 500, seed=1, weighted_rate=0.5)
+    weights = [r[WEIGHT_FIELD] for r in jsonl_io.read_jsonl(path) if WEIGHT_FIELD in r]
+    assert 150 < len(weights) < 350 and all(2 <= w <= 20 for w in weights)
@@ -0,0 +1,45 @@
+import os
+import random
+import sys
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from pii import PATTERNS, scan_pii
+
+# Phone, SSN, date and coordinate forms that overlap or nest inside each other,
+# so a lower-priority match can start before (and cover) a higher-priority one.
+ADVERSARIAL = [
+    "123-45-6789", "1-123-45-6789", "555-123-45-6789", "555-123-4567-89", "123-456-7890",
+    "+1 123-45-6789", "(555) 123-4567", "(555)123-45-6789", "12-34-5678 123-45-6789",
+    "2019-03-04", "03-04-2019", "2019-03-04-1234", "1203-04-2019", "123-45-67890", "0123-45-6789",
+    "1234567890", "12345678", "ABC12345-67-8901", "ab12345 123-45-6789", "12345 Main St 555-1234567",
+    "41.12345,-87.12345 123-45-6789", "41.12345,-87.1234567890", "call 555.123.4567 or 123 45 6789",
+    "@user123-45-6789", "x@a.io 123-45-6789", "1 A St", "on 12 Oak Rd, 555 123 4567", "",
+    "abc", "@abc", "12/03/2019 123-45-6789", "ssn:123-45-6789;dob:1980-01-02",
+]
+
+
+def _baseline(s: str) -> list:
+    return sorted(name for name, rx in PATTERNS.items() if rx.search(s))
+
+
+def _fuzz(n=5000, seed=7):
+    rng = random.Random(seed)
+    pieces = ["123", "45", "6789", "123-45-", "-6789", "555", "4567", "1", "+1", "-", "-", ".", " ", "(", ")", ",",
+              "2019", "03", "04", "@", "ab", "X9", "St", "Rd", "a.io", "41.123", "-87.456", "_"]
+    for _ in range(n):
+        yield "".join(rng.choice(pieces) for _ in range(rng.randint(1, 9)))
+
+
+def test_scan_pii_matches_per_pattern_search():
+    for s in ADVERSARIAL + list(_fuzz()):
+        assert scan_pii({"note": s}, skip=())["matches"] == _baseline(s), s
+
+
+def test_scan_pii_unions_fields():
+    rec = {"a": "555-123-45-6789", "b": "2019-03-04", "c": "@handle", "year": "123-45-6789"}
+    assert scan_pii(rec)["matches"] == sorted(set(_baseline(rec["a"])) | set(_baseline(rec["c"])))
+    assert scan_pii(rec, skip=())["matches"] == sorted(set().union(*map(_baseline, rec.values())))
@@ -0,0 +1,87 @@
+import json
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+pytest.importorskip("openai")
+
+import agent_classifier
+import stub_llm_server
+from budget_ledger import BudgetLedger
+from llm_cache import DecisionCache
+from review_queue import SYSTEM_PROMPT, ReviewQueue
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """stub_llm_server on an ephemeral port, flagging King county; tracks requests in flight."""
+    base = stub_llm_server.make_handler({"king"}, delay=0.05)
+    lock = threading.Lock()
+    seen = {"requests": 0, "in_flight": 0, "max_in_flight": 0}
+
+    class Handler(base):
+        def do_POST(self):
+            with lock:
+                seen["requests"] += 1
+                seen["in_flight"] += 1
+                seen["max_in_flight"] = max(seen["max_in_flight"], seen["in_flight"])
+            try:
+                super().do_POST()
+            finally:
+                with lock:
+                    seen["in_flight"] -= 1
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("LLM_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    yield seen
+    server.shutdown()
+    server.server_close()
+
+
+def _payloads(n):
+    counties = ["King", "Cook", "Harris"]
+    return [json.dumps({"county": counties[i % 3], "ori": f"WA{i:05d}"}, separators=(",", ":")) for i in range(n)]
+
+
+def test_decisions_come_back_in_payload_order(stub):
+    payloads = _payloads(20)
+    payloads += payloads[:5]  # duplicates share one review
+    queue = ReviewQueue("stub-model", max_tokens=32, temperature=0, batch_size=3, concurrency=2)
+    decisions = queue.review_sync(payloads)
+    assert decisions == [(True, "llm:stub:county=king") if '"King"' in p else (False, "llm:stub:pass")
+                         for p in payloads]
+    assert stub["requests"] == 7  # 20 distinct payloads, 3 per request
+    assert stub["max_in_flight"] == 2
+
+
+def test_reservations_are_settled_and_refused_once_budget_is_spent(stub, tmp_path):
+    ledger = BudgetLedger(str(tmp_path / "ledger.sqlite"), limit=100_000)
+    queue = ReviewQueue("stub-model", max_tokens=32, temperature=0, batch_size=4, concurrency=3, ledger=ledger)
+    assert all(reason.startswith("llm:") for _, reason in queue.review_sync(_payloads(12)))
+    spent = ledger.spent()
+    assert 0 < spent < 1000  # actual usage was settled, not the reservations
+    rest = ledger.reserve(100_000 - spent)  # nothing is left reserved
+    assert rest
+    ledger.settle(rest, 0)
+
+    exhausted = BudgetLedger(str(tmp_path / "ledger.sqlite"), limit=spent)
+    queue = ReviewQueue("stub-model", max_tokens=32, temperature=0, batch_size=4, ledger=exhausted)
+    requests = stub["requests"]
+    assert queue.review_sync(_payloads(8)) == [(False, "llm_error:BudgetExceeded")] * 8
+    assert stub["requests"] == requests  # refused before sending
+
+
+def test_batched_and_single_record_decisions_are_cached_apart():
+    payload = _payloads(1)[0]
+    assert (DecisionCache.key(payload, "m", 0, SYSTEM_PROMPT)
+            != DecisionCache.key(payload, "m", 0, agent_classifier._RECORD_PROMPT))
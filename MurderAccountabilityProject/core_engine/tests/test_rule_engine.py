@@ -0,0 +1,52 @@
+import os
+import random
+import sys
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from rule_engine import build_engine
+
+TABLE = [
+    {"name": "hot_county", "field": "county", "in_file": "lists/counties.txt", "from_year": 2015},
+    {"name": "old_state", "field": "state", "eq": "tx", "to_year": 2000, "from_year": None},
+    {"name": "exact_agency", "field": "agency", "casefold": False, "in": ["Metro PD"]},
+    {"name": "teen", "field": "victim_age", "gte": 13, "lte": 19, "reason": "age {value}"},
+    {"name": "not_harris", "field": "county", "not_in": ["Harris", "King"], "from_year": 2020},
+]
+
+
+def _engine(base_dir):
+    return build_engine({"table": TABLE}, 2010, counties={"cook"}, states={"WA"}, mo_keywords={"arson"},
+                        base_dir=base_dir)
+
+
+def _policies_dir(tmp_path):
+    (tmp_path / "pol" / "lists").mkdir(parents=True)
+    (tmp_path / "pol" / "lists" / "counties.txt").write_text("# watchlist\nKing\nmaricopa\n", encoding="utf-8")
+    return tmp_path / "pol"
+
+
+def test_check_batch_matches_check(tmp_path):
+    rng = random.Random(7)
+    pick = lambda *vals: rng.choice(vals)
+    recs = [{"case_status": pick("active", "Active", "closed", None),
+             "date": pick(f"{rng.randint(1990, 2024)}-06-01", "", None, "bad"),
+             "county": pick("King", " king ", "Cook", "Harris", "Maricopa", "", None, "Pima"),
+             "state": pick("WA", "wa", "TX", "tx", None),
+             "agency": pick("Metro PD", "metro pd", None),
+             "victim_age": pick(12, 13, 13.0, "19", 19.5, True, "n/a", None),
+             "mo_tags": pick(["Arson", "gun"], ("knife",), [], None, "arson")}
+            for _ in range(3000)]
+    one, many = _engine(_policies_dir(tmp_path)), _engine(tmp_path / "pol")
+    assert many.check_batch(recs) == [one.check(r) for r in recs]
+    assert many.hits == one.hits and len(one.hits) == len(one.rules)  # every rule fired
+
+
+def test_in_file_is_read_relative_to_the_policies_directory(tmp_path, monkeypatch):
+    pol = _policies_dir(tmp_path)
+    monkeypatch.chdir(tmp_path)  # e.g. a cron job started elsewhere
+    rule = _engine(pol).rules[3]
+    assert rule.name == "hot_county" and rule.members == {"king", "maricopa"}
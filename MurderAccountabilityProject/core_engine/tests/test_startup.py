@@ -0,0 +1,14 @@
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+
+
+def test_importing_pipeline_does_not_read_policies(tmp_path):
+    code = ("import sys; import pipeline, config, storage; "
+            "assert config._POLICY is None and storage._OPEN is None and 'yaml' not in sys.modules")
+    env = dict(os.environ, LLM_MODE="off", POLICIES_FILE=str(tmp_path / "missing.yaml"), PYTHONPATH=ROOT)
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
+    assert os.listdir(tmp_path) == []  # no sink files either
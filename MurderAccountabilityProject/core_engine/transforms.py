@@ -1,49 +1,85 @@
 from copy import deepcopy
+from functools import lru_cache, partial
+import datetime as dt
 
-def drop_fields(rec, fields):
-    r = deepcopy(rec)
+# --- in-place steps: each edits top-level keys of r and never touches nested
+# values, so a chain of them only needs one shallow copy of the input ---
+
+def _drop_fields(r, fields):
     for f in fields:
         r.pop(f, None)
-    return r
 
-def dob_to_year(rec):
-    r = deepcopy(rec)
+def _dob_to_year(r):
     dob = r.pop("exact_dob", None)
     if dob and len(dob) >= 4:
         r["birth_year"] = dob[:4]
+
+def _address_to_city(r):
+    # assume city/county already present; keep centroid external
+    r.pop("address", None)
+
+def _gps_to_hex(r, precision="hex7"):
+    r.pop("gps_exact", None)
+    r["geo_precision"] = precision
+
+@lru_cache(maxsize=16384)
+def _week_band(date):
+    # simple “YYYY-WW” band stub
+    y, m, d = map(int, date.split("-"))
+    ww = dt.date(y, m, d).isocalendar().week
+    return f"{y}-W{ww:02d}"
+
+def _date_to_band(r, band="week_band"):
+    date = r.get("date")
+    if date and len(date) >= 10:
+        r[band] = _week_band(date)
+
+def chain(*steps):
+    """Compose in-place steps into one transform that shallow-copies the record once."""
+    def run(rec):
+        r = dict(rec)
+        for step in steps:
+            step(r)
+        return r
+    return run
+
+# --- public single-step transforms (return a deep copy, as before) ---
+
+def drop_fields(rec, fields):
+    r = deepcopy(rec)
+    _drop_fields(r, fields)
+    return r
+
+def dob_to_year(rec):
+    r = deepcopy(rec)
+    _dob_to_year(r)
     return r
 
 def address_to_city(rec):
     r = deepcopy(rec)
-    if "address" in r:
-        r.pop("address", None)
-    # assume city/county already present; keep centroid external
+    _address_to_city(r)
     return r
 
 def gps_to_hex(rec, precision="hex7"):
     r = deepcopy(rec)
-    if "gps_exact" in r:
-        r.pop("gps_exact", None)
-    r["geo_precision"] = precision
+    _gps_to_hex(r, precision)
     return r
 
 def date_to_band(rec, band="week_band"):
     r = deepcopy(rec)
-    date = r.get("date")
-    if date and len(date) >= 10:
-        # simple “YYYY-WW” band stub
-        import datetime as dt
-        y, m, d = map(int, date.split("-"))
-        ww = dt.date(y, m, d).isocalendar().week
-        r[band] = f"{y}-W{ww:02d}"
+    _date_to_band(r, band)
     return r
 
-def minimal_active(rec):
-    # compose minimal pipeline for active cases
-    r = rec
-    r = dob_to_year(r)
-    r = address_to_city(r)
-    r = gps_to_hex(r, "hex7")
-    r = date_to_band(r, "week_band")
+_MINIMAL_ACTIVE = chain(
+    _dob_to_year,
+    _address_to_city,
+    partial(_gps_to_hex, precision="hex7"),
+    partial(_date_to_band, band="week_band"),
     # final hard drop of sensitive fields if still present
-    return drop_fields(r, ["name", "exact_dob", "address", "gps_exact", "phone", "email", "handles", "plate"])
+    partial(_drop_fields, fields=("name", "exact_dob", "address", "gps_exact", "phone", "email", "handles", "plate")),
+)
+
+def minimal_active(rec):
+    # compose minimal pipeline for active cases; nested values (e.g. mo_tags)
+    # are shared with `rec`, not copied
+    return _MINIMAL_ACTIVE(rec)
@@ -1,4 +1,4 @@
-"""
+r"""
 UCR Adapter
 Convert aggregate UCR rows into per-incident JSONL for the pipeline.
 
@@ -6,12 +6,18 @@ Input CSV columns: ORI,Name,YEAR,MRD,CLR,Source,State,County,Agency
 
 Usage (PowerShell):
   python -m ucr_adapter
+  python -m ucr_adapter .\data\raw_ucr.csv -o .\data\ucr_incidents.jsonl
+  # one line per (row, status) with a `count` field instead of one per incident
+  python -m ucr_adapter .\data\raw_ucr.csv -o .\data\ucr_weighted.jsonl --weighted
 Writes to data/ucr_incidents.jsonl by default.
 """
 
-import csv, json, math
+import argparse, csv, math
 from pathlib import Path
 
+from jsonl_io import JsonlWriter
+from weights import WEIGHT_FIELD
+
 IN = Path("data/ucr_sample.csv")         # change if needed
 OUT = Path("data/ucr_incidents.jsonl")
 OUT.parent.mkdir(exist_ok=True, parents=True)
@@ -22,8 +28,9 @@ def normalize_county(s: str) -> str:
         return ""
     return s.split(",")[0].strip()
 
-def emit(record, fh):
-    fh.write(json.dumps(record) + "\n")
+def emit(record, out: JsonlWriter, n: int = 1):
+    # identical incidents are encoded once and written n times
+    out.write_many(record, n)
 
 def safe_int(val):
     """
@@ -42,7 +49,15 @@ def safe_int(val):
 
 
 def main():
-    with IN.open("r", encoding="utf-8") as f, OUT.open("w", encoding="utf-8") as out:
+    ap = argparse.ArgumentParser(description="Convert aggregate UCR rows into incident JSONL.")
+    ap.add_argument("csv", type=Path, nargs="?", default=IN, help=f"Input CSV (default: {IN})")
+    ap.add_argument("-o", "--out", type=Path, default=OUT, help=f"Output JSONL (default: {OUT})")
+    ap.add_argument("--weighted", action="store_true",
+                    help="Emit one record per (row, status) with a `count` field instead of one line per incident")
+    args = ap.parse_args()
+    args.out.parent.mkdir(exist_ok=True, parents=True)
+
+    with args.csv.open("r", encoding="utf-8") as f, JsonlWriter(args.out) as out:
         r = csv.DictReader(f)
         for row in r:
             year = int(row["YEAR"])
@@ -74,20 +89,27 @@ def main():
 
 
 
+            closed = dict(base)
+            closed["case_status"] = "closed"
+            closed["conviction_status"] = "cleared"  # UCR “cleared” ≠ conviction, but closed for our purposes
+            active = dict(base)
+            active["case_status"] = "active"
+
+            if args.weighted:
+                # One weighted record per status; downstream honors `count`
+                if clr:
+                    emit(dict(closed, **{WEIGHT_FIELD: clr}), out)
+                if open_cnt:
+                    emit(dict(active, **{WEIGHT_FIELD: open_cnt}), out)
+                continue
+
             # Emit CLOSED incidents (CLR)
-            for _ in range(clr):
-                rec = dict(base)
-                rec["case_status"] = "closed"
-                rec["conviction_status"] = "cleared"  # UCR “cleared” ≠ conviction, but closed for our purposes
-                emit(rec, out)
+            emit(closed, out, clr)
 
             # Emit ACTIVE incidents (MRD-CLR)
-            for _ in range(open_cnt):
-                rec = dict(base)
-                rec["case_status"] = "active"
-                emit(rec, out)
+            emit(active, out, open_cnt)
 
-    print(f"Wrote JSONL incidents → {OUT}")
+    print(f"Wrote JSONL incidents → {args.out}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,23 @@
+"""
+Weights
+Aggregate-derived records (`ucr_adapter --weighted`) carry a `count` field:
+one record stands for that many identical incidents. Records without it
+count once.
+"""
+
+WEIGHT_FIELD = "count"
+
+def weight_of(rec) -> int:
+    w = rec.get(WEIGHT_FIELD)
+    if w is None:
+        return 1
+    try:
+        return max(0, int(w))
+    except (TypeError, ValueError):
+        return 1
+
+def carry_weight(src: dict, out: dict) -> dict:
+    """Copy the weight from a source record onto a derived record (in place)."""
+    if WEIGHT_FIELD in src:
+        out[WEIGHT_FIELD] = src[WEIGHT_FIELD]
+    return out
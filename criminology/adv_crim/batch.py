@@ -0,0 +1,177 @@
+# batch.py
+# Run many map_cluster scenarios against one loaded dataset.
+# Usage:
+#   python map_cluster.py SHR.csv --batch scenarios.yaml --outdir out [--jobs 4]
+#
+# The scenario file is a list of mappings (or {defaults: {...}, scenarios: [...]})
+# whose keys are map_cluster options without the dashes, e.g.
+#   - name: female_msa
+#     group: msa
+#     relcirc: true
+#     threshold: 0.30
+#   - name: modern
+#     preset: modern_female
+# Options given on the command line apply to every scenario unless it sets
+# its own; each scenario writes to <outdir>/<name> unless it sets outdir.
+#
+# The CSV is loaded and grouped once (per --solved-source), rows are selected
+# once per (--msa-only, --min-decade), and aggregate() runs once per distinct
+# (rows, group, by_decade, relcirc). Filtering, reports and dumps then run per
+# scenario from memory; with --jobs N in N worker processes (output is printed
+# per scenario, in file order). With --cube, scenarios without case dumps
+# read their selections from the precomputed cube instead of the rows.
+
+import contextlib, io, json, os, sys
+import map_cluster as mc
+from loader import load_shr
+
+_FIXED = ('csv', 'batch', 'jobs', 'cache_dir', 'no_cache', 'cube')  # shared by the whole batch
+
+
+def load_scenarios(path):
+    """List of scenario dicts from a JSON or YAML file (defaults merged in)."""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if path.lower().endswith('.json'):
+        data = json.loads(text)
+    else:
+        try:
+            import yaml
+        except ImportError:
+            raise SystemExit("[Batch] YAML scenario files need PyYAML (pip install pyyaml); or use a .json file.")
+        data = yaml.safe_load(text)
+    defaults = {}
+    if isinstance(data, dict):
+        defaults = data.get('defaults') or {}
+        data = data.get('scenarios')
+    if not isinstance(data, list) or not all(isinstance(s, dict) for s in data):
+        raise SystemExit(f"[Batch] {path}: expected a list of scenarios (option: value mappings).")
+    return [dict(defaults, **s) for s in data]
+
+
+def scenario_argv(scen):
+    """map_cluster command-line options for one scenario mapping."""
+    argv = []
+    for key, value in scen.items():
+        key = key.replace('-', '_')
+        if key == 'name' or value is None:
+            continue
+        if key in _FIXED:
+            raise SystemExit(f"[Batch] '{key}' applies to the whole batch; set it on the command line.")
+        flag = '--' + key.replace('_', '-')
+        if value is True:
+            argv.append(flag)
+        elif value is False:
+            if key == 'report':
+                argv.append('--no-report')  # other switches are off unless given
+        else:
+            argv += [flag, str(value)]
+    return argv
+
+
+def _rows_key(a, cube=False):
+    msa = a.msa_only.strip() if a.msa_only and a.group == 'msa' else None
+    decade = int(a.min_decade) - (int(a.min_decade) % 10) if a.min_decade else 0
+    return (a.solved_source, msa, decade, cube and not (a.dump_msa and a.dump_weapon))
+
+
+def _agg_key(a):
+    return _rows_key(a)[:3] + (a.group, bool(a.by_decade), bool(a.relcirc))
+
+
+_ROWS = {}  # worker copy of the selected case rows (or cube slices), keyed by _rows_key
+
+
+def _init_worker(rows):
+    _ROWS.update(rows)
+
+
+def _run_one(rows, args, agg):
+    try:
+        mc.run_scenario(rows, args, agg)
+        return True
+    except Exception as e:
+        print(f"[Batch] failed: {type(e).__name__}: {e}")
+        return False
+
+
+def _run_job(job):
+    """Worker entry: one scenario; returns (ok, console output)."""
+    rows_key, args, agg = job
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        ok = _run_one(_ROWS[rows_key], args, agg)
+    return ok, buf.getvalue()
+
+
+def run_batch(args, argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    ap = mc.build_parser()
+    runs, names = [], set()
+    for i, scen in enumerate(load_scenarios(args.batch), 1):
+        name = str(scen.get('name') or f"scenario_{i:02d}")
+        if name in names:
+            raise SystemExit(f"[Batch] duplicate scenario name '{name}'.")
+        names.add(name)
+        extra = scenario_argv(scen)
+        if 'outdir' not in scen:
+            extra += ['--outdir', os.path.join(args.outdir, name)]
+        try:
+            runs.append((name, mc.apply_preset(ap.parse_args(argv + extra))))
+        except SystemExit:
+            print(f"[Batch] invalid options in scenario '{name}': {' '.join(extra)}")
+            raise
+
+    os.makedirs(args.outdir, exist_ok=True)
+    cube = df = None
+    if args.cube:
+        from cube import load_cube
+        cube = load_cube(args.csv, cache_dir=args.cache_dir, use_cache=not args.no_cache)
+        cube.check_input()
+
+    sources = {a.solved_source for _, a in runs}
+    prepared, rows, aggs = {}, {}, {}
+    for name, a in runs:
+        rk, ak = _rows_key(a, cube is not None), _agg_key(a)
+        from_cube = rk[-1]
+        if rk not in rows and from_cube:
+            rows[rk] = cube.select(a)
+        elif rk not in rows:
+            if df is None:  # without --cube, or for case dumps
+                df = load_shr(args.csv, cache_dir=args.cache_dir, use_cache=not args.no_cache)
+                if cube is None:
+                    mc.check_input(df)
+            if a.solved_source not in prepared:
+                base = df.copy() if len(sources) > 1 else df
+                prepared[a.solved_source] = mc.prepare(base, solved_source=a.solved_source)
+            rows[rk] = mc.select_rows(prepared[a.solved_source], a)
+        if ak not in aggs:
+            if from_cube:
+                aggs[ak] = rows[rk].aggregate(group=a.group, by_decade=a.by_decade, relcirc=a.relcirc)
+            else:
+                aggs[ak] = mc.aggregate(rows[rk], group=a.group, by_decade=a.by_decade, relcirc=a.relcirc)
+    print(f"[Batch] {len(runs)} scenarios: {len(rows)} row set(s), {len(aggs)} aggregate(s)")
+
+    failed = []
+    jobs = [(_rows_key(a, cube is not None), a, aggs[_agg_key(a)]) for _, a in runs]
+    if args.jobs > 1 and len(runs) > 1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        ctx = multiprocessing.get_context('spawn')  # same behaviour on Windows and POSIX
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(runs)), mp_context=ctx,
+                                 initializer=_init_worker, initargs=(rows,)) as pool:
+            futures = [pool.submit(_run_job, j) for j in jobs]
+            for (name, _), fut in zip(runs, futures):
+                ok, text = fut.result()
+                print(f"\n=== [{name}] ===")
+                print(text, end='')
+                if not ok:
+                    failed.append(name)
+    else:
+        for (name, _), (rk, a, agg) in zip(runs, jobs):
+            print(f"\n=== [{name}] ===")
+            if not _run_one(rows[rk], a, agg):
+                failed.append(name)
+    if failed:
+        raise SystemExit(f"[Batch] {len(failed)} scenario(s) failed: {', '.join(failed)}")
+    print(f"\n[Batch] {len(runs)} scenarios -> {args.outdir}")
@@ -0,0 +1,202 @@
+# cube.py
+# Precomputed aggregate cube for map_cluster (--cube).
+#
+# One pass over the case rows produces:
+#   cells  - TOTAL / SOLVED (field) / SOLVED_OFFSEX / REL_UNK / CIRC_UNK case
+#            counts and FIRST row per (county, MSA, victim sex, weapon,
+#            decade), with the cluster IDs and labels map_cluster derives
+#   labels - COUNT / FIRST row per known Relationship/Circumstance label
+#            within (county, MSA, sex, weapon, decade), for REL_TOP1/CIRC_TOP1
+#   oris   - the same counts per (cluster IDs, MSA, decade, Ori, Agency)
+# aggregate(), per-ORI summaries, --msa-only and --min-decade slices are
+# then roll-ups of these tables and give the same numbers as the case rows
+# (FIRST keeps the row-order tie-breaks). Case dumps (--dump-msa/--dump-weapon)
+# still need the rows.
+#
+# The cube is stored next to the loader's Parquet cache and named like it:
+# <cache dir>/<cache stem>.cube.v<N>.<CSV hash>/{cells,labels,oris}.parquet + meta.json
+
+import os, re, json, shutil
+import numpy as np
+import pandas as pd
+import map_cluster as mc
+from loader import cache_dir_for, cache_stem, file_digest, load_shr, stale_entries
+
+CUBE_VERSION = 1
+
+CELL_DIMS = ['MURDGRP1', 'MURDGRP2', 'SEX', 'WEAPON_CODE', 'CNTY_LABEL', 'MSA_LABEL', 'WEAPON_LABEL', 'DECADE']
+LABEL_DIMS = ['MURDGRP1', 'MURDGRP2', 'SEX', 'WEAPON_CODE', 'CNTY_LABEL', 'MSA_LABEL', 'DECADE']
+ORI_DIMS = ['MURDGRP1', 'MURDGRP2', 'MSA_LABEL', 'DECADE', 'Ori', 'Agency']
+RELCIRC = (('Relationship', 'REL'), ('Circumstance', 'CIRC'))  # field, column prefix
+
+
+class Cube:
+    def __init__(self, cells, labels, oris, meta, solved='SOLVED'):
+        self.cells = cells
+        self.labels = labels
+        self.oris = oris
+        self.meta = meta
+        self.solved = solved  # measure used as SOLVED ('SOLVED' = field, 'SOLVED_OFFSEX')
+
+    @property
+    def columns(self):
+        return self.cells.columns.union(self.oris.columns, sort=False)
+
+    def check_input(self):
+        mc.check_input(pd.DataFrame(columns=self.meta['columns']), mismatch=self.meta['offsex_mismatch'])
+
+    def select(self, args):
+        """Cube restricted like map_cluster.select_rows(args), measuring SOLVED per args.solved_source."""
+        cells, labels, oris = self.cells, self.labels, self.oris
+        if args.msa_only:
+            if args.group != 'msa':
+                print("[Warn] --msa-only ignored because --group is not 'msa'")
+            else:
+                target_msa = args.msa_only.strip()
+                cells = cells[cells['MSA_LABEL'] == target_msa]
+                labels = labels[labels['MSA_LABEL'] == target_msa]
+                oris = oris[oris['MSA_LABEL'] == target_msa]
+                print(f"[Filter] MSA_ONLY = '{target_msa}': {cells['TOTAL'].sum()} rows remain")
+        if args.min_decade:
+            mindec = int(args.min_decade) - (int(args.min_decade) % 10)  # floor to decade
+            cells = cells[cells['DECADE'].ge(mindec)]
+            labels = labels[labels['DECADE'].ge(mindec)]
+            oris = oris[oris['DECADE'].ge(mindec)]
+            print(f"[Filter] DECADE >= {mindec}: {cells['TOTAL'].sum()} rows remain")
+        solved = 'SOLVED_OFFSEX' if args.solved_source == 'offsex' else 'SOLVED'
+        return Cube(cells, labels, oris, self.meta, solved)
+
+    def _measures(self, cells, unknown=False):
+        """TOTAL, SOLVED (+ REL_UNK/CIRC_UNK when present) per cell."""
+        cols = ['TOTAL'] + [f'{p}_UNK' for _, p in RELCIRC if unknown and f'{p}_UNK' in cells.columns]
+        return cells[cols].assign(SOLVED=cells[self.solved])
+
+    def _top1(self, field, keys, groups):
+        """REL/CIRC_TOP1 for the rows of `groups` (a keys frame), as _top1_label would pick them."""
+        lab = self.labels[self.labels['FIELD'] == field]
+        t = (lab.groupby(keys + ['LABEL'], dropna=False, observed=True)
+                .agg(COUNT=('COUNT', 'sum'), FIRST=('FIRST', 'min'))
+                .reset_index()
+                .sort_values(['COUNT', 'FIRST'], ascending=[False, True])
+                .drop_duplicates(keys))
+        top = groups.merge(t[keys + ['LABEL']], on=keys, how='left')['LABEL']
+        return top.astype(object).where(top.notna(), '—').to_numpy()
+
+    def aggregate(self, group='county', by_decade=False, relcirc=False):
+        """Same frame as map_cluster.aggregate() on the matching case rows."""
+        keys, gid = mc._aggregate_keys(group, by_decade)
+        c = self.cells
+        m = pd.concat([c[keys + ['WEAPON_LABEL']], self._measures(c, unknown=relcirc)], axis=1)
+        sums = {k: (k, 'sum') for k in m.columns if k not in keys and k != 'WEAPON_LABEL'}
+        g = m.groupby(keys, dropna=False).agg(WEAPON_LABEL=('WEAPON_LABEL', 'first'), **sums)
+        g.insert(0, 'TOTAL', g.pop('TOTAL'))
+        g.insert(1, 'SOLVED', g.pop('SOLVED'))
+        g.insert(2, 'PERCENT', g['SOLVED'] / g['TOTAL'])
+        if relcirc:
+            groups = g.index.to_frame(index=False)
+            for field, prefix in RELCIRC:
+                g[f'{prefix}_UNK_RATE'] = g.pop(f'{prefix}_UNK') / g['TOTAL']
+                g[f'{prefix}_TOP1'] = self._top1(field, keys, groups)
+        return mc._rank_clusters(g.reset_index(), gid, relcirc)
+
+    def per_ori(self, gid_field, ids):
+        """Same frame as map_cluster.per_ori_summary() on the rows of clusters `ids`."""
+        c = self.oris[self.oris[gid_field].isin(ids)]
+        m = pd.concat([c[['Ori', 'Agency']], self._measures(c, unknown=True)], axis=1)
+        per_ori = m.groupby(['Ori', 'Agency'], dropna=False, observed=True).sum().reset_index()
+        for _, prefix in RELCIRC:
+            if f'{prefix}_UNK' in per_ori.columns:
+                per_ori[f'{prefix}_UNK_RATE'] = per_ori.pop(f'{prefix}_UNK') / per_ori['TOTAL']
+        per_ori['PERCENT'] = per_ori['SOLVED'] / per_ori['TOTAL']
+        per_ori['UNSOLVED'] = per_ori['TOTAL'] - per_ori['SOLVED']
+        return per_ori.sort_values(['UNSOLVED', 'TOTAL'], ascending=[False, False])
+
+    def codebook(self):
+        """WEAPON_CODE -> WEAPON_LABEL pairs, as map_cluster derives them from the rows."""
+        first_seen = self.cells.sort_values('FIRST', kind='stable')
+        return first_seen[['WEAPON_CODE', 'WEAPON_LABEL']].drop_duplicates().sort_values('WEAPON_CODE')
+
+
+def build_cube(df):
+    """Cube from loaded (load_shr) case rows."""
+    mc.check_input(df, mismatch=0.0)  # required columns only; the warning is printed on use
+    meta = {'rows': len(df), 'offsex_mismatch': mc.offsex_mismatch(df), 'columns': list(df.columns)}
+    fields = [(f, p) for f, p in RELCIRC if f in df.columns]
+
+    rows = mc.prepare(df, solved_source='field')
+    rows['SOLVED_OFFSEX'] = mc._solved(rows, 'offsex')
+    rows['ROW'] = np.arange(len(rows))
+    unknown = {}
+    for field, prefix in fields:
+        unknown[field] = mc._unknown_flags(rows[field])
+        rows[f'{prefix}_UNK'] = unknown[field]
+    counts = dict(TOTAL=('ROW', 'count'), SOLVED=('SOLVED', 'sum'), SOLVED_OFFSEX=('SOLVED_OFFSEX', 'sum'),
+                  **{f'{p}_UNK': (f'{p}_UNK', 'sum') for _, p in fields})
+
+    # cells in first-appearance order, so 'first' over cells is 'first' over rows
+    cells = (rows.groupby(CELL_DIMS, dropna=False, observed=True, sort=False)
+                 .agg(**counts, FIRST=('ROW', 'min'))
+                 .reset_index())
+    if 'Ori' in rows.columns and 'Agency' in rows.columns:
+        oris = (rows.groupby(ORI_DIMS, dropna=False, observed=True, sort=False)
+                    .agg(**counts)
+                    .reset_index())
+    else:  # run_scenario reports the missing columns
+        oris = pd.DataFrame(columns=[c for c in ORI_DIMS if c in rows.columns])
+    labels = []
+    for field, prefix in fields:
+        known = rows[~unknown[field]]
+        t = (known[LABEL_DIMS + ['ROW']].assign(LABEL=known[field].astype('string'))
+                .groupby(LABEL_DIMS + ['LABEL'], dropna=False, observed=True, sort=False)
+                .agg(COUNT=('ROW', 'count'), FIRST=('ROW', 'min'))
+                .reset_index())
+        t['FIELD'] = field
+        labels.append(t)
+    labels = pd.concat(labels, ignore_index=True) if labels else pd.DataFrame(
+        columns=LABEL_DIMS + ['LABEL', 'COUNT', 'FIRST', 'FIELD'])
+    labels['FIELD'] = labels['FIELD'].astype('category')
+    return Cube(cells, labels, oris, meta)
+
+
+def cube_dir(csv_path, cache_dir=None, digest=None):
+    digest = digest or file_digest(csv_path)
+    return os.path.join(cache_dir_for(csv_path, cache_dir),
+                        f"{cache_stem(csv_path)}.cube.v{CUBE_VERSION}.{digest}")
+
+
+def load_cube(csv_path, cache_dir=None, use_cache=True):
+    """The cube for csv_path: read from its cache directory, or built (and saved) from the rows."""
+    if not use_cache:
+        return build_cube(load_shr(csv_path, use_cache=False))
+    path = cube_dir(csv_path, cache_dir)
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        try:
+            with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+            cube = Cube(*(pd.read_parquet(os.path.join(path, f'{t}.parquet')) for t in ('cells', 'labels', 'oris')),
+                        meta)
+            print(f"[Cube] {len(cube.cells)} cells ({meta['rows']} rows) <- {path}")
+            return cube
+        except Exception as e:  # partial/unreadable cube: rebuild
+            print(f"[Cube] ignoring {path}: {e}")
+
+    cube = build_cube(load_shr(csv_path, cache_dir=cache_dir))
+    try:
+        tmp = path + '.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for t in ('cells', 'labels', 'oris'):
+            getattr(cube, t).to_parquet(os.path.join(tmp, f'{t}.parquet'), index=False)
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(cube.meta, f)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        # drop cubes for older versions of the same CSV
+        for old in stale_entries(path, re.escape(cache_stem(csv_path)) + r'\.cube\.v\d+\.[0-9a-f]{32}'):
+            shutil.rmtree(old, ignore_errors=True)
+        print(f"[Cube] {len(cube.cells)} cells ({cube.meta['rows']} rows) -> {path}")
+    except ImportError as e:
+        print(f"[Cube] not written (needs pyarrow or fastparquet): {e}")
+    except OSError as e:
+        print(f"[Cube] not written: {e}")
+    return cube
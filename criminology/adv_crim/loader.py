@@ -0,0 +1,118 @@
+import os, re, hashlib
+import pandas as pd
+
+# Typed SHR loader with an on-disk Parquet cache.
+# Only the columns map_cluster uses are read; low-cardinality text becomes
+# 'category', Year/ages become nullable small ints (when every value is a
+# plain integer). Empty cells are the only NA marker, as in the old
+# read_csv(dtype=str, keep_default_na=False).replace({'': pd.NA}) path.
+# The cache file is keyed by a hash of the CSV bytes, so edits to the CSV
+# (or to the schema below) simply produce a new cache entry. Entry names also
+# carry a hash of the CSV's path (cache_stem), so same-named CSVs sharing a
+# --cache-dir keep separate entries; moving a CSV starts a new one.
+
+CACHE_VERSION = 1
+
+TEXT_COLUMNS = ['ID']
+CATEGORY_COLUMNS = [
+    'CNTYFIPS', 'MSA', 'State', 'Ori', 'Agency', 'VicSex', 'OffSex', 'Weapon', 'Solved',
+    'Month', 'Relationship', 'Circumstance', 'Subcircum', 'Situation',
+]
+INT_COLUMNS = ['Year', 'VicAge', 'OffAge']
+SHR_COLUMNS = TEXT_COLUMNS + CATEGORY_COLUMNS + INT_COLUMNS
+
+_INT_RE = re.compile(r'-?(0|[1-9]\d{0,3})')  # round-trips exactly through Int16
+
+
+def file_digest(path, chunk=1 << 20):
+    """blake2b hex digest of a file's bytes (streamed)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _small_int(s):
+    """Int16 copy of a text column, or the column as 'category' if any value is not a plain integer."""
+    vals = s.dropna()
+    if vals.map(lambda v: bool(_INT_RE.fullmatch(v))).all():
+        return pd.to_numeric(s).astype('Int16')
+    return s.astype('category')
+
+
+def read_shr_csv(csv_path):
+    """Read the SHR columns we use from csv_path with compact dtypes (no cache)."""
+    wanted = set(SHR_COLUMNS)
+    dtypes = {c: 'category' for c in CATEGORY_COLUMNS}
+    dtypes.update({c: str for c in TEXT_COLUMNS + INT_COLUMNS})
+    df = pd.read_csv(csv_path, usecols=lambda c: c in wanted, dtype=dtypes,
+                     keep_default_na=False, na_values=[''])
+    for c in INT_COLUMNS:
+        if c in df.columns:
+            df[c] = _small_int(df[c])
+    return _empty_categories_as_str(df)
+
+
+def _empty_categories_as_str(df):
+    # an all-empty category column has no categories to infer a dtype from, and
+    # Parquet returns those as object; pin them to str so both paths agree
+    for c in CATEGORY_COLUMNS:
+        if c in df.columns and isinstance(df[c].dtype, pd.CategoricalDtype) and not len(df[c].cat.categories):
+            df[c] = df[c].cat.set_categories(pd.Index([], dtype=str))
+    return df
+
+
+def cache_dir_for(csv_path, cache_dir=None):
+    """cache_dir, defaulting to .shr_cache next to the CSV."""
+    return cache_dir or os.path.join(os.path.dirname(os.path.abspath(csv_path)), '.shr_cache')
+
+
+def cache_stem(csv_path):
+    """'<csv stem>.<hash of the CSV's absolute path>', the name prefix of its cache entries."""
+    where = os.path.normcase(os.path.abspath(csv_path)).encode('utf-8')
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return f"{stem}.{hashlib.blake2b(where, digest_size=4).hexdigest()}"
+
+
+def cache_path(csv_path, cache_dir=None, digest=None):
+    digest = digest or file_digest(csv_path)
+    return os.path.join(cache_dir_for(csv_path, cache_dir),
+                        f"{cache_stem(csv_path)}.v{CACHE_VERSION}.{digest}.parquet")
+
+
+def stale_entries(path, pattern):
+    """Other entries next to cache entry `path` whose names fullmatch `pattern` (older versions of the same CSV)."""
+    parent, name = os.path.split(path)
+    rx = re.compile(pattern)
+    return [os.path.join(parent, n) for n in os.listdir(parent) if n != name and rx.fullmatch(n)]
+
+
+def load_shr(csv_path, cache_dir=None, use_cache=True):
+    """read_shr_csv(csv_path), served from / saved to the Parquet cache when possible."""
+    if not use_cache:
+        return read_shr_csv(csv_path)
+    path = cache_path(csv_path, cache_dir)
+    if os.path.exists(path):
+        try:
+            df = _empty_categories_as_str(pd.read_parquet(path))
+            print(f"[Cache] {len(df)} rows <- {path}")
+            return df
+        except Exception as e:  # unreadable/partial file or no parquet engine: rebuild
+            print(f"[Cache] ignoring {path}: {e}")
+
+    df = read_shr_csv(csv_path)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        # drop entries for older versions of the same CSV
+        for old in stale_entries(path, re.escape(cache_stem(csv_path)) + r'\.v\d+\.[0-9a-f]{32}\.parquet'):
+            os.remove(old)
+        print(f"[Cache] {len(df)} rows -> {path}")
+    except ImportError as e:
+        print(f"[Cache] not written (needs pyarrow or fastparquet): {e}")
+    except OSError as e:
+        print(f"[Cache] not written: {e}")
+    return df
@@ -6,6 +6,8 @@
 
 import argparse, re, os
 from reporting import write_report
+from loader import load_shr
+import numpy as np
 import pandas as pd
 import hashlib  # add
 # add near imports/helpers
@@ -24,6 +26,28 @@ def _top1_label(series, pat=_REL_UNK_RE):
     vc = s[known].value_counts()
     return vc.index[0] if len(vc) else '—'
 
+def _unknown_flags(series, pat=_REL_UNK_RE):
+    """Per-row version of the _unknown_rate test (NA, blank or unknown-like), run once per distinct value."""
+    codes, uniques = pd.factorize(series)
+    u = pd.Series(uniques).astype('string')
+    flags = (u.isna() | u.str.strip().eq('') | u.str.contains(pat, na=False)).to_numpy(dtype=bool)
+    return np.append(flags, True)[codes]  # code -1 (NA) -> unknown
+
+def _top1_labels(series, unknown, gid, ngroups):
+    """_top1_label for every group id at once: most frequent known label, ties to the first seen."""
+    out = np.full(ngroups, '—', dtype=object)
+    codes, uniques = pd.factorize(series)
+    known = ~unknown
+    if known.any():
+        n = len(uniques)
+        pair = gid[known].astype(np.int64) * n + codes[known]
+        pairs, first, counts = np.unique(pair, return_index=True, return_counts=True)
+        pairs = pairs[np.lexsort((first, -counts, pairs // n))]
+        lead = np.r_[True, pairs[1:] // n != pairs[:-1] // n]
+        labels = pd.Series(uniques).astype('string').astype(object).to_numpy()
+        out[pairs[lead] // n] = labels[pairs[lead] % n]
+    return out
+
 
 def _pos_hash8(s):  # add
     h = int(hashlib.md5(str(s).encode('utf-8')).hexdigest(), 16)
@@ -44,6 +68,47 @@ def _victim_sex_code(v):
     if v in ('F','FEMALE'): return 2
     return 9
 
+def _map_unique(series, fn):
+    """series.apply(fn), calling fn once per distinct value (NA rows share one call)."""
+    if not len(series):
+        return series.apply(fn)
+    codes, uniques = pd.factorize(series)  # NA -> -1
+    values = [fn(u) for u in uniques]
+    na = codes < 0
+    values.append(fn(series[na].iloc[0]) if na.any() else values[0])  # index -1 = NA
+    return pd.Series(np.asarray(values)[codes], index=series.index)
+
+def _text_codes(series):
+    """(codes, texts) with texts[codes[i]] == f"{series.iloc[i]}"; NAs keep their own spelling."""
+    codes, uniques = pd.factorize(series)
+    texts = [f"{u}" for u in uniques]
+    na = codes < 0
+    if na.any():
+        na_codes, na_texts = pd.factorize(np.array([f"{v}" for v in series[na]], dtype=object))
+        codes = codes.copy()
+        codes[na] = na_codes + len(texts)
+        texts += list(na_texts)
+    return codes.astype(np.int64), texts
+
+def _fallback_ids(loc, sex, weapon):
+    """_pos_hash8(f"{loc}|{sex}|{weapon}") per row, hashing each distinct combination once."""
+    lc, lt = _text_codes(loc)
+    sc, st = _text_codes(sex)
+    wc, wt = _text_codes(weapon)
+    ns, nw = len(st), len(wt)
+    keys, inverse = np.unique((lc * ns + sc) * nw + wc, return_inverse=True)
+    ids = np.array([_pos_hash8(f"{lt[k // (ns * nw)]}|{st[k // nw % ns]}|{wt[k % nw]}") for k in keys],
+                   dtype=np.int64)
+    return ids[inverse.ravel()]
+
+def _group_ids(df, num_col, loc_col):
+    """MURDGRP: NUM*1000 + SEX*100 + WEAPON_CODE, or the location-label hash where NUM is 0."""
+    ids = ((df[num_col] * 1000) + (df['SEX'] * 100) + df['WEAPON_CODE']).to_numpy(copy=True)
+    need = ~(df[num_col] > 0).to_numpy()
+    if need.any():
+        ids[need] = _fallback_ids(df[loc_col][need], df['SEX'][need], df['WEAPON_CODE'][need])
+    return pd.Series(ids, index=df.index)
+
 def _offender_unknown(offsex):
     """OFFSEX 'U' => unknown -> Not Solved. We also treat 'Unknown or not reported' as U."""
     v = str(offsex).strip().upper()
@@ -54,102 +119,112 @@ def _weapon_code(series):
     # If already numeric, keep it; else factorize strings to ints.
     if pd.api.types.is_numeric_dtype(series):
         return series.fillna(0).astype(int)
+    if isinstance(series.dtype, pd.CategoricalDtype):  # typed loader; fillna('Unknown') needs plain values
+        series = series.astype(object)
     codes, _ = pd.factorize(series.fillna('Unknown').astype(str), sort=True)
     return pd.Series(codes, index=series.index).astype(int)
 
+def _solved(df, solved_source='offsex'):
+    """SOLVED (0/1) per SPSS logic: OffSex 'U' proxy, or the dataset's own Solved field."""
+    if solved_source == 'offsex':
+        solved = pd.Series(1, index=df.index)
+        cond_unknown = df['OffSex'].astype(str).str.upper().str[0].eq('U')
+        solved[cond_unknown] = 0
+        return solved
+    # 'field'
+    return (df['Solved'].astype(str).str.strip().str.upper()
+            .map({'YES':1,'Y':1,'NO':0,'N':0})
+            .fillna(0).astype(int))
+
 # --- core ---
 def build_groups(df, solved_source='offsex'):
     # Compute SOLVED per SPSS logic
-
-    # REPLACE SOLVED block
-    if solved_source == 'offsex':
-        df['SOLVED'] = 1
-        cond_unknown = df['OffSex'].astype(str).str.upper().str[0].eq('U')
-        df.loc[cond_unknown, 'SOLVED'] = 0
-    else:  # 'field'
-        df['SOLVED'] = (df['Solved'].astype(str).str.strip().str.upper()
-                        .map({'YES':1,'Y':1,'NO':0,'N':0})
-                        .fillna(0).astype(int))
+    df['SOLVED'] = _solved(df, solved_source)
 
     # ADD year/decade
     df['YEAR_NUM'] = pd.to_numeric(df['Year'], errors='coerce')
     df['DECADE']   = ((df['YEAR_NUM'] // 10) * 10).astype('Int64')
 
 
-    # Victim sex numeric
-    df['SEX'] = df['VicSex'].apply(_victim_sex_code)
+    # Victim sex numeric (helpers run once per distinct value)
+    df['SEX'] = _map_unique(df['VicSex'], _victim_sex_code)
 
     # Numeric CNTY and MSA (extract digits; non-numeric -> 0)
-    df['CNTY'] = df['CNTYFIPS'].apply(_digits_or_zero)
-    df['MSA_NUM'] = df['MSA'].apply(_digits_or_zero)
+    df['CNTY'] = _map_unique(df['CNTYFIPS'], _digits_or_zero)
+    df['MSA_NUM'] = _map_unique(df['MSA'], _digits_or_zero)
 
     # Weapon numeric code (auto map if strings)
     df['WEAPON_CODE'] = _weapon_code(df['Weapon'])
 
-    # Group IDs
-    has_cnty_num = df['CNTY'] > 0
-    mgrp1_numeric  = (df['CNTY'] * 1000) + (df['SEX'] * 100) + df['WEAPON_CODE']
-    mgrp1_fallback = df.apply(lambda r: _pos_hash8(f"{r['CNTYFIPS']}|{r['SEX']}|{r['WEAPON_CODE']}"), axis=1)
-    df['MURDGRP1']  = mgrp1_numeric.where(has_cnty_num, mgrp1_fallback)
-    
-    has_msa_num   = df['MSA_NUM'] > 0
-    mgrp2_numeric = (df['MSA_NUM'] * 1000) + (df['SEX'] * 100) + df['WEAPON_CODE']
-    mgrp2_fallback = df.apply(lambda r: _pos_hash8(f"{r['MSA']}|{r['SEX']}|{r['WEAPON_CODE']}"), axis=1)
-    df['MURDGRP2'] = mgrp2_numeric.where(has_msa_num, mgrp2_fallback)
+    # Group IDs: numeric where CNTY/MSA has digits, else a stable hash of the label
+    # (only for those rows, once per distinct label/sex/weapon combination)
+    df['MURDGRP1'] = _group_ids(df, 'CNTY', 'CNTYFIPS')
+    df['MURDGRP2'] = _group_ids(df, 'MSA_NUM', 'MSA')
     
 
     return df
 
 
-# change signature to accept the switch
-def aggregate(df, group='county', by_decade=False, relcirc=False):
-
+def _aggregate_keys(group='county', by_decade=False):
+    """(groupby keys, group-id column) of a cluster aggregate."""
     if group == 'county':
         keys = ['MURDGRP1', 'SEX', 'CNTY_LABEL', 'WEAPON_CODE']
         gid = 'MURDGRP1'
-        label_aggs = {
-            'WEAPON_LABEL': ('WEAPON_LABEL', 'first'),
-        }
     else:
         keys = ['MURDGRP2', 'SEX', 'MSA_LABEL', 'WEAPON_CODE']
         gid = 'MURDGRP2'
-        label_aggs = {
-            'WEAPON_LABEL': ('WEAPON_LABEL', 'first'),
-        }
 
     if by_decade:
         keys = keys + ['DECADE']
+    return keys, gid
 
-    # >>> NEW: optional Relationship/Circumstance stats
-    relcirc_aggs = {}
-    if relcirc:
-        relcirc_aggs = {
-            'REL_UNK_RATE':  ('Relationship', _unknown_rate),
-            'REL_TOP1':      ('Relationship', _top1_label),
-            'CIRC_UNK_RATE': ('Circumstance', _unknown_rate),
-            'CIRC_TOP1':     ('Circumstance', _top1_label),
-        }
-
-    g = (df.groupby(keys, dropna=False)
-           .agg(TOTAL=('SOLVED','count'),
-                SOLVED=('SOLVED','sum'),
-                PERCENT=('SOLVED','mean'),
-                **label_aggs,
-                **relcirc_aggs)
-           .reset_index())
-
+def _rank_clusters(g, gid, relcirc=False):
+    """UNSOLVED, ranking and MURDGRP naming for a reset_index()'d cluster aggregate."""
     g['UNSOLVED'] = g['TOTAL'] - g['SOLVED']
     g = g.sort_values(['UNSOLVED','TOTAL'], ascending=[False, False]).reset_index(drop=True)
     g.rename(columns={gid:'MURDGRP'}, inplace=True)
     
     if relcirc:
         g['REPORT_GAP_IDX'] = (g.get('REL_UNK_RATE', 0) + g.get('CIRC_UNK_RATE', 0)) / 2
-    
-    
-    
-    
     return g
 
+# change signature to accept the switch
+def aggregate(df, group='county', by_decade=False, relcirc=False):
+
+    keys, gid = _aggregate_keys(group, by_decade)
+    label_aggs = {
+        'WEAPON_LABEL': ('WEAPON_LABEL', 'first'),
+    }
+
+    gb = df.groupby(keys, dropna=False)
+    g = gb.agg(TOTAL=('SOLVED','count'),
+               SOLVED=('SOLVED','sum'),
+               PERCENT=('SOLVED','mean'),
+               **label_aggs)
+
+    # >>> NEW: optional Relationship/Circumstance stats
+    # same values as _unknown_rate/_top1_label per group, from one unknown flag per row
+    if relcirc:
+        row_group = gb.ngroup().to_numpy()
+        size = np.bincount(row_group, minlength=len(g))
+        for field, prefix in (('Relationship', 'REL'), ('Circumstance', 'CIRC')):
+            unknown = _unknown_flags(df[field])
+            g[f'{prefix}_UNK_RATE'] = np.bincount(row_group, weights=unknown, minlength=len(g)) / size
+            g[f'{prefix}_TOP1'] = _top1_labels(df[field], unknown, row_group, len(g))
+    return _rank_clusters(g.reset_index(), gid, relcirc)
+
+def per_ori_summary(q):
+    """Per-ORI TOTAL/SOLVED (+ Relationship/Circumstance unknown rates when present) for case rows q."""
+    aggs = {'TOTAL': ('SOLVED','count'), 'SOLVED': ('SOLVED','sum')}
+    if 'Relationship' in q.columns:
+        aggs['REL_UNK_RATE'] = ('Relationship', _unknown_rate)
+    if 'Circumstance' in q.columns:
+        aggs['CIRC_UNK_RATE'] = ('Circumstance', _unknown_rate)
+    per_ori = q.groupby(['Ori','Agency'], dropna=False, observed=True).agg(**aggs).reset_index()
+    per_ori['PERCENT']  = per_ori['SOLVED'] / per_ori['TOTAL']
+    per_ori['UNSOLVED'] = per_ori['TOTAL'] - per_ori['SOLVED']
+    return per_ori.sort_values(['UNSOLVED','TOTAL'], ascending=[False, False])
+
 def filter_view(agg, focus_sex='female', threshold=0.33, min_total=10, min_known_rel=0.0):
     view = agg.copy()
     if focus_sex in ('male','female'):
@@ -163,8 +238,7 @@ def filter_view(agg, focus_sex='female', threshold=0.33, min_total=10, min_known
         view = view[known_share >= float(min_known_rel)]
     return view.reset_index(drop=True)
 
-def main():
-    import os
+def build_parser():
     ap = argparse.ArgumentParser(description="MAP-style clustering & solvability analysis from SHR-like CSV.")
     ap.add_argument('csv',  help='Input CSV with columns like CNTYFIPS, MSA, VicSex, OffSex, Weapon, etc.')
     ap.add_argument('--group', choices=['county','msa'], default='county', help='County (MURDGRP1) or MSA (MURDGRP2).')
@@ -227,10 +301,22 @@ def main():
 
     ap.add_argument('--msa-only', default=None,
                     help='Restrict analysis to a single MSA label (exact match). Only applies when --group msa.')
-
-
-    args = ap.parse_args()
-
+    # typed loader cache
+    ap.add_argument('--cache-dir', default=None,
+                    help='Where to keep the Parquet copy of the CSV (default: .shr_cache next to the CSV).')
+    ap.add_argument('--no-cache', action='store_true',
+                    help='Always parse the CSV; do not read or write the Parquet cache.')
+    ap.add_argument('--cube', action='store_true',
+                    help='Answer aggregates/per-ORI from the precomputed cube (built once per CSV, cached like the load); case dumps still read rows.')
+    # batch mode (see batch.py)
+    ap.add_argument('--batch', default=None,
+                    help='YAML/JSON list of scenarios (option -> value) to run against one loaded dataset.')
+    ap.add_argument('--jobs', type=int, default=1,
+                    help='With --batch: scenarios to filter/report in parallel processes.')
+    return ap
+
+
+def apply_preset(args):
     # apply presets (explicit flags may be overridden by preset for simplicity)
     if args.preset:
         if args.preset == 'modern_female':
@@ -249,13 +335,20 @@ def main():
             args.min_total = 20
             args.threshold = 0.30
             args.relcirc = True
+    return args
 
-    os.makedirs(args.outdir, exist_ok=True)
-    df = pd.read_csv(args.csv, dtype=str, keep_default_na=False).replace({'': pd.NA})
-    # after reading df
+
+def offsex_mismatch(df):
+    """Share of rows where the OffSex proxy disagrees with the dataset's Solved field."""
     offsex_proxy = df['OffSex'].astype(str).str.upper().str[0].eq('U').map({True:0, False:1})
     field_truth  = df['Solved'].astype(str).str.strip().str.upper().map({'YES':1,'Y':1,'NO':0,'N':0}).fillna(0).astype(int)
-    mismatch = (offsex_proxy != field_truth).mean()
+    return float((offsex_proxy != field_truth).mean())
+
+
+def check_input(df, mismatch=None):
+    # after reading df
+    if mismatch is None:
+        mismatch = offsex_mismatch(df)
     if mismatch > 0.10:
         print(f"[Warn] 'OffSex' proxy disagrees with dataset 'Solved' on {mismatch:.0%} of rows; using --solved-source field.")
 
@@ -265,13 +358,24 @@ def main():
     if missing:
         raise SystemExit(f"Missing columns: {missing}. Ensure CSV headers match or rename accordingly.")
 
-    df = build_groups(df, solved_source=args.solved_source)
+
+def prepare(df, solved_source='field'):
+    """build_groups plus the label/age columns every run uses (row-wise, so safe before filtering)."""
+    df = build_groups(df, solved_source=solved_source)
     
     # ensure labels exist (keep if you already set these earlier)
     df['CNTY_LABEL']   = df['CNTYFIPS'].astype(str).str.strip()
     df['MSA_LABEL']    = df['MSA'].astype(str).str.strip()
     df['WEAPON_LABEL'] = df['Weapon'].astype(str).str.strip()
-    
+
+    # in build_groups
+    df['OffAge_num'] = pd.to_numeric(df['OffAge'], errors='coerce').replace({999: pd.NA})
+    df['VicAge_num'] = pd.to_numeric(df['VicAge'], errors='coerce')
+    return df
+
+
+def select_rows(df, args):
+    """Apply --msa-only and --min-decade to the case rows."""
     if args.msa_only:
         if args.group != 'msa':
             print("[Warn] --msa-only ignored because --group is not 'msa'")
@@ -289,14 +393,18 @@ def main():
         mindec = int(args.min_decade) - (int(args.min_decade) % 10)  # floor to decade
         df = df[df['DECADE'].ge(mindec)]
         print(f"[Filter] DECADE >= {mindec}: {len(df)} rows remain")   
-    
-    
-    
-    # in build_groups
-    df['OffAge_num'] = pd.to_numeric(df['OffAge'], errors='coerce').replace({999: pd.NA})
-    df['VicAge_num'] = pd.to_numeric(df['VicAge'], errors='coerce')
+    return df
+
+
+def run_scenario(df, args, agg=None):
+    """Dumps, aggregate, filtered view and report for one set of CLI args (agg: precomputed aggregate).
+    df is the selected case rows, or a selected cube.Cube (no case dumps)."""
+    os.makedirs(args.outdir, exist_ok=True)
+    is_cube = not isinstance(df, pd.DataFrame)
 
     # --- CASE-LEVEL DUMP (runs before aggregate/filter) ---
+    if args.dump_msa and args.dump_weapon and is_cube:
+        raise ValueError("case dumps need case rows, not the cube")
     if args.dump_msa and args.dump_weapon:
         # start from original case rows, respect focus-sex if set
         q = df.copy()
@@ -318,7 +426,6 @@ def main():
         cols = [c for c in cols if c in q.columns]
         q = q[cols].sort_values(['Year','Month'], ascending=True)
 
-        import os
         os.makedirs(os.path.dirname(args.dump_out), exist_ok=True)
         q.to_csv(args.dump_out, index=False)
         print(f"[Dump] {len(q)} case rows -> {args.dump_out}")
@@ -326,16 +433,9 @@ def main():
         if args.per_ori:
             if 'Ori' in q.columns:
                 # per-ORI summary (add REL/CIRC unknown rates)
-                per_ori = (q.groupby(['Ori','Agency'], dropna=False)
-                             .agg(TOTAL=('SOLVED','count'),
-                                  SOLVED=('SOLVED','sum'),
-                                  REL_UNK_RATE=('Relationship', _unknown_rate),
-                                  CIRC_UNK_RATE=('Circumstance', _unknown_rate))
-                             .reset_index())
-                per_ori['PERCENT']  = per_ori['SOLVED'] / per_ori['TOTAL']
-                per_ori['UNSOLVED'] = per_ori['TOTAL'] - per_ori['SOLVED']
+                per_ori = per_ori_summary(q)
                 side_path = os.path.join(args.outdir, 'dump_cases_per_ori.csv')
-                per_ori.sort_values(['UNSOLVED','TOTAL'], ascending=[False, False]).to_csv(side_path, index=False)
+                per_ori.to_csv(side_path, index=False)
                 print("[Dump] per-ORI summary ->", side_path)
             else:
                 print("[Warn] --per-ori requested but 'Ori' column not found in data.")
@@ -344,7 +444,10 @@ def main():
     
     
 
-    agg = aggregate(df, group=args.group, by_decade=args.by_decade, relcirc=args.relcirc)
+    if agg is None and is_cube:
+        agg = df.aggregate(group=args.group, by_decade=args.by_decade, relcirc=args.relcirc)
+    elif agg is None:
+        agg = aggregate(df, group=args.group, by_decade=args.by_decade, relcirc=args.relcirc)
     agg_path = os.path.join(args.outdir, f'AGGREGATE_{args.group.upper()}.csv')
     
     
@@ -391,22 +494,12 @@ def main():
                     elif 'Ori' not in df.columns or 'Agency' not in df.columns:
                         print("[Auto] Missing 'Ori' or 'Agency' column; cannot build per-ORI map file.")
                     else:
-                        q = df[df[gid_field].isin(top_ids)].copy()
-                        per_ori = (q.groupby(['Ori','Agency'], dropna=False)
-                                     .agg(TOTAL=('SOLVED','count'),
-                                          SOLVED=('SOLVED','sum'),
-                                          REL_UNK_RATE=('Relationship', _unknown_rate) if 'Relationship' in q.columns else ('SOLVED','sum'),
-                                          CIRC_UNK_RATE=('Circumstance', _unknown_rate) if 'Circumstance' in q.columns else ('SOLVED','sum'))
-                                     .reset_index())
-                        # If relationship/circumstance absent, above used placeholders; drop them
-                        if isinstance(per_ori['REL_UNK_RATE'].dtype, pd.core.dtypes.dtypes.IntegerDtype) or str(per_ori['REL_UNK_RATE'].dtype).startswith('int'):
-                            per_ori.drop(columns=['REL_UNK_RATE'], inplace=True)
-                        if isinstance(per_ori['CIRC_UNK_RATE'].dtype, pd.core.dtypes.dtypes.IntegerDtype) or str(per_ori['CIRC_UNK_RATE'].dtype).startswith('int'):
-                            per_ori.drop(columns=['CIRC_UNK_RATE'], inplace=True)
-                        per_ori['PERCENT']  = per_ori['SOLVED'] / per_ori['TOTAL']
-                        per_ori['UNSOLVED'] = per_ori['TOTAL'] - per_ori['SOLVED']
+                        if is_cube:
+                            per_ori = df.per_ori(gid_field, top_ids)
+                        else:
+                            per_ori = per_ori_summary(df[df[gid_field].isin(top_ids)])
                         side_path = os.path.join(args.outdir, 'dump_cases_per_ori.csv')
-                        per_ori.sort_values(['UNSOLVED','TOTAL'], ascending=[False, False]).to_csv(side_path, index=False)
+                        per_ori.to_csv(side_path, index=False)
                         print("[Auto] per-ORI summary ->", side_path)
             except Exception as e:
                 print("[Auto] Failed to build per-ORI:", e)
@@ -464,9 +557,12 @@ def main():
     view.to_csv(view_path, index=False)
     
     # optional: codebook for WEAPON_CODE -> WEAPON_LABEL
-    codebook = (df[['WEAPON_CODE','WEAPON_LABEL']]
-                .drop_duplicates()
-                .sort_values('WEAPON_CODE'))
+    if is_cube:
+        codebook = df.codebook()
+    else:
+        codebook = (df[['WEAPON_CODE','WEAPON_LABEL']]
+                    .drop_duplicates()
+                    .sort_values('WEAPON_CODE'))
     codebook.to_csv(os.path.join(args.outdir, 'WEAPON_CODEBOOK.csv'), index=False)
     
     loc_col = 'MSA_LABEL' if args.group == 'msa' else 'CNTY_LABEL'
@@ -488,5 +584,24 @@ def main():
     print(view.head(10).to_string(index=False))
 
 
+def main(argv=None):
+    args = apply_preset(build_parser().parse_args(argv))
+    if args.batch:
+        from batch import run_batch
+        return run_batch(args, argv)
+
+    os.makedirs(args.outdir, exist_ok=True)
+    if args.cube and not (args.dump_msa and args.dump_weapon):
+        from cube import load_cube
+        cube = load_cube(args.csv, cache_dir=args.cache_dir, use_cache=not args.no_cache)
+        cube.check_input()
+        return run_scenario(cube.select(args), args)
+
+    df = load_shr(args.csv, cache_dir=args.cache_dir, use_cache=not args.no_cache)
+    check_input(df)
+    df = select_rows(prepare(df, solved_source=args.solved_source), args)
+    run_scenario(df, args)
+
+
 if __name__ == '__main__':
     main()
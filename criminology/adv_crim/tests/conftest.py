@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+
+def write_shr_csv(path, n=80):
+    """Small synthetic SHR extract: 3 counties in 2 MSAs, 5 ORIs, both sexes and
+    weapons, 1980-2019, with unknown/blank Relationship and tied labels."""
+    rows = []
+    for i in range(n):
+        rows.append({
+            'ID': i, 'CNTYFIPS': f"Cty{i % 3}, IL", 'MSA': f"Metro{i % 3 % 2}, IL",
+            'Ori': f"IL0{i % 5}", 'Agency': f"Agency {i % 5}", 'State': 'IL',
+            'VicSex': 'Female' if i % 3 else 'Male', 'OffSex': 'Unknown' if i % 4 == 0 else 'Male',
+            'Weapon': 'Knife' if i % 2 else 'Handgun', 'Solved': 'No' if i % 4 == 0 else 'Yes',
+            'Year': 1980 + i % 40, 'Month': 'May', 'VicAge': 30, 'OffAge': 999,
+            'Relationship': ['Unknown', 'Friend', 'Wife', 'Stranger', ''][i % 5],
+            'Circumstance': ['Other', 'Robbery', 'Undetermined'][i % 3],
+        })
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def shr_csv(tmp_path):
+    """Path of a write_shr_csv() extract in tmp_path."""
+    return write_shr_csv(tmp_path / 'shr.csv')
@@ -0,0 +1,34 @@
+import os, sys, json
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, '..', 'adv_crim'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import map_cluster as mc
+from batch import scenario_argv
+
+
+def test_batch_matches_single_runs(shr_csv, tmp_path, monkeypatch):
+    scenarios = [
+        {'name': 'a', 'group': 'msa', 'threshold': 0.9, 'min_total': 1},
+        {'name': 'b', 'group': 'msa', 'threshold': 0.5, 'min_total': 1, 'focus_sex': 'all'},
+        {'name': 'c', 'group': 'county', 'relcirc': True, 'min_decade': 2000, 'threshold': 1.0, 'report': False},
+    ]
+    spec = tmp_path / 'scen.json'
+    spec.write_text(json.dumps(scenarios), encoding='utf-8')
+
+    calls = []
+    real_aggregate = mc.aggregate
+    monkeypatch.setattr(mc, 'aggregate', lambda *a, **k: calls.append(k) or real_aggregate(*a, **k))
+    mc.main([str(shr_csv), '--batch', str(spec), '--outdir', str(tmp_path / 'batch'), '--no-cache'])
+    assert len(calls) == 2  # a and b share one aggregate
+    assert not os.path.exists(tmp_path / 'batch' / 'c' / 'report_county.md')
+
+    for scen in scenarios:
+        single = tmp_path / 'single' / scen['name']
+        mc.main([str(shr_csv), '--outdir', str(single), '--no-cache'] + scenario_argv(scen))
+        for name in sorted(os.listdir(single)):
+            if name.endswith('.csv') and not name.startswith('report_'):
+                batch_file = tmp_path / 'batch' / scen['name'] / name
+                assert batch_file.read_bytes() == (single / name).read_bytes(), name
@@ -0,0 +1,52 @@
+import os, sys, types
+import pandas as pd
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, '..', 'adv_crim'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import map_cluster as mc
+from cube import build_cube, load_cube
+from loader import load_shr
+
+
+def _same(a, b):
+    pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True),
+                                  check_dtype=False, check_categorical=False)
+
+
+def test_cube_matches_rows(shr_csv):
+    df = load_shr(str(shr_csv), use_cache=False)
+    cube = build_cube(df)
+    for source in ('field', 'offsex'):
+        prepared = mc.prepare(df.copy(), solved_source=source)
+        for group, msa_only, min_decade in (('county', None, None), ('msa', 'Metro1, IL', None), ('msa', None, 1995)):
+            a = types.SimpleNamespace(group=group, msa_only=msa_only, min_decade=min_decade, solved_source=source)
+            rows, sub = mc.select_rows(prepared, a), cube.select(a)
+            for by_decade in (False, True):
+                for relcirc in (False, True):
+                    _same(mc.aggregate(rows, group=group, by_decade=by_decade, relcirc=relcirc),
+                          sub.aggregate(group=group, by_decade=by_decade, relcirc=relcirc))
+            gid = 'MURDGRP1' if group == 'county' else 'MURDGRP2'
+            ids = rows[gid].unique()[:2]
+            _same(mc.per_ori_summary(rows[rows[gid].isin(ids)]), sub.per_ori(gid, ids))
+    _same(prepared[['WEAPON_CODE', 'WEAPON_LABEL']].drop_duplicates().sort_values('WEAPON_CODE'), cube.codebook())
+
+
+def test_cube_cache_and_cli(shr_csv, tmp_path):
+    cache = tmp_path / 'cache'
+    built = load_cube(str(shr_csv), cache_dir=str(cache))
+    cached = load_cube(str(shr_csv), cache_dir=str(cache))
+    pd.testing.assert_frame_equal(built.cells, cached.cells, check_categorical=False)
+    assert cached.meta == built.meta
+
+    opts = ['--group', 'msa', '--relcirc', '--by-decade', '--threshold', '1.0', '--min-total', '1', '--auto-per-ori',
+            '--cache-dir', str(cache)]
+    mc.main([str(shr_csv), '--outdir', str(tmp_path / 'rows')] + opts)
+    mc.main([str(shr_csv), '--outdir', str(tmp_path / 'cube'), '--cube'] + opts)
+    names = sorted(n for n in os.listdir(tmp_path / 'rows') if n.endswith('.csv') and not n.startswith('report_'))
+    assert 'dump_cases_per_ori.csv' in names
+    assert names == sorted(n for n in os.listdir(tmp_path / 'cube') if n.endswith('.csv') and not n.startswith('report_'))
+    for name in names:
+        assert (tmp_path / 'cube' / name).read_bytes() == (tmp_path / 'rows' / name).read_bytes(), name
@@ -30,3 +30,39 @@ def test_anomaly_score_basic():
     assert out['anomaly_score'].iloc[0] > out['anomaly_score'].iloc[1]
 
 
+def test_group_ids_match_rowwise_hash():
+    df = pd.DataFrame({
+        'CNTYFIPS': ['Cook, IL', '17031', None, 'Cook, IL', 'Kent, MI', None],
+        'MSA': ['Chicago, IL', None, 'Rural, IL', '16980', 'Chicago, IL', None],
+        'VicSex': ['Female', 'Male', 'Female', None, 'Female', 'Male'],
+        'Weapon': ['Handgun - pistol, revolver, etc', 'Knife or cutting instrument',
+                   'Handgun - pistol, revolver, etc', 'Other', 'Other', None],
+        'Solved': ['Yes', 'No', 'Yes', 'No', 'Yes', 'No'],
+        'Year': ['1990', '2001', '1985', '2010', '1999', '2015'],
+    })
+    g = mc.build_groups(df, 'field')
+    for i, r in g.iterrows():
+        for num, loc, col in (('CNTY', 'CNTYFIPS', 'MURDGRP1'), ('MSA_NUM', 'MSA', 'MURDGRP2')):
+            if r[num] > 0:
+                want = r[num] * 1000 + r['SEX'] * 100 + r['WEAPON_CODE']
+            else:
+                want = mc._pos_hash8(f"{r[loc]}|{r['SEX']}|{r['WEAPON_CODE']}")
+            assert g.at[i, col] == want
+
+
+def test_aggregate_relcirc_matches_per_group_helpers():
+    rel = ['Friend', 'Wife', 'Unknown', None, ' ', 'Wife', 'Friend', 'Not determined', 'Husband', 'Friend']
+    circ = ['Other', None, 'Undetermined', 'Robbery', 'Robbery', 'Other', 'Unknown', 'Other', ' ', 'Rape']
+    df = pd.DataFrame({
+        'MURDGRP1': [1, 1, 1, 1, 2, 2, 2, 3, 3, 3], 'SEX': 2, 'WEAPON_CODE': 0,
+        'CNTY_LABEL': ['A', 'A', 'A', 'A', 'B', 'B', 'B', None, None, None],
+        'WEAPON_LABEL': 'Knife', 'SOLVED': [1, 0, 0, 1, 0, 0, 1, 1, 0, 0],
+        'Relationship': rel, 'Circumstance': circ,
+    })
+    agg = mc.aggregate(df, group='county', relcirc=True)
+    for _, r in agg.iterrows():
+        rows = df[(df['MURDGRP1'] == r['MURDGRP'])]
+        assert r['REL_UNK_RATE'] == mc._unknown_rate(rows['Relationship'])
+        assert r['REL_TOP1'] == mc._top1_label(rows['Relationship'])
+        assert r['CIRC_UNK_RATE'] == mc._unknown_rate(rows['Circumstance'])
+        assert r['CIRC_TOP1'] == mc._top1_label(rows['Circumstance'])
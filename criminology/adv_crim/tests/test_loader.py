@@ -0,0 +1,68 @@
+import os, sys
+import pandas as pd
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, '..', 'adv_crim'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import map_cluster as mc
+from loader import load_shr
+
+
+CSV = """ID,CNTYFIPS,Ori,State,Agency,Solved,Year,Month,VicAge,VicSex,OffAge,OffSex,Weapon,Relationship,Circumstance,MSA,Unused
+1,"Cook, IL",IL01,IL,Chicago PD,Yes,1990,May,31,Female,999,Male,Handgun,Wife,Other,"Chicago, IL",x
+2,17031,IL01,IL,Chicago PD,No,2001,June,,Male,,Unknown,Knife,Unknown,,16980,y
+3,,MI02,MI,Kent SO,Yes,1985,May,Newborn,Female,40,Female,,Friend,Unknown,,z
+"""
+
+
+def _legacy_read(path):
+    return pd.read_csv(path, dtype=str, keep_default_na=False).replace({'': pd.NA})
+
+
+def test_load_shr_types_and_cache(tmp_path):
+    src = tmp_path / 'shr.csv'
+    src.write_text(CSV, encoding='utf-8')
+    cache = tmp_path / 'cache'
+
+    df = load_shr(str(src), cache_dir=str(cache))
+    assert 'Unused' not in df.columns
+    assert isinstance(df['Weapon'].dtype, pd.CategoricalDtype)
+    assert str(df['Year'].dtype) == 'Int16' and str(df['OffAge'].dtype) == 'Int16'
+    assert isinstance(df['VicAge'].dtype, pd.CategoricalDtype)  # 'Newborn' is not an integer
+    assert len(os.listdir(cache)) == 1
+
+    cached = load_shr(str(src), cache_dir=str(cache))
+    pd.testing.assert_frame_equal(df, cached)
+
+    src.write_text(CSV.replace('Knife', 'Rifle'), encoding='utf-8')
+    changed = load_shr(str(src), cache_dir=str(cache))
+    assert 'Rifle' in set(changed['Weapon'].dropna())
+    assert len(os.listdir(cache)) == 1  # old entry replaced
+
+
+def test_load_shr_keeps_group_ids(tmp_path):
+    src = tmp_path / 'shr.csv'
+    src.write_text(CSV, encoding='utf-8')
+    cols = ['MURDGRP1', 'MURDGRP2', 'SEX', 'WEAPON_CODE', 'SOLVED']
+    typed = mc.build_groups(load_shr(str(src), use_cache=False), 'field')
+    legacy = mc.build_groups(_legacy_read(str(src)), 'field')
+    assert typed[cols].astype('int64').equals(legacy[cols].astype('int64'))
+
+
+def test_shared_cache_dir_keeps_same_named_csvs(tmp_path):
+    cache = tmp_path / 'cache'
+    paths = [tmp_path / '2022' / 'SHR.csv', tmp_path / '2023' / 'SHR.csv', tmp_path / 'SHR.v2.csv']
+    for i, p in enumerate(paths):
+        p.parent.mkdir(exist_ok=True)
+        p.write_text(CSV.replace('Knife', f'Knife {i}'), encoding='utf-8')
+        load_shr(str(p), cache_dir=str(cache))
+    assert len(os.listdir(cache)) == 3
+    for i, p in enumerate(paths):
+        df = load_shr(str(p), cache_dir=str(cache))
+        assert f'Knife {i}' in set(df['Weapon'].dropna())
+
+    paths[0].write_text(CSV, encoding='utf-8')  # a new version replaces only its own entry
+    load_shr(str(paths[0]), cache_dir=str(cache))
+    assert len(os.listdir(cache)) == 3